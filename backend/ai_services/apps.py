@@ -5,3 +5,6 @@ class AiServicesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ai_services'
     verbose_name = 'AI Services and Integration'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,51 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+OPEN_GIG_GENERATION_KEY = 'ai:matches:open_gigs'
+
+
+def _match_version_key(user_id):
+    return f'ai:matches:version:{user_id}'
+
+
+def _get_counters(*keys):
+    """Current values of version counters, starting missing ones at a fresh value"""
+    values = cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            # Time based, so a counter dropped to invalidate it (or evicted)
+            # never restarts at a value existing entries were cached under
+            initial = time.time_ns()
+            cache.add(key, initial, timeout=None)
+            values[key] = cache.get(key, initial)
+    return [values[key] for key in keys]
+
+
+def bump_open_gig_generation():
+    """Invalidate every musician's cached matches after the open gig set changed"""
+    cache.delete(OPEN_GIG_GENERATION_KEY)
+
+
+def invalidate_matches(user_ids):
+    """Invalidate the cached matches of the given users only"""
+    cache.delete_many([_match_version_key(user_id) for user_id in set(user_ids)])
+
+
+def cached_matches(user_id, build):
+    """
+    Return the gig match response data of a user from the cache.
+
+    `build` is called on a miss. The key holds the user's match version
+    (dropped when their profile or stored matches change) and the open
+    gig generation (dropped when a gig opens, closes or is deleted).
+    """
+    version, generation = _get_counters(_match_version_key(user_id), OPEN_GIG_GENERATION_KEY)
+    cache_key = f'ai:matches:{user_id}:{version}:{generation}'
+
+    data = cache.get(cache_key)
+    if data is None:
+        data = build()
+        cache.set(cache_key, data, settings.MATCH_CACHE_TTL)
+    return data
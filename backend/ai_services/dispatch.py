@@ -0,0 +1,173 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import asdict
+
+from celery.signals import worker_process_init
+from django.conf import settings
+from django.core.cache import cache
+
+from .llm import Completion, complete, complete_batch, response_cache_key
+
+logger = logging.getLogger(__name__)
+
+# Seconds a leader's result stays readable for waiting processes
+COALESCED_RESULT_TTL = 10
+# Seconds between checks for another process's result
+COALESCE_POLL_INTERVAL = 0.05
+
+
+class LLMDispatcher:
+    """
+    Sends completion requests to the language model, sharing work between
+    concurrent callers.
+
+    - Single-flight: concurrent calls with the same prompt and model share
+      one API call. Callers in this process wait on the leader's future;
+      other processes see the leader's cache lock and wait for its result.
+    - Micro-batching: short prompts for the same model arriving within
+      ``AI_BATCH_WINDOW_MS`` are sent as one batched completion of up to
+      ``AI_BATCH_MAX_SIZE`` prompts.
+
+    Both need concurrent callers in one process (a threaded or gevent
+    Celery pool) to pay off beyond the cross-process single-flight. A
+    prefork or solo pool process runs one task at a time, so batching is
+    turned off there: the window would only delay every call.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {}  # request key -> Future of its Completion
+        self._pending = {}  # model -> _Batch waiting to be sent
+        self.batching = True
+
+    def complete(self, prompt, model):
+        """
+        Return ``(completion, coalesced)`` for `prompt`.
+
+        `coalesced` is True when the completion came from another caller's
+        API call, so this caller should not be charged for it.
+        """
+        key = response_cache_key(prompt, model)
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            return future.result(timeout=self._wait_timeout()), True
+
+        try:
+            completion, coalesced = self._complete_once(key, prompt, model)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(completion)
+            return completion, coalesced
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def _complete_once(self, key, prompt, model):
+        """Call the model unless another process is already making this call"""
+        lock_key, result_key = f'{key}:lock', f'{key}:result'
+        if cache.add(lock_key, 1, timeout=self._wait_timeout()):
+            try:
+                completion = self._submit(prompt, model)
+                # Set before the lock is released, so waiters always find it
+                cache.set(result_key, asdict(completion), COALESCED_RESULT_TTL)
+                return completion, False
+            finally:
+                cache.delete(lock_key)
+
+        deadline = time.monotonic() + self._wait_timeout()
+        while time.monotonic() < deadline:
+            locked = cache.get(lock_key) is not None
+            data = cache.get(result_key)
+            if data is not None:
+                return Completion(**data), True
+            if not locked:
+                # The other call failed; make our own
+                break
+            time.sleep(COALESCE_POLL_INTERVAL)
+        return self._submit(prompt, model), False
+
+    def _submit(self, prompt, model):
+        """Complete one prompt, through a micro-batch when it is short enough"""
+        if (not self.batching or settings.AI_BATCH_MAX_SIZE < 2
+                or len(prompt) > settings.AI_BATCH_MAX_PROMPT_CHARS):
+            return complete(prompt, model)
+
+        future = Future()
+        with self._lock:
+            batch = self._pending.get(model)
+            if batch is None:
+                batch = self._pending[model] = _Batch()
+                batch.timer = threading.Timer(
+                    settings.AI_BATCH_WINDOW_MS / 1000, self._flush, [model, batch]
+                )
+                batch.timer.daemon = True
+                batch.timer.start()
+            batch.items.append((prompt, future))
+            full = len(batch.items) >= settings.AI_BATCH_MAX_SIZE
+        if full:
+            self._flush(model, batch)
+
+        completion = future.result(timeout=self._wait_timeout())
+        if completion is None:
+            # Sent alone, or the batch failed: each caller makes its own call
+            completion = complete(prompt, model)
+        return completion
+
+    def _flush(self, model, batch):
+        """
+        Send `batch` if it is still the one waiting for `model` (the timer
+        of a batch sent when full may still fire).
+
+        Callers whose future resolves to None complete their prompt
+        themselves, so single calls and the fallback for a failed batch
+        run in the callers' threads, not the timer's.
+        """
+        with self._lock:
+            if self._pending.get(model) is not batch:
+                return
+            del self._pending[model]
+        batch.timer.cancel()
+
+        if len(batch.items) > 1:
+            prompts = [prompt for prompt, _ in batch.items]
+            try:
+                completions = complete_batch(prompts, model)
+            except Exception:
+                logger.warning('Batched completion of %d prompts failed', len(prompts), exc_info=True)
+            else:
+                for (_, future), completion in zip(batch.items, completions):
+                    future.set_result(completion)
+                return
+
+        for _, future in batch.items:
+            future.set_result(None)
+
+    @staticmethod
+    def _wait_timeout():
+        # Long enough for a queued batch plus the call itself
+        return settings.AI_REQUEST_TIMEOUT * 2 + settings.AI_BATCH_WINDOW_MS / 1000
+
+
+class _Batch:
+    """Prompts waiting for one batched completion, and the timer sending them"""
+
+    def __init__(self):
+        self.items = []  # (prompt, Future)
+        self.timer = None
+
+
+llm_dispatcher = LLMDispatcher()
+
+
+@worker_process_init.connect
+def disable_micro_batching(**kwargs):
+    """Prefork and solo pool processes run one task at a time; do not wait for a batch"""
+    llm_dispatcher.batching = False
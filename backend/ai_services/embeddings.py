@@ -0,0 +1,220 @@
+import hashlib
+import re
+import zlib
+
+import numpy as np
+from django.db import transaction
+
+from gigs.index import GigChangeFollower, record_gig_changes
+
+# Width of the hashed feature space
+DIMENSIONS = 512
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9'&+#-]*")
+STOP_WORDS = frozenset("""
+    a about an and are as at be but by for from has have i in is it its of on
+    or our so that the their this to us was we will with you your
+""".split())
+
+EMPTY_IDS = np.array([], dtype=np.int64)
+
+
+def tokenize(text):
+    """Lowercased word unigrams and bigrams of `text`, stop words removed"""
+    words = [word for word in TOKEN_RE.findall(text.lower()) if word not in STOP_WORDS]
+    return words + [f'{first} {second}' for first, second in zip(words, words[1:])]
+
+
+def embed(text):
+    """
+    Embed `text` as an L2-normalized float32 vector.
+
+    Tokens are hashed straight into ``DIMENSIONS`` buckets (the hashing
+    trick), with a second hash bit choosing the sign so collisions cancel
+    out instead of piling up. No vocabulary or network access is needed,
+    so a vector only depends on its own text. Counts are log-scaled to
+    stop a repeated word from dominating.
+    """
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+    tokens = tokenize(text)
+    if not tokens:
+        return vector
+
+    hashes = np.array([zlib.crc32(token.encode()) for token in tokens], dtype=np.uint32)
+    signs = np.where(hashes >> 31, 1.0, -1.0).astype(np.float32)
+    np.add.at(vector, hashes % DIMENSIONS, signs)
+    vector = np.sign(vector) * np.log1p(np.abs(vector))
+
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def gig_text(gig):
+    """The text a gig is embedded from"""
+    return '\n'.join([
+        gig.title, gig.description, gig.special_requirements, ' '.join(gig.genres or ())
+    ])
+
+
+def musician_text(musician):
+    """The text a musician profile is embedded from"""
+    songs = []
+    for song in musician.setlist_examples or ():
+        # Entries are plain titles or {"title": ..., "artist": ...} objects
+        songs.append(' '.join(map(str, song.values())) if isinstance(song, dict) else str(song))
+    return '\n'.join([
+        musician.user.bio, ' '.join(songs), ' '.join(musician.genres or ())
+    ])
+
+
+def text_hash(text):
+    """Fingerprint of an embedded text, to skip re-embedding unchanged texts"""
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def store_embedding(kind, object_id, text):
+    """
+    Embed `text` and store it for (`kind`, `object_id`).
+
+    Nothing is written when the text is unchanged since the last call. A
+    changed gig vector is logged as a gig change, so the semantic indexes
+    of every process patch it in. Returns the vector.
+    """
+    from .models import Embedding
+
+    digest = text_hash(text)
+    stored = Embedding.objects.filter(kind=kind, object_id=object_id).first()
+    if stored is not None and stored.text_hash == digest:
+        return stored.as_array()
+
+    vector = embed(text)
+    Embedding.objects.update_or_create(
+        kind=kind, object_id=object_id,
+        defaults={'vector': vector.tobytes(), 'text_hash': digest}
+    )
+    if kind == 'gig':
+        transaction.on_commit(lambda: record_gig_changes([object_id]))
+    return vector
+
+
+def musician_vector(musician):
+    """
+    The embedding of a musician profile, without writing anything.
+
+    The stored vector is used while it still matches the profile's text;
+    otherwise the text is embedded in memory and refresh_musician_embedding
+    is queued to store it.
+    """
+    from .models import Embedding
+    from .tasks import refresh_musician_embedding
+
+    text = musician_text(musician)
+    stored = Embedding.objects.filter(kind='musician', object_id=musician.pk).first()
+    if stored is not None and stored.text_hash == text_hash(text):
+        return stored.as_array()
+
+    musician_id = musician.pk
+    transaction.on_commit(lambda: refresh_musician_embedding.delay(musician_id), robust=True)
+    return embed(text)
+
+
+class SemanticGigIndex(GigChangeFollower):
+    """
+    Per-process approximate nearest neighbour index of open gig embeddings.
+
+    Random hyperplane LSH: every table hashes a vector to the signs of its
+    projections on ``bits`` random hyperplanes, so vectors at a small
+    angle tend to share a bucket. A query scores only the gigs sharing a
+    bucket with it in any table, falling back to an exact scan when the
+    buckets hold fewer than k gigs. Gigs logged as changed (saved, or
+    re-embedded by store_embedding) are patched in from their stored
+    embeddings; other vectors and their bucket codes are reused.
+    """
+
+    # (gig ids, vector matrix, bucket codes per table, buckets per table)
+    empty_snapshot = (
+        EMPTY_IDS, np.zeros((0, DIMENSIONS), dtype=np.float32), np.zeros((0, 0), dtype=np.int64), []
+    )
+
+    def __init__(self, tables=32, bits=7, seed=0):
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((tables * bits, DIMENSIONS)).astype(np.float32)
+        self.tables = tables
+        self.bits = bits
+        super().__init__()
+
+    def query(self, vector, k=10):
+        """
+        Return ``(gig_ids, similarities)`` of the `k` open gigs most similar
+        to `vector`, best first. Similarities are cosines in [-1, 1].
+        """
+        self.refresh()
+        ids, matrix, _, buckets = self._snapshot
+        if not len(ids):
+            return EMPTY_IDS, np.zeros(0, dtype=np.float32)
+
+        codes = self._codes(vector[np.newaxis, :])[:, 0]
+        rows = [table.get(code) for table, code in zip(buckets, codes.tolist())]
+        rows = [row for row in rows if row is not None]
+        candidates = np.unique(np.concatenate(rows)) if rows else EMPTY_IDS
+        if len(candidates) < k:
+            candidates = np.arange(len(ids))
+
+        similarities = matrix[candidates] @ vector
+        if len(candidates) > k:
+            top = np.argpartition(-similarities, k)[:k]
+        else:
+            top = np.arange(len(candidates))
+        top = top[np.argsort(-similarities[top], kind='stable')]
+        return ids[candidates[top]], similarities[top]
+
+    def _codes(self, matrix):
+        """The ``(tables, len(matrix))`` bucket codes of each vector"""
+        bits = (self.planes @ matrix.T > 0).reshape(self.tables, self.bits, len(matrix))
+        weights = (1 << np.arange(self.bits, dtype=np.int64))[np.newaxis, :, np.newaxis]
+        return (bits * weights).sum(axis=1)
+
+    def _build(self):
+        return self._snapshot_of(*self._load_vectors())
+
+    def _patch(self, snapshot, gig_ids):
+        ids, matrix, codes, _ = snapshot
+        keep = ~np.isin(ids, list(gig_ids))
+        new_ids, new_matrix = self._load_vectors(gig_ids)
+        return self._snapshot_of(
+            np.concatenate([ids[keep], new_ids]),
+            np.vstack([matrix[keep], new_matrix]),
+            np.hstack([codes[:, keep], self._codes(new_matrix)]) if len(ids) else None
+        )
+
+    def _load_vectors(self, gig_ids=None):
+        """The ids and vector matrix of the stored embeddings of open gigs (all, or of `gig_ids`)"""
+        from gigs.models import OpenGigFeed
+        from .models import Embedding
+
+        feed = OpenGigFeed.objects.all()
+        if gig_ids is not None:
+            feed = feed.filter(pk__in=list(gig_ids))
+        rows = Embedding.objects.filter(
+            kind='gig', object_id__in=feed.values('pk')
+        ).order_by('object_id').values_list('object_id', 'vector')
+        ids, vectors = [], []
+        for object_id, vector in rows.iterator(chunk_size=2000):
+            ids.append(object_id)
+            vectors.append(np.frombuffer(vector, dtype=np.float32))
+        matrix = np.vstack(vectors) if vectors else np.zeros((0, DIMENSIONS), dtype=np.float32)
+        return np.array(ids, dtype=np.int64), matrix
+
+    def _snapshot_of(self, ids, matrix, codes=None):
+        """A snapshot of `matrix`, reusing the bucket `codes` of its rows when known"""
+        if codes is None:
+            codes = self._codes(matrix)
+        buckets = []
+        for table_codes in codes:
+            order = np.argsort(table_codes, kind='stable')
+            values, starts = np.unique(table_codes[order], return_index=True)
+            buckets.append(dict(zip(values.tolist(), np.split(order, starts[1:]))))
+        return ids, matrix, codes, buckets
+
+
+semantic_gig_index = SemanticGigIndex()
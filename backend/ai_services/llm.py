@@ -0,0 +1,118 @@
+import hashlib
+import json
+from dataclasses import asdict, dataclass
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+
+SYSTEM_PROMPT = (
+    "You write concise, professional copy for musicians and live music venues. "
+    "Reply with the requested text only."
+)
+
+BATCH_INSTRUCTIONS = (
+    "Answer each numbered request below independently. Reply with a JSON object "
+    "mapping every request number (as a string) to its text."
+)
+
+# USD per 1K (prompt, completion) tokens
+MODEL_PRICING = {
+    'gpt-3.5-turbo': (Decimal('0.0005'), Decimal('0.0015')),
+    'gpt-4o-mini': (Decimal('0.00015'), Decimal('0.0006')),
+    'gpt-4o': (Decimal('0.0025'), Decimal('0.01')),
+    'gpt-4': (Decimal('0.03'), Decimal('0.06')),
+}
+
+
+@dataclass
+class Completion:
+    """Text generated for a prompt, with its token usage"""
+
+    text: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+    @property
+    def total_tokens(self):
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def cost(self):
+        """Price of the completion in USD (0 for models without known pricing)"""
+        prompt_price, completion_price = MODEL_PRICING.get(self.model, (Decimal(0), Decimal(0)))
+        cost = (self.prompt_tokens * prompt_price + self.completion_tokens * completion_price) / 1000
+        return cost.quantize(Decimal('0.0001'))
+
+
+def complete(prompt, model):
+    """Generate text for `prompt` with the configured provider (see ai_services.providers)"""
+    from .providers import get_provider
+
+    return get_provider().complete(prompt, model)
+
+
+def stream_complete(prompt, model):
+    """
+    Yield the text of `prompt`'s completion in pieces as the model writes it
+    (an async iterator). The last item yielded is the full Completion, with
+    token usage.
+    """
+    from .providers import get_provider
+
+    return get_provider().stream(prompt, model)
+
+
+def complete_batch(prompts, model):
+    """
+    Generate text for several prompts in one call to the provider.
+
+    Returns one Completion per prompt. Raises ValueError when the reply
+    does not hold an answer for every prompt.
+    """
+    from .providers import get_provider
+
+    return get_provider().complete_batch(prompts, model)
+
+
+def split_tokens(total, weights):
+    """Split `total` tokens in proportion to `weights`, keeping the sum exact"""
+    weights = [max(weight, 1) for weight in weights]
+    shares = [total * weight // sum(weights) for weight in weights]
+    shares[-1] += total - sum(shares)
+    return shares
+
+
+def response_cache_key(prompt, model):
+    """
+    Content-addressed cache key of a completion request.
+
+    Whitespace is normalized so trivially different prompts share an
+    entry; everything else that shapes the output is part of the hash.
+    """
+    request = [
+        ' '.join(prompt.split()), model, SYSTEM_PROMPT, settings.AI_MAX_COMPLETION_TOKENS,
+        settings.AI_PROVIDER
+    ]
+    digest = hashlib.sha256(json.dumps(request).encode()).hexdigest()
+    return f'ai:llm:{digest}'
+
+
+def response_cache_ttl(content_type):
+    """Seconds a completion for `content_type` stays cached (0 disables caching)"""
+    ttls = settings.AI_RESPONSE_CACHE_TTLS
+    return ttls.get(content_type, ttls.get('default', 0))
+
+
+def get_cached_completion(prompt, model):
+    """Return the cached Completion of a request, or None"""
+    data = cache.get(response_cache_key(prompt, model))
+    return Completion(**data) if data is not None else None
+
+
+def cache_completion(prompt, model, content_type, completion):
+    """Cache `completion` for the TTL of `content_type`"""
+    ttl = response_cache_ttl(content_type)
+    if ttl > 0:
+        cache.set(response_cache_key(prompt, model), asdict(completion), ttl)
@@ -0,0 +1,157 @@
+import numpy as np
+from django.db.models import Q
+
+# Default weights of the gig match score
+DEFAULT_WEIGHTS = {
+    'genre': 0.4,
+    'instrument': 0.3,
+    'experience_senior': 0.2,  # 5+ years
+    'experience_mid': 0.1,  # 2-4 years
+    'original_music': 0.1,
+}
+
+# Years of experience a musician needs for each Gig.experience_level
+EXPERIENCE_LEVEL_YEARS = {
+    'beginner': 0,
+    'intermediate': 2,
+    'professional': 5,
+}
+
+# Fields the scorer reads, for QuerySet.only()
+GIG_FIELDS = ('id', 'genres', 'instruments_needed', 'original_music_required', 'band_size_min')
+MUSICIAN_FIELDS = ('id', 'genres', 'instruments', 'experience_years', 'original_music')
+
+
+# (musician field, gig field) pairs a musician and a gig must agree on.
+# A musician listing no tags for a facet is open to every gig on it;
+# otherwise the gig must share one of their tags (an untagged gig shares
+# none). Both match directions apply this rule: find_matching_gigs
+# through the open gig index, precompute_gig_matches through
+# eligible_musicians_filter.
+MATCH_FACETS = (('genres', 'genres'), ('instruments', 'instruments_needed'))
+
+
+def experience_levels_for(years):
+    """The Gig.experience_level values open to a musician with `years` of experience"""
+    return [level for level, minimum in EXPERIENCE_LEVEL_YEARS.items() if years >= minimum]
+
+
+def eligible_musicians_filter(gig):
+    """Q of the MusicianProfiles eligible for `gig` (experience and MATCH_FACETS)"""
+    if gig.experience_level not in EXPERIENCE_LEVEL_YEARS:
+        return Q(pk__in=[])
+    condition = Q(experience_years__gte=EXPERIENCE_LEVEL_YEARS[gig.experience_level])
+    for musician_field, gig_field in MATCH_FACETS:
+        tags = list(getattr(gig, gig_field) or ())
+        condition &= Q(**{musician_field: []}) | Q(**{f'{musician_field}__overlap': tags})
+    return condition
+
+
+class TagEncoder:
+    """One-hot encodes tag lists over a shared, sorted vocabulary"""
+
+    def __init__(self, *tag_lists):
+        self.vocabulary = np.array(sorted({tag for tags in tag_lists for tag in tags or ()}))
+        self.index = {tag: column for column, tag in enumerate(self.vocabulary.tolist())}
+
+    def encode(self, tag_lists):
+        """Return a ``(len(tag_lists), len(vocabulary))`` boolean matrix"""
+        matrix = np.zeros((len(tag_lists), len(self.vocabulary)), dtype=bool)
+        for row, tags in enumerate(tag_lists):
+            columns = [self.index[tag] for tag in tags or () if tag in self.index]
+            matrix[row, columns] = True
+        return matrix
+
+    def decode(self, row):
+        """Return the tags set in a boolean row"""
+        return self.vocabulary[row].tolist()
+
+
+class MatchScorer:
+    """
+    Scores musicians against gigs in vectorized passes.
+
+    Genres and instruments are one-hot encoded so the shared tags of every
+    musician/gig pair come out of one boolean matrix product. Any side can
+    hold many rows: one musician against all candidate gigs, one gig
+    against all musicians, or a full matrix.
+    """
+
+    def __init__(self, weights=None):
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+
+    def score_gigs(self, musician, gigs):
+        """Scores of one musician profile against each of `gigs`"""
+        return self.score_matrix([musician], gigs)[0]
+
+    def score_musicians(self, gig, musicians):
+        """Scores of each of `musicians` against one gig"""
+        return self.score_matrix(musicians, [gig])[:, 0]
+
+    def score_matrix(self, musicians, gigs):
+        """Return the ``(len(musicians), len(gigs))`` match score matrix"""
+        weights = self.weights
+        score = (
+            weights['genre'] * self._overlap_ratio(
+                [musician.genres for musician in musicians],
+                [gig.genres for gig in gigs]
+            ) +
+            weights['instrument'] * self._overlap_ratio(
+                [musician.instruments for musician in musicians],
+                [gig.instruments_needed for gig in gigs]
+            )
+        )
+
+        experience = np.array([musician.experience_years for musician in musicians])
+        score += np.select(
+            [experience >= 5, experience >= 2],
+            [weights['experience_senior'], weights['experience_mid']],
+            default=0.0
+        )[:, np.newaxis]
+
+        musician_original = np.array(
+            [musician.original_music for musician in musicians], dtype=bool
+        )
+        gig_original = np.array([gig.original_music_required for gig in gigs], dtype=bool)
+        score += weights['original_music'] * (
+            musician_original[:, np.newaxis] == gig_original[np.newaxis, :]
+        )
+
+        return np.minimum(score, 1.0)
+
+    def reasons(self, musician, gigs):
+        """Human readable match reasoning for one musician against each of `gigs`"""
+        genres = TagEncoder(musician.genres, *(gig.genres for gig in gigs))
+        instruments = TagEncoder(musician.instruments, *(gig.instruments_needed for gig in gigs))
+        common_genres = genres.encode([musician.genres]) & genres.encode([gig.genres for gig in gigs])
+        common_instruments = (
+            instruments.encode([musician.instruments]) &
+            instruments.encode([gig.instruments_needed for gig in gigs])
+        )
+
+        reasoning = []
+        for row, gig in enumerate(gigs):
+            reasons = []
+            if common_genres[row].any():
+                reasons.append(f"Genre match: {', '.join(genres.decode(common_genres[row]))}")
+            if common_instruments[row].any():
+                reasons.append(
+                    f"Instrument match: {', '.join(instruments.decode(common_instruments[row]))}"
+                )
+            if musician.experience_years >= gig.band_size_min:
+                reasons.append(f"Experience level suitable ({musician.experience_years} years)")
+            reasoning.append("; ".join(reasons) if reasons else "Good general match")
+        return reasoning
+
+    def _overlap_ratio(self, musician_tags, gig_tags):
+        """Shared tags per pair divided by the gig's tag count (0 when either side is empty)"""
+        encoder = TagEncoder(*musician_tags, *gig_tags)
+        shared = (
+            encoder.encode(musician_tags).astype(float) @
+            encoder.encode(gig_tags).astype(float).T
+        )
+        gig_counts = np.array([len(tags or ()) for tags in gig_tags], dtype=float)
+        return np.divide(
+            shared, gig_counts[np.newaxis, :],
+            out=np.zeros_like(shared), where=gig_counts[np.newaxis, :] > 0
+        )
@@ -0,0 +1,138 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('gigs', '0006_feed_lat_lng_idx'),
+        ('users', '0005_musicianprofile_coordinates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AIRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recommendation_type', models.CharField(choices=[('gig_match', 'Gig Match'), ('musician_match', 'Musician Match'), ('venue_match', 'Venue Match'), ('setlist_suggestion', 'Setlist Suggestion'), ('pricing_suggestion', 'Pricing Suggestion')], max_length=50)),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField()),
+                ('confidence_score', models.FloatField(default=0.0)),
+                ('reasoning', models.TextField(blank=True)),
+                ('is_viewed', models.BooleanField(default=False)),
+                ('is_accepted', models.BooleanField(default=False)),
+                ('user_feedback', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'AI Recommendation',
+                'verbose_name_plural': 'AI Recommendations',
+                'ordering': ['-confidence_score', '-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AIService',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_type', models.CharField(choices=[('musician_bio', 'Musician Bio'), ('venue_description', 'Venue Description'), ('gig_description', 'Gig Description'), ('setlist', 'Setlist'), ('cover_letter', 'Cover Letter'), ('marketing_copy', 'Marketing Copy'), ('proposal', 'Gig Proposal')], max_length=50)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('input_data', models.JSONField(default=dict)),
+                ('prompt', models.TextField(blank=True)),
+                ('generated_content', models.TextField(blank=True)),
+                ('metadata', models.JSONField(default=dict)),
+                ('ai_model', models.CharField(default='gpt-3.5-turbo', max_length=100)),
+                ('tokens_used', models.PositiveIntegerField(default=0)),
+                ('cost', models.DecimalField(decimal_places=4, default=0, max_digits=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'AI Service',
+                'verbose_name_plural': 'AI Services',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AITask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_type', models.CharField(choices=[('generate_bio', 'Generate Bio'), ('generate_setlist', 'Generate Setlist'), ('generate_proposal', 'Generate Proposal'), ('match_gigs', 'Match Gigs'), ('scan_external_platforms', 'Scan External Platforms'), ('generate_recommendations', 'Generate Recommendations')], max_length=50)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], default='pending', max_length=20)),
+                ('celery_task_id', models.CharField(blank=True, max_length=255, null=True, unique=True)),
+                ('input_data', models.JSONField(default=dict)),
+                ('result_data', models.JSONField(default=dict)),
+                ('error_message', models.TextField(blank=True)),
+                ('progress_percentage', models.PositiveIntegerField(default=0)),
+                ('estimated_completion', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'AI Task',
+                'verbose_name_plural': 'AI Tasks',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='aitask',
+            name='ai_service',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tasks', to='ai_services.aiservice'),
+        ),
+        migrations.AddField(
+            model_name='aitask',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ai_tasks', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='aiservice',
+            name='gig',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ai_generated_content', to='gigs.gig'),
+        ),
+        migrations.AddField(
+            model_name='aiservice',
+            name='gig_application',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ai_generated_content', to='gigs.gigapplication'),
+        ),
+        migrations.AddField(
+            model_name='aiservice',
+            name='musician_profile',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ai_generated_content', to='users.musicianprofile'),
+        ),
+        migrations.AddField(
+            model_name='aiservice',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ai_services', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='aiservice',
+            name='venue_profile',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ai_generated_content', to='users.venueprofile'),
+        ),
+        migrations.AddField(
+            model_name='airecommendation',
+            name='recommended_gig',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ai_recommendations', to='gigs.gig'),
+        ),
+        migrations.AddField(
+            model_name='airecommendation',
+            name='recommended_musician',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ai_recommendations', to='users.musicianprofile'),
+        ),
+        migrations.AddField(
+            model_name='airecommendation',
+            name='recommended_venue',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ai_recommendations', to='users.venueprofile'),
+        ),
+        migrations.AddField(
+            model_name='airecommendation',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ai_recommendations', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
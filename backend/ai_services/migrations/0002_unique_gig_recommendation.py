@@ -0,0 +1,33 @@
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def delete_duplicate_recommendations(apps, schema_editor):
+    """Keep only the newest recommendation per (user, type, gig)"""
+    AIRecommendation = apps.get_model('ai_services', 'AIRecommendation')
+    newest = AIRecommendation.objects.filter(
+        user=OuterRef('user'),
+        recommendation_type=OuterRef('recommendation_type'),
+        recommended_gig=OuterRef('recommended_gig'),
+    ).order_by('-updated_at', '-pk').values('pk')[:1]
+    AIRecommendation.objects.filter(recommended_gig__isnull=False).exclude(
+        pk=Subquery(newest)
+    ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_services', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_recommendations, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='airecommendation',
+            constraint=models.UniqueConstraint(
+                fields=('user', 'recommendation_type', 'recommended_gig'),
+                name='unique_gig_recommendation'
+            ),
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_services', '0002_unique_gig_recommendation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Embedding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('gig', 'Gig'), ('musician', 'Musician')], max_length=20)),
+                ('object_id', models.PositiveIntegerField()),
+                ('vector', models.BinaryField()),
+                ('text_hash', models.CharField(max_length=40)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Embedding',
+                'verbose_name_plural': 'Embeddings',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='embedding',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_embedding'),
+        ),
+    ]
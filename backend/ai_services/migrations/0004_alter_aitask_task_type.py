@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_services', '0003_embedding'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='aitask',
+            name='task_type',
+            field=models.CharField(choices=[('generate_bio', 'Generate Bio'), ('generate_setlist', 'Generate Setlist'), ('generate_proposal', 'Generate Proposal'), ('match_gigs', 'Match Gigs'), ('scan_external_platforms', 'Scan External Platforms'), ('generate_recommendations', 'Generate Recommendations'), ('generate_content', 'Generate Content')], max_length=50),
+        ),
+    ]
@@ -0,0 +1,17 @@
+import ai_services.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_services', '0004_alter_aitask_task_type'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='aiservice',
+            name='ai_model',
+            field=models.CharField(default=ai_services.models.default_ai_model, max_length=100),
+        ),
+    ]
@@ -1,10 +1,17 @@
+import numpy as np
+from django.conf import settings
 from django.db import models
+from django.db.models import Prefetch
 from django.contrib.auth import get_user_model
 from users.models import MusicianProfile, VenueProfile
 from gigs.models import Gig, GigApplication
 
 User = get_user_model()
 
+def default_ai_model():
+    """Model used for AI services that do not pick one"""
+    return settings.AI_DEFAULT_MODEL
+
 class AIService(models.Model):
     """Model to store AI-generated content and services"""
     
@@ -69,7 +76,7 @@ class AIService(models.Model):
     )
     
     # AI service details
-    ai_model = models.CharField(max_length=100, default='gpt-3.5-turbo')
+    ai_model = models.CharField(max_length=100, default=default_ai_model)
     tokens_used = models.PositiveIntegerField(default=0)
     cost = models.DecimalField(max_digits=10, decimal_places=4, default=0)
     
@@ -86,6 +93,31 @@ class AIService(models.Model):
     def __str__(self):
         return f"{self.get_content_type_display()} for {self.user.email} - {self.status}"
 
+class AIRecommendationQuerySet(models.QuerySet):
+    """QuerySet with helpers for the recommendation read and write paths"""
+    
+    def for_serializer(self):
+        """Load everything AIRecommendationSerializer renders in a fixed number of queries"""
+        return self.select_related(
+            'recommended_musician__user', 'recommended_venue__user'
+        ).prefetch_related(
+            Prefetch('recommended_gig', queryset=Gig.objects.for_serializer())
+        )
+    
+    def upsert(self, recommendations):
+        """Bulk insert gig recommendations, refreshing existing ones in place.
+        
+        Rows are keyed on (user, recommendation_type, recommended_gig), so
+        re-matching updates scores and text instead of adding duplicates.
+        User interaction fields (is_viewed, is_accepted, ...) are kept.
+        """
+        return self.bulk_create(
+            recommendations,
+            update_conflicts=True,
+            unique_fields=['user', 'recommendation_type', 'recommended_gig'],
+            update_fields=['title', 'description', 'confidence_score', 'reasoning', 'updated_at']
+        )
+
 class AIRecommendation(models.Model):
     """Model to store AI-powered recommendations"""
     
@@ -139,10 +171,19 @@ class AIRecommendation(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = AIRecommendationQuerySet.as_manager()
+    
     class Meta:
         verbose_name = 'AI Recommendation'
         verbose_name_plural = 'AI Recommendations'
         ordering = ['-confidence_score', '-created_at']
+        constraints = [
+            # Target of AIRecommendationQuerySet.upsert()
+            models.UniqueConstraint(
+                fields=['user', 'recommendation_type', 'recommended_gig'],
+                name='unique_gig_recommendation'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.get_recommendation_type_display()} - {self.title}"
@@ -157,6 +198,7 @@ class AITask(models.Model):
         ('match_gigs', 'Match Gigs'),
         ('scan_external_platforms', 'Scan External Platforms'),
         ('generate_recommendations', 'Generate Recommendations'),
+        ('generate_content', 'Generate Content'),
     ]
     
     STATUS_CHOICES = [
@@ -205,3 +247,32 @@ class AITask(models.Model):
     
     def __str__(self):
         return f"{self.get_task_type_display()} - {self.status}"
+
+class Embedding(models.Model):
+    """Stored text embedding of a gig or musician profile (see ai_services.embeddings)"""
+    
+    KIND_CHOICES = [
+        ('gig', 'Gig'),
+        ('musician', 'Musician'),
+    ]
+    
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    vector = models.BinaryField()  # float32 bytes
+    text_hash = models.CharField(max_length=40)  # SHA-1 of the embedded text
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Embedding'
+        verbose_name_plural = 'Embeddings'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_embedding'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.object_id} embedding"
+    
+    def as_array(self):
+        """The vector as a float32 NumPy array"""
+        return np.frombuffer(self.vector, dtype=np.float32)
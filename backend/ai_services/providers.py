@@ -0,0 +1,202 @@
+import asyncio
+import hashlib
+import json
+import random
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .llm import BATCH_INSTRUCTIONS, SYSTEM_PROMPT, Completion, split_tokens
+
+
+class ProviderError(Exception):
+    """A provider failed to generate a completion"""
+
+
+class LLMProvider(ABC):
+    """
+    Interface of a language model backend.
+
+    ``complete`` and ``complete_batch`` are called from Celery workers,
+    ``stream`` from async views. The backend in use is the dotted path in
+    ``settings.AI_PROVIDER``.
+    """
+
+    @abstractmethod
+    def complete(self, prompt, model):
+        """Return the Completion of `prompt`"""
+
+    @abstractmethod
+    def complete_batch(self, prompts, model):
+        """Return one Completion per prompt, generated in a single call"""
+
+    @abstractmethod
+    def stream(self, prompt, model):
+        """Async iterator of the pieces of text as they are generated, then the full Completion"""
+
+
+class OpenAIProvider(LLMProvider):
+    """OpenAI chat completions"""
+
+    def _messages(self, prompt):
+        return [
+            {'role': 'system', 'content': SYSTEM_PROMPT},
+            {'role': 'user', 'content': prompt},
+        ]
+
+    def complete(self, prompt, model):
+        from openai import OpenAI
+
+        client = OpenAI(api_key=settings.OPENAI_API_KEY, timeout=settings.AI_REQUEST_TIMEOUT)
+        response = client.chat.completions.create(
+            model=model,
+            messages=self._messages(prompt),
+            max_tokens=settings.AI_MAX_COMPLETION_TOKENS,
+        )
+        usage = response.usage
+        return Completion(
+            text=(response.choices[0].message.content or '').strip(),
+            model=model,
+            prompt_tokens=usage.prompt_tokens if usage else 0,
+            completion_tokens=usage.completion_tokens if usage else 0,
+        )
+
+    def complete_batch(self, prompts, model):
+        """
+        Ask for a JSON object of numbered answers in one chat completion.
+
+        Token usage is split between the prompts in proportion to their
+        length (prompt tokens) and their answer's length (completion tokens).
+        """
+        from openai import OpenAI
+
+        numbered = '\n\n'.join(f'{number}. {prompt}' for number, prompt in enumerate(prompts, 1))
+        client = OpenAI(api_key=settings.OPENAI_API_KEY, timeout=settings.AI_REQUEST_TIMEOUT)
+        response = client.chat.completions.create(
+            model=model,
+            messages=self._messages(f'{BATCH_INSTRUCTIONS}\n\n{numbered}'),
+            max_tokens=settings.AI_MAX_COMPLETION_TOKENS * len(prompts),
+            response_format={'type': 'json_object'},
+        )
+        try:
+            answers = json.loads(response.choices[0].message.content or '')
+            texts = [str(answers[str(number)]).strip() for number in range(1, len(prompts) + 1)]
+        except (TypeError, KeyError, json.JSONDecodeError) as exc:
+            raise ValueError(f'Malformed batch reply: {exc}') from exc
+
+        usage = response.usage
+        prompt_tokens = split_tokens(usage.prompt_tokens if usage else 0, map(len, prompts))
+        completion_tokens = split_tokens(usage.completion_tokens if usage else 0, map(len, texts))
+        return [
+            Completion(text=text, model=model, prompt_tokens=prompt_share, completion_tokens=completion_share)
+            for text, prompt_share, completion_share in zip(texts, prompt_tokens, completion_tokens)
+        ]
+
+    async def stream(self, prompt, model):
+        from openai import AsyncOpenAI
+
+        client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, timeout=settings.AI_REQUEST_TIMEOUT)
+        stream = await client.chat.completions.create(
+            model=model,
+            messages=self._messages(prompt),
+            max_tokens=settings.AI_MAX_COMPLETION_TOKENS,
+            stream=True,
+            stream_options={'include_usage': True},
+        )
+        parts, usage = [], None
+        async for chunk in stream:
+            if chunk.usage:
+                usage = chunk.usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+                yield parts[-1]
+        yield Completion(
+            text=''.join(parts).strip(),
+            model=model,
+            prompt_tokens=usage.prompt_tokens if usage else 0,
+            completion_tokens=usage.completion_tokens if usage else 0,
+        )
+
+
+FAKE_WORDS = (
+    'live', 'music', 'crowd', 'stage', 'groove', 'night', 'band', 'sound', 'venue',
+    'set', 'energy', 'audience', 'rhythm', 'melody', 'show', 'tour', 'encore',
+)
+
+
+class FakeProvider(LLMProvider):
+    """
+    Offline stand-in for load tests and local development.
+
+    Simulates a model with ``settings.AI_FAKE_PROVIDER``: time to first
+    token (``latency_ms`` +/- ``jitter_ms``), generation speed
+    (``tokens_per_second``, 0 for instant answers), answer length
+    (``completion_tokens``) and a ``failure_rate`` of calls raising
+    ProviderError. Answers are made up
+    but deterministic per prompt, so caching and coalescing behave as
+    they do with a real model. Settings are read on every call.
+    """
+
+    def __init__(self):
+        self._random = random.Random()
+
+    @property
+    def options(self):
+        return settings.AI_FAKE_PROVIDER
+
+    def complete(self, prompt, model):
+        completion = self._completion(prompt, model)
+        time.sleep(self._duration(completion.completion_tokens))
+        return completion
+
+    def complete_batch(self, prompts, model):
+        completions = [self._completion(prompt, model) for prompt in prompts]
+        time.sleep(self._duration(sum(completion.completion_tokens for completion in completions)))
+        return completions
+
+    async def stream(self, prompt, model):
+        completion = self._completion(prompt, model)
+        await asyncio.sleep(self._first_token_delay())
+        words = completion.text.split(' ')
+        for index, word in enumerate(words):
+            yield word if index == 0 else f' {word}'
+            await asyncio.sleep(self._generation_time(1))
+        yield completion
+
+    def _completion(self, prompt, model):
+        """The made-up answer to `prompt`; raises ProviderError at the failure rate"""
+        if self._random.random() < self.options['failure_rate']:
+            raise ProviderError('Simulated provider failure.')
+
+        seed = int.from_bytes(hashlib.sha1(f'{model}:{prompt}'.encode()).digest()[:8], 'big')
+        words = random.Random(seed).choices(FAKE_WORDS, k=self.options['completion_tokens'])
+        return Completion(
+            text=' '.join(words).capitalize() + '.',
+            model=model,
+            prompt_tokens=len(prompt) // 4 + len(SYSTEM_PROMPT) // 4 + 1,
+            completion_tokens=len(words),
+        )
+
+    def _first_token_delay(self):
+        jitter = self._random.uniform(-1, 1) * self.options['jitter_ms']
+        return max(0.0, self.options['latency_ms'] + jitter) / 1000
+
+    def _generation_time(self, completion_tokens):
+        tokens_per_second = self.options['tokens_per_second']
+        return completion_tokens / tokens_per_second if tokens_per_second > 0 else 0.0
+
+    def _duration(self, completion_tokens):
+        return self._first_token_delay() + self._generation_time(completion_tokens)
+
+
+def get_provider():
+    """The provider configured in ``settings.AI_PROVIDER``"""
+    return _load_provider(settings.AI_PROVIDER)
+
+
+@lru_cache(maxsize=None)
+def _load_provider(path):
+    return import_string(path)()
@@ -0,0 +1,201 @@
+import math
+import threading
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Consumes ARGV[1] tokens from every bucket in KEYS, or from none of them.
+# ARGV[2..] holds (capacity, refill per second) for each key. Buckets refill
+# continuously since their last update, using the Redis clock so all web
+# and worker nodes agree. A negative amount refunds (capped at capacity).
+# Returns {index of the first short bucket or 0, seconds until it has
+# enough, level of each bucket}.
+TOKEN_BUCKET_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local requested = tonumber(ARGV[1])
+local levels, short, wait = {}, 0, 0
+for i, key in ipairs(KEYS) do
+    local capacity, rate = tonumber(ARGV[2 * i]), tonumber(ARGV[2 * i + 1])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local elapsed = math.max(0, now - (tonumber(state[2]) or now))
+    tokens = math.min(capacity, tokens + elapsed * rate)
+    levels[i] = tokens
+    if short == 0 and tokens < requested then
+        short, wait = i, (requested - tokens) / rate
+    end
+end
+local result = {short, tostring(wait)}
+for i, key in ipairs(KEYS) do
+    local capacity, rate = tonumber(ARGV[2 * i]), tonumber(ARGV[2 * i + 1])
+    local tokens = levels[i]
+    if short == 0 then
+        tokens = math.min(capacity, tokens - requested)
+    end
+    redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('EXPIRE', key, math.ceil(capacity / rate) + 60)
+    result[#result + 1] = tostring(tokens)
+end
+return result
+"""
+
+_local_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class Bucket:
+    """A token bucket: holds up to `capacity` LLM tokens, refilled at `rate` per second"""
+
+    key: str
+    capacity: int
+    rate: float
+
+
+def user_bucket(user_id):
+    return Bucket(
+        f'ai:budget:user:{user_id}',
+        settings.AI_USER_TOKEN_BURST,
+        settings.AI_USER_TOKENS_PER_MINUTE / 60
+    )
+
+
+def model_bucket(model):
+    return Bucket(
+        f'ai:budget:model:{model}',
+        settings.AI_MODEL_TOKEN_BURST,
+        settings.AI_MODEL_TOKENS_PER_MINUTE / 60
+    )
+
+
+def consume(buckets, amount):
+    """
+    Take `amount` tokens from all of `buckets` atomically, or from none.
+
+    Returns ``(short_bucket, wait_seconds, levels)``: the first bucket
+    without enough tokens (None when consumed), how long until it has
+    them, and every bucket's level afterwards.
+    """
+    try:
+        from django_redis import get_redis_connection
+        connection = get_redis_connection('default')
+    except (ImportError, NotImplementedError):
+        return _consume_locally(buckets, amount)
+
+    args = [amount]
+    for bucket in buckets:
+        args.extend([bucket.capacity, bucket.rate])
+    short, wait, *levels = connection.eval(
+        TOKEN_BUCKET_SCRIPT, len(buckets), *[bucket.key for bucket in buckets], *args
+    )
+    short = int(short)
+    return (
+        buckets[short - 1] if short else None,
+        float(wait),
+        [float(level) for level in levels]
+    )
+
+
+def _consume_locally(buckets, amount):
+    """Same as the Lua script, for caches without Redis (atomic per process only)"""
+    with _local_lock:
+        now = time.time()
+        states = cache.get_many([bucket.key for bucket in buckets])
+        levels, short, wait = [], None, 0.0
+        for bucket in buckets:
+            tokens, updated = states.get(bucket.key, (bucket.capacity, now))
+            tokens = min(bucket.capacity, tokens + max(0.0, now - updated) * bucket.rate)
+            levels.append(tokens)
+            if short is None and tokens < amount:
+                short, wait = bucket, (amount - tokens) / bucket.rate
+        if short is None:
+            levels = [min(bucket.capacity, level - amount) for bucket, level in zip(buckets, levels)]
+        for bucket, level in zip(buckets, levels):
+            cache.set(bucket.key, (level, now), math.ceil(bucket.capacity / bucket.rate) + 60)
+        return short, wait, levels
+
+
+def estimate_tokens(prompt):
+    """Upper bound of the tokens a completion of `prompt` uses (~4 characters per token)"""
+    return len(prompt) // 4 + 1 + settings.AI_MAX_COMPLETION_TOKENS
+
+
+@dataclass
+class TokenBudget:
+    """
+    LLM tokens reserved for one generation request.
+
+    The user's bucket is charged when the request arrives. If the model's
+    shared bucket is short, the request is accepted but has to wait
+    `model_wait` seconds; the worker charges the model bucket when it runs.
+    Unused tokens are refunded once the real usage is known.
+    """
+
+    user_id: int
+    model: str
+    tokens: int
+    allowed: bool = False
+    model_reserved: bool = False
+    retry_after: float = 0.0
+    model_wait: float = 0.0
+    user_remaining: float = 0.0
+
+    @classmethod
+    def reserve(cls, user_id, model, prompt):
+        """Charge the user's (and, if possible, the model's) bucket for a request"""
+        user, shared = user_bucket(user_id), model_bucket(model)
+        tokens = min(estimate_tokens(prompt), user.capacity, shared.capacity)
+        budget = cls(user_id=user_id, model=model, tokens=tokens)
+
+        short, wait, levels = consume([user, shared], tokens)
+        if short is None:
+            budget.allowed = budget.model_reserved = True
+        elif short == user:
+            budget.retry_after = wait
+        else:
+            # Only the shared quota is short: take the user's share and queue
+            model_wait = wait
+            short, wait, levels = consume([user], tokens)
+            budget.allowed = short is None
+            budget.retry_after = wait
+            budget.model_wait = model_wait if budget.allowed else 0.0
+        budget.user_remaining = levels[0]
+        return budget
+
+    def reserve_model(self):
+        """Charge the model's bucket if still due; return seconds to wait first (0 when charged)"""
+        if self.model_reserved:
+            return 0.0
+        short, wait, _ = consume([model_bucket(self.model)], self.tokens)
+        self.model_reserved = short is None
+        return wait
+
+    def task_kwargs(self):
+        """The reservation as JSON-serializable Celery task kwargs"""
+        return {'budget': {
+            'user_id': self.user_id, 'model': self.model,
+            'tokens': self.tokens, 'model_reserved': self.model_reserved,
+        }}
+
+    def release(self, used=0):
+        """Refund the tokens reserved beyond `used`"""
+        unused = self.tokens - used
+        if unused <= 0:
+            return
+        buckets = [user_bucket(self.user_id)]
+        if self.model_reserved:
+            buckets.append(model_bucket(self.model))
+        consume(buckets, -unused)
+
+    def headers(self):
+        """Remaining-budget response headers"""
+        headers = {
+            'X-AI-Token-Limit': str(settings.AI_USER_TOKEN_BURST),
+            'X-AI-Token-Remaining': str(max(0, int(self.user_remaining))),
+        }
+        if not self.allowed:
+            headers['Retry-After'] = str(math.ceil(self.retry_after))
+        return headers
+
@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from .models import AIService, AIRecommendation, AITask
 from users.serializers import MusicianProfileSerializer, VenueProfileSerializer
-from gigs.serializers import GigSerializer, GigApplicationSerializer
+from gigs.serializers import GigSerializer, GigApplicationSerializer, GigListSerializer
+from gig_router.serializers import DynamicFieldsMixin
 
 class AIServiceSerializer(serializers.ModelSerializer):
     """Serializer for AI Service model"""
@@ -65,6 +66,27 @@ class AIRecommendationSerializer(serializers.ModelSerializer):
             'is_accepted', 'user_feedback', 'created_at', 'updated_at'
         ]
 
+class AIRecommendationListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Compact serializer for recommendation lists (supports ?fields= and ?expand=recommended_gig)"""
+    
+    class Meta:
+        model = AIRecommendation
+        fields = [
+            'id', 'recommendation_type', 'title', 'confidence_score',
+            'recommended_gig_id', 'recommended_musician_id', 'recommended_venue_id',
+            'is_viewed', 'is_accepted', 'created_at'
+        ]
+        read_only_fields = fields
+        field_sources = {
+            'recommended_gig_id': ['recommended_gig'],
+            'recommended_musician_id': ['recommended_musician'],
+            'recommended_venue_id': ['recommended_venue'],
+        }
+        expandable_fields = {
+            # The gig itself is prefetched by AIRecommendationViewSet.get_queryset()
+            'recommended_gig': (GigListSerializer, ['recommended_gig']),
+        }
+
 class AIRecommendationUpdateSerializer(serializers.ModelSerializer):
     """Serializer for updating AI Recommendation (feedback)"""
     
@@ -0,0 +1,162 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from gigs.models import Gig
+from users.models import MusicianProfile, User
+from .cache import bump_open_gig_generation, invalidate_matches
+from .models import AIRecommendation
+from .tasks import (
+    backfill_musician_matches, precompute_gig_matches, refresh_gig_embedding,
+    refresh_musician_embedding
+)
+
+# Gig fields that affect its matches
+MATCH_FIELDS = {
+    'genres', 'instruments_needed', 'original_music_required', 'band_size_min',
+    'status', 'venue', 'title',
+}
+
+# Musician profile fields that affect their matches
+MUSICIAN_MATCH_FIELDS = {
+    'genres', 'instruments', 'experience_years', 'original_music', 'latitude',
+    'longitude', 'travel_distance',
+}
+
+# Fields embedded by ai_services.embeddings
+GIG_TEXT_FIELDS = {'title', 'description', 'special_requirements', 'genres'}
+MUSICIAN_TEXT_FIELDS = {'setlist_examples', 'genres'}
+
+# User fields gig matching reads
+MATCH_USER_FIELDS = {'city'}
+
+
+@receiver(post_save, sender=Gig)
+def enqueue_gig_matches(sender, instance, update_fields=None, **kwargs):
+    """Precompute matches for open gigs in the background once saved"""
+    if instance.status != 'open':
+        return
+    if update_fields is not None and not MATCH_FIELDS & set(update_fields):
+        return
+    gig_id = instance.pk
+    # robust: a broker outage must not fail the request that saved the gig
+    transaction.on_commit(lambda: precompute_gig_matches.delay(gig_id), robust=True)
+
+
+@receiver(post_save, sender=MusicianProfile)
+def enqueue_musician_matches(sender, instance, created, update_fields=None, **kwargs):
+    """Match a new or changed musician profile against every open gig in the background"""
+    if not created and update_fields is not None and not MUSICIAN_MATCH_FIELDS & set(update_fields):
+        return
+    musician_id = instance.pk
+    transaction.on_commit(lambda: backfill_musician_matches.delay(musician_id), robust=True)
+
+
+@receiver(post_save, sender=User)
+def enqueue_user_matches(sender, instance, created, update_fields=None, **kwargs):
+    """Re-match a musician whose city changed"""
+    if created or not instance.is_musician:
+        return
+    if update_fields is not None and not MATCH_USER_FIELDS & set(update_fields):
+        return
+    musician_id = MusicianProfile.objects.filter(user=instance).values_list('pk', flat=True).first()
+    if musician_id is not None:
+        transaction.on_commit(lambda: backfill_musician_matches.delay(musician_id), robust=True)
+
+
+@receiver(post_save, sender=Gig)
+@receiver(post_delete, sender=Gig)
+def enqueue_gig_embedding(sender, instance, update_fields=None, **kwargs):
+    """Re-embed a gig once its text change is committed"""
+    if update_fields is not None and not GIG_TEXT_FIELDS & set(update_fields):
+        return
+    gig_id = instance.pk
+    transaction.on_commit(lambda: refresh_gig_embedding.delay(gig_id), robust=True)
+
+
+@receiver(post_save, sender=MusicianProfile)
+@receiver(post_delete, sender=MusicianProfile)
+def enqueue_musician_embedding(sender, instance, update_fields=None, **kwargs):
+    """Re-embed a musician profile once its text change is committed"""
+    if update_fields is not None and not MUSICIAN_TEXT_FIELDS & set(update_fields):
+        return
+    musician_id = instance.pk
+    transaction.on_commit(lambda: refresh_musician_embedding.delay(musician_id), robust=True)
+
+
+@receiver(post_save, sender=User)
+def enqueue_musician_bio_embedding(sender, instance, created, update_fields=None, **kwargs):
+    """Re-embed a musician profile when the user's bio changes"""
+    if created or not instance.is_musician:
+        return
+    if update_fields is not None and 'bio' not in update_fields:
+        return
+    musician_id = MusicianProfile.objects.filter(user=instance).values_list('pk', flat=True).first()
+    if musician_id is not None:
+        transaction.on_commit(lambda: refresh_musician_embedding.delay(musician_id), robust=True)
+
+
+@receiver(pre_save, sender=Gig)
+def remember_gig_status(sender, instance, **kwargs):
+    """Keep the stored status, so post_save can tell an open status transition"""
+    instance._previous_status = (
+        Gig.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Gig)
+def invalidate_matches_on_status_change(sender, instance, **kwargs):
+    """Retire every musician's cached matches when a gig opens or closes"""
+    previous_status = getattr(instance, '_previous_status', None)
+    if (previous_status == 'open') != (instance.status == 'open'):
+        transaction.on_commit(bump_open_gig_generation)
+
+
+@receiver(post_delete, sender=Gig)
+def invalidate_matches_on_delete(sender, instance, **kwargs):
+    """Retire every musician's cached matches when an open gig is deleted"""
+    if instance.status == 'open':
+        transaction.on_commit(bump_open_gig_generation)
+
+
+@receiver(post_save, sender=MusicianProfile)
+def invalidate_profile_matches(sender, instance, created, update_fields=None, **kwargs):
+    """Drop the musician's cached and stored matches when their profile changes"""
+    if not created and (update_fields is None or MUSICIAN_MATCH_FIELDS & set(update_fields)):
+        discard_stored_matches(instance.pk)
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_matches([user_id]))
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_matches(sender, instance, created, update_fields=None, **kwargs):
+    """Drop the musician's cached and stored matches when their city changes"""
+    if created or not instance.is_musician:
+        return
+    if update_fields is not None and not MATCH_USER_FIELDS & set(update_fields):
+        return
+    musician_id = MusicianProfile.objects.filter(user=instance).values_list('pk', flat=True).first()
+    if musician_id is not None:
+        discard_stored_matches(musician_id)
+    user_id = instance.pk
+    transaction.on_commit(lambda: invalidate_matches([user_id]))
+
+
+def discard_stored_matches(musician_id):
+    """
+    Delete a musician's stored gig matches (bar accepted ones) and mark
+    them as not computed, so none are served until
+    backfill_musician_matches has matched the changed profile.
+    """
+    musician = MusicianProfile.objects.filter(pk=musician_id)
+    musician.update(matches_computed_at=None)
+    AIRecommendation.objects.filter(
+        user__in=musician.values('user'), recommendation_type='gig_match', is_accepted=False
+    ).delete()
+
+
+@receiver(post_save, sender=AIRecommendation)
+def invalidate_recommendation_matches(sender, instance, **kwargs):
+    """Cached matches render is_viewed/is_accepted; drop them when those change"""
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_matches([user_id]))
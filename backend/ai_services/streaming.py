@@ -0,0 +1,77 @@
+import asyncio
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+
+from .llm import Completion, cache_completion, stream_complete
+from .tasks import store_completion, store_failure
+
+logger = logging.getLogger(__name__)
+
+# Generations outliving their response (client went away) must not be
+# garbage collected before they are stored
+_running_generations = set()
+
+
+def sse_event(event, data):
+    """Format one Server-Sent Event with a JSON payload"""
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+def _done_data(ai_service):
+    return {
+        'id': ai_service.pk,
+        'status': ai_service.status,
+        'tokens_used': ai_service.tokens_used,
+        'cost': str(ai_service.cost),
+    }
+
+
+async def stored_content_events(ai_service):
+    """Events replaying content that is already generated"""
+    yield sse_event('token', {'text': ai_service.generated_content})
+    yield sse_event('done', _done_data(ai_service))
+
+
+async def generation_events(ai_task, ai_service, budget):
+    """
+    Events relaying the content of `ai_service` as the model writes it.
+
+    A ``token`` event carries each piece of text, then ``done`` (or
+    ``error``) ends the stream. Generation runs in its own asyncio task,
+    so the text is stored (and unused `budget` tokens refunded) even if
+    the client disconnects midway.
+    """
+    queue = asyncio.Queue()
+    generation = asyncio.create_task(_generate(ai_task, ai_service, budget, queue))
+    _running_generations.add(generation)
+    generation.add_done_callback(_running_generations.discard)
+
+    # Flush the headers straight away; the first token may take a moment
+    yield ': generating\n\n'
+    while (event := await queue.get()) is not None:
+        yield event
+
+
+async def _generate(ai_task, ai_service, budget, queue):
+    try:
+        async for piece in stream_complete(ai_service.prompt, ai_service.ai_model):
+            if isinstance(piece, Completion):
+                completion = piece
+            else:
+                await queue.put(sse_event('token', {'text': piece}))
+    except Exception as exc:
+        logger.exception('Streamed AI content generation failed for task %s', ai_task.pk)
+        await sync_to_async(budget.release)()
+        await sync_to_async(store_failure)(ai_task, ai_service, exc)
+        await queue.put(sse_event('error', {'error': 'AI content generation failed.'}))
+    else:
+        await sync_to_async(budget.release)(used=completion.total_tokens)
+        await sync_to_async(cache_completion)(
+            ai_service.prompt, ai_service.ai_model, ai_service.content_type, completion
+        )
+        await sync_to_async(store_completion)(ai_task, ai_service, completion, cache_hit=False)
+        await queue.put(sse_event('done', _done_data(ai_service)))
+    finally:
+        await queue.put(None)
@@ -0,0 +1,425 @@
+import logging
+import math
+import uuid
+from decimal import Decimal
+
+import numpy as np
+from celery import shared_task
+from django.db import transaction
+from django.utils import timezone
+
+from gigs.geo import distances_within, haversine_miles
+from gigs.index import open_gig_index
+from gigs.models import Gig, OpenGigFeed
+from users.models import MusicianProfile, normalize_location
+from .cache import invalidate_matches
+from .dispatch import llm_dispatcher
+from .embeddings import gig_text, musician_text, store_embedding
+from .llm import cache_completion, get_cached_completion
+from .matching import (
+    GIG_FIELDS, MUSICIAN_FIELDS, MatchScorer, eligible_musicians_filter, experience_levels_for
+)
+from .models import AIRecommendation, AIService, AITask, Embedding
+from .ratelimit import TokenBudget
+
+logger = logging.getLogger(__name__)
+
+# Musicians scored per database round trip
+MATCH_CHUNK_SIZE = 1000
+# Best matching musicians stored per gig
+MATCH_TOP_MUSICIANS = 100
+# Best matching gigs stored per musician
+MATCH_TOP_GIGS = 50
+
+# AITask type recorded for each AIService content type
+CONTENT_TASK_TYPES = {
+    'musician_bio': 'generate_bio',
+    'setlist': 'generate_setlist',
+    'proposal': 'generate_proposal',
+}
+
+
+@shared_task
+def precompute_gig_matches(gig_id):
+    """
+    Score an open gig against every eligible musician and store the best.
+
+    Musicians are streamed in chunks and scored one chunk per vectorized
+    pass. The top ``MATCH_TOP_MUSICIANS`` are upserted as ``gig_match``
+    recommendations; other unaccepted matches of the gig are removed.
+    Returns the number of stored matches.
+    """
+    gig = Gig.objects.select_related('venue').filter(pk=gig_id, status='open').first()
+    if gig is None:
+        return 0
+
+    scorer = MatchScorer()
+    best_scores = np.empty(0)
+    best_musicians = []
+    for chunk in _chunks(_eligible_musicians(gig).iterator(chunk_size=MATCH_CHUNK_SIZE)):
+        scores = np.where(
+            _within_reach(gig, chunk), scorer.score_musicians(gig, chunk), -np.inf
+        )
+        best_scores = np.concatenate([best_scores, scores])
+        best_musicians.extend(chunk)
+
+        # Keep only the running top N between chunks
+        keep = np.argsort(-best_scores, kind='stable')[:MATCH_TOP_MUSICIANS]
+        best_scores = best_scores[keep]
+        best_musicians = [best_musicians[index] for index in keep]
+
+    matches = [
+        (musician, score) for musician, score in zip(best_musicians, best_scores)
+        if score > 0
+    ]
+    AIRecommendation.objects.upsert([
+        AIRecommendation(
+            user_id=musician.user_id,
+            recommendation_type='gig_match',
+            title=f"Perfect Match: {gig.title}",
+            description=f"This gig at {gig.venue.venue_name} matches your profile perfectly!",
+            confidence_score=float(score),
+            reasoning=scorer.reasons(musician, [gig])[0],
+            recommended_gig=gig
+        )
+        for musician, score in matches
+    ])
+    # Accepted matches are kept even when they drop out of the top
+    matched_users = [musician.user_id for musician, _ in matches]
+    dropped = AIRecommendation.objects.filter(
+        recommendation_type='gig_match', recommended_gig=gig, is_accepted=False
+    ).exclude(user_id__in=matched_users)
+    dropped_users = list(dropped.values_list('user_id', flat=True))
+    dropped.delete()
+    invalidate_matches(matched_users + dropped_users)
+    return len(matches)
+
+
+@shared_task
+def backfill_musician_matches(musician_id):
+    """
+    Score every open gig for a musician and store the best.
+
+    The top ``MATCH_TOP_GIGS`` are upserted as ``gig_match``
+    recommendations and the musician's other unaccepted matches are
+    removed. ``matches_computed_at`` then marks the stored matches as
+    complete, unless the profile changed meanwhile (a newer backfill is
+    due). Later gig changes are merged in by precompute_gig_matches.
+    Returns the number of stored matches.
+    """
+    musician = MusicianProfile.objects.select_related('user').filter(pk=musician_id).first()
+    if musician is None:
+        return 0
+    started_at = timezone.now()
+
+    scorer = MatchScorer()
+    gigs, scores = find_matching_gigs(musician, scorer, limit=MATCH_TOP_GIGS)
+    matches = [(gig, score) for gig, score in zip(gigs, scores) if score > 0]
+    reasoning = scorer.reasons(musician, [gig for gig, _ in matches])
+    AIRecommendation.objects.upsert([
+        AIRecommendation(
+            user_id=musician.user_id,
+            recommendation_type='gig_match',
+            title=f"Perfect Match: {gig.title}",
+            description=f"This gig at {gig.venue.venue_name} matches your profile perfectly!",
+            confidence_score=float(score),
+            reasoning=reasons,
+            recommended_gig=gig
+        )
+        for (gig, score), reasons in zip(matches, reasoning)
+    ])
+    # Accepted matches are kept even when they drop out of the top
+    AIRecommendation.objects.filter(
+        user_id=musician.user_id, recommendation_type='gig_match', is_accepted=False
+    ).exclude(recommended_gig__in=[gig.pk for gig, _ in matches]).delete()
+
+    MusicianProfile.objects.filter(pk=musician.pk, updated_at=musician.updated_at).update(
+        matches_computed_at=started_at
+    )
+    invalidate_matches([musician.user_id])
+    return len(matches)
+
+
+def find_matching_gigs(musician, scorer, limit):
+    """
+    The `limit` best scoring open gigs for a musician profile.
+
+    Returns the gigs (with their venue) and their scores, best first.
+    """
+    queryset = Gig.objects.filter(status='open')
+
+    # Match genres and instruments (in-memory inverted index; the same
+    # rule as eligible_musicians_filter, see MATCH_FACETS)
+    queryset = open_gig_index.filter_queryset(
+        queryset, genres=musician.genres, instruments=musician.instruments
+    )
+
+    # Match experience level
+    queryset = queryset.filter(experience_level__in=experience_levels_for(musician.experience_years))
+
+    # Match location (within travel distance)
+    distances = None
+    if musician.latitude is not None and musician.longitude is not None:
+        distances = distances_within(
+            OpenGigFeed.objects.applicable(),
+            float(musician.latitude),
+            float(musician.longitude),
+            musician.travel_distance
+        )
+        queryset = queryset.filter(pk__in=list(distances))
+    elif musician.user.city:
+        queryset = queryset.filter(venue__city_normalized=normalize_location(musician.user.city))
+
+    # Score every candidate in one pass, then load only the winners
+    candidates = list(queryset.only(*GIG_FIELDS))
+    if distances is not None:
+        # Nearest first among equal scores
+        candidates.sort(key=lambda gig: distances[gig.pk])
+    scores = scorer.score_gigs(musician, candidates)
+    top = np.argsort(-scores, kind='stable')[:limit]
+
+    gigs = Gig.objects.select_related('venue').in_bulk([candidates[index].pk for index in top])
+    return [gigs[candidates[index].pk] for index in top], scores[top]
+
+
+def create_generation_task(ai_service, **fields):
+    """Create the AITask tracking content generation for `ai_service`"""
+    return AITask.objects.create(
+        task_type=CONTENT_TASK_TYPES.get(ai_service.content_type, 'generate_content'),
+        input_data={'content_type': ai_service.content_type, **ai_service.input_data},
+        user_id=ai_service.user_id,
+        ai_service=ai_service,
+        **fields
+    )
+
+
+def enqueue_generation(ai_service, budget=None):
+    """
+    Queue content generation for a pending AI service and return its AITask.
+
+    The service is claimed by moving it from ``pending`` to
+    ``processing`` in one conditional update, so concurrent requests
+    cannot both generate it; None is returned (and `budget` released)
+    when it is no longer pending. A prompt answered before is served from
+    the completion cache (see ai_services.llm) on the spot. Otherwise the
+    Celery task is sent once the surrounding transaction commits, under
+    the id stored on the AITask so clients can follow it. `budget` is the
+    TokenBudget reserved for the request; the task is delayed while the
+    model's shared budget is short.
+    """
+    claimed = AIService.objects.filter(pk=ai_service.pk, status='pending').update(
+        status='processing', updated_at=timezone.now()
+    )
+    if not claimed:
+        if budget is not None:
+            budget.release()
+        return None
+    ai_service.status = 'processing'
+
+    ai_task = create_generation_task(ai_service, celery_task_id=str(uuid.uuid4()))
+
+    cached = get_cached_completion(ai_service.prompt, ai_service.ai_model)
+    if cached is not None:
+        if budget is not None:
+            budget.release()
+        ai_task.status = 'running'
+        ai_task.started_at = timezone.now()
+        store_completion(ai_task, ai_service, cached, cache_hit=True)
+        return ai_task
+
+    options = {'task_id': ai_task.celery_task_id}
+    if budget is not None:
+        options['kwargs'] = budget.task_kwargs()
+        if not budget.model_reserved:
+            options['countdown'] = math.ceil(budget.model_wait)
+    transaction.on_commit(
+        lambda: generate_ai_content.apply_async(args=[ai_task.pk], **options),
+        robust=True
+    )
+    return ai_task
+
+
+@shared_task(bind=True, max_retries=None)
+def generate_ai_content(self, ai_task_id, budget=None):
+    """
+    Generate the content of an AITask's AI service with the language model.
+
+    Progress is tracked on the AITask; the text, token usage and cost are
+    stored on the AIService. Failures mark both as failed. Tokens reserved
+    in `budget` (TokenBudget fields) beyond the real usage are refunded.
+    """
+    budget = TokenBudget(**budget) if budget else None
+    if budget is not None and not budget.model_reserved:
+        if not AITask.objects.filter(pk=ai_task_id, status='pending').exists():
+            budget.release()
+            return
+        wait = budget.reserve_model()
+        if wait:
+            # The model's shared budget is still short; try again once it refills
+            raise self.retry(countdown=math.ceil(wait))
+
+    # Claim the task; a cancelled or already claimed task is left alone
+    claimed = AITask.objects.filter(pk=ai_task_id, status='pending').update(
+        status='running', started_at=timezone.now(), progress_percentage=10
+    )
+    if not claimed:
+        if budget is not None:
+            budget.release()
+        return
+    ai_task = AITask.objects.select_related('ai_service').get(pk=ai_task_id)
+    ai_service = ai_task.ai_service
+
+    # An identical request may have completed since this one was queued
+    completion = get_cached_completion(ai_service.prompt, ai_service.ai_model)
+    cache_hit, coalesced = completion is not None, False
+    if completion is None:
+        try:
+            completion, coalesced = llm_dispatcher.complete(ai_service.prompt, ai_service.ai_model)
+        except Exception as exc:
+            logger.exception('AI content generation failed for task %s', ai_task.pk)
+            if budget is not None:
+                budget.release()
+            store_failure(ai_task, ai_service, exc)
+            return
+
+    # Cached completions, and ones another identical request paid for, are free
+    charged = not (cache_hit or coalesced)
+    if budget is not None:
+        budget.release(used=completion.total_tokens if charged else 0)
+    if charged:
+        cache_completion(ai_service.prompt, ai_service.ai_model, ai_service.content_type, completion)
+    store_completion(ai_task, ai_service, completion, cache_hit=not charged, coalesced=coalesced)
+
+
+def store_completion(ai_task, ai_service, completion, cache_hit, coalesced=False):
+    """Save generated content on the service and complete its task.
+
+    Cached completions (including ones shared with a concurrent identical
+    request) cost nothing: they add no tokens or cost, and the hit is
+    recorded in the service metadata.
+    """
+    tokens_used = 0 if cache_hit else completion.total_tokens
+    cost = Decimal('0.0000') if cache_hit else completion.cost
+    now = timezone.now()
+    with transaction.atomic():
+        ai_service.generated_content = completion.text
+        ai_service.tokens_used = tokens_used
+        ai_service.cost = cost
+        ai_service.metadata = {
+            **ai_service.metadata,
+            'prompt_tokens': completion.prompt_tokens,
+            'completion_tokens': completion.completion_tokens,
+            'cache_hit': cache_hit,
+            'coalesced': coalesced,
+        }
+        ai_service.status = 'completed'
+        ai_service.completed_at = now
+        ai_service.save()
+
+        ai_task.status = 'completed'
+        ai_task.progress_percentage = 100
+        ai_task.completed_at = now
+        ai_task.result_data = {
+            'ai_service_id': ai_service.pk,
+            'tokens_used': tokens_used,
+            'cost': str(cost),
+            'cache_hit': cache_hit,
+        }
+        ai_task.save(update_fields=[
+            'status', 'started_at', 'progress_percentage', 'completed_at', 'result_data'
+        ])
+
+
+def store_failure(ai_task, ai_service, exc):
+    """Mark the service and its task as failed with the error"""
+    now = timezone.now()
+    with transaction.atomic():
+        ai_task.status = 'failed'
+        ai_task.error_message = str(exc)
+        ai_task.completed_at = now
+        ai_task.save(update_fields=['status', 'error_message', 'completed_at'])
+        ai_service.status = 'failed'
+        ai_service.metadata = {**ai_service.metadata, 'error': str(exc)}
+        ai_service.save(update_fields=['status', 'metadata', 'updated_at'])
+
+
+@shared_task
+def refresh_gig_embedding(gig_id):
+    """Re-embed a gig's text, dropping the vector of a deleted gig"""
+    gig = Gig.objects.filter(pk=gig_id).only(
+        'title', 'description', 'special_requirements', 'genres'
+    ).first()
+    if gig is None:
+        Embedding.objects.filter(kind='gig', object_id=gig_id).delete()
+        return
+    store_embedding('gig', gig.pk, gig_text(gig))
+
+
+@shared_task
+def refresh_musician_embedding(musician_id):
+    """Re-embed a musician profile's text, dropping the vector of a deleted profile"""
+    musician = MusicianProfile.objects.select_related('user').filter(pk=musician_id).first()
+    if musician is None:
+        Embedding.objects.filter(kind='musician', object_id=musician_id).delete()
+        return
+    store_embedding('musician', musician.pk, musician_text(musician))
+
+
+@shared_task
+def rebuild_embeddings():
+    """Embed every gig and musician profile; unchanged texts are skipped"""
+    for gig in Gig.objects.only(
+        'title', 'description', 'special_requirements', 'genres'
+    ).iterator(chunk_size=MATCH_CHUNK_SIZE):
+        store_embedding('gig', gig.pk, gig_text(gig))
+    for musician in MusicianProfile.objects.select_related('user').iterator(
+        chunk_size=MATCH_CHUNK_SIZE
+    ):
+        store_embedding('musician', musician.pk, musician_text(musician))
+
+
+def _eligible_musicians(gig):
+    """Musicians eligible for `gig` (see ai_services.matching.MATCH_FACETS)"""
+    return MusicianProfile.objects.select_related('user').only(
+        *MUSICIAN_FIELDS, 'latitude', 'longitude', 'travel_distance', 'user__city'
+    ).filter(eligible_musicians_filter(gig)).order_by('pk')
+
+
+def _within_reach(gig, musicians):
+    """
+    Whether each musician can travel to the gig's venue.
+
+    Musicians with coordinates must be within their travel_distance of the
+    venue; the others must be in the venue's city (or have no city set).
+    """
+    venue = gig.venue
+    cities = np.array([normalize_location(musician.user.city) for musician in musicians])
+    reachable = (cities == venue.city_normalized) | (cities == '')
+
+    located = np.array([
+        musician.latitude is not None and musician.longitude is not None
+        for musician in musicians
+    ], dtype=bool)
+    if located.any():
+        reachable[located] = False
+        if venue.latitude is not None and venue.longitude is not None:
+            located_musicians = [musician for musician, flag in zip(musicians, located) if flag]
+            distances = haversine_miles(
+                float(venue.latitude), float(venue.longitude),
+                [float(musician.latitude) for musician in located_musicians],
+                [float(musician.longitude) for musician in located_musicians]
+            )
+            travel = np.array([musician.travel_distance for musician in located_musicians])
+            reachable[located] = distances <= travel
+    return reachable
+
+
+def _chunks(iterable, size=MATCH_CHUNK_SIZE):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
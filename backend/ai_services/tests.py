@@ -0,0 +1,974 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import numpy as np
+from celery.exceptions import Retry
+from celery.signals import worker_process_init
+from django.test import AsyncClient, TestCase, override_settings
+from django.core.cache import cache
+from django.utils import timezone
+from decimal import Decimal
+from datetime import timedelta
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from users.models import User, MusicianProfile, VenueProfile
+from gigs.index import get_change_sequence
+from gigs.models import Gig
+from .dispatch import LLMDispatcher, llm_dispatcher
+from .embeddings import DIMENSIONS, SemanticGigIndex, embed, gig_text, store_embedding
+from .matching import MatchScorer, experience_levels_for
+from .llm import Completion, cache_completion, get_cached_completion, response_cache_key
+from .models import AIRecommendation, AIService, AITask, Embedding
+from .providers import FakeProvider, LLMProvider, OpenAIProvider, ProviderError, get_provider
+from .ratelimit import Bucket, TokenBudget, consume, model_bucket, user_bucket
+from .tasks import (
+    backfill_musician_matches, enqueue_generation, generate_ai_content, precompute_gig_matches
+)
+
+
+def create_venue(username='venue', city='Austin'):
+    """Create a venue user and profile"""
+    user = User.objects.create_user(
+        email=f'{username}@example.com',
+        username=username,
+        password='testpass123',
+        user_type='venue',
+        city=city
+    )
+    return VenueProfile.objects.create(
+        user=user,
+        venue_name=f'{username.title()} Hall',
+        venue_type='Bar',
+        capacity=200,
+        address='123 Test Street'
+    )
+
+
+def create_musician(username='musician', city='Austin', **fields):
+    """Create a musician user and profile"""
+    user = User.objects.create_user(
+        email=f'{username}@example.com',
+        username=username,
+        password='testpass123',
+        user_type='musician',
+        city=city
+    )
+    fields.setdefault('primary_instrument', 'Guitar')
+    return MusicianProfile.objects.create(user=user, **fields)
+
+
+def create_gig(venue, title, **fields):
+    """Create an open gig at `venue`"""
+    fields.setdefault('description', f'{title} description')
+    fields.setdefault('event_date', timezone.now() + timedelta(days=30))
+    fields.setdefault('payment_amount', Decimal('300.00'))
+    fields.setdefault('payment_type', 'per_gig')
+    fields.setdefault('experience_level', 'beginner')
+    return Gig.objects.create(venue=venue, title=title, **fields)
+
+
+# An instant, reliable FakeProvider with micro-batching off
+FAKE_PROVIDER_SETTINGS = {
+    'AI_PROVIDER': 'ai_services.providers.FakeProvider',
+    'AI_FAKE_PROVIDER': {
+        'latency_ms': 0, 'jitter_ms': 0, 'tokens_per_second': 0, 'completion_tokens': 12,
+        'failure_rate': 0.0,
+    },
+    'AI_BATCH_MAX_SIZE': 1,
+}
+
+
+def baseline_match_score(musician_profile, gig):
+    """The original per-pair match score MatchScorer replaces"""
+    score = 0.0
+    
+    if musician_profile.genres and gig.genres:
+        genre_matches = len(set(musician_profile.genres) & set(gig.genres))
+        score += (genre_matches / len(gig.genres)) * 0.4
+    
+    if musician_profile.instruments and gig.instruments_needed:
+        instrument_matches = len(set(musician_profile.instruments) & set(gig.instruments_needed))
+        score += (instrument_matches / len(gig.instruments_needed)) * 0.3
+    
+    if musician_profile.experience_years >= 5:
+        score += 0.2
+    elif musician_profile.experience_years >= 2:
+        score += 0.1
+    
+    if musician_profile.original_music == gig.original_music_required:
+        score += 0.1
+    
+    return min(score, 1.0)
+
+
+class MatchScorerTest(TestCase):
+    """Test cases for the vectorized match scorer"""
+    
+    def setUp(self):
+        """Set up unsaved musician and gig fixtures covering every scoring branch"""
+        self.musicians = [
+            MusicianProfile(genres=['rock', 'blues'], instruments=['guitar'],
+                            experience_years=7, original_music=True),
+            MusicianProfile(genres=['jazz'], instruments=['sax', 'piano'],
+                            experience_years=3, original_music=False),
+            MusicianProfile(genres=[], instruments=[], experience_years=0, original_music=False),
+            MusicianProfile(genres=['rock', 'jazz', 'pop', 'folk'], instruments=['drums', 'guitar'],
+                            experience_years=2, original_music=True),
+        ]
+        self.gigs = [
+            Gig(genres=['rock'], instruments_needed=['guitar', 'bass'], original_music_required=True),
+            Gig(genres=['jazz', 'blues', 'soul'], instruments_needed=['sax'],
+                original_music_required=False),
+            Gig(genres=[], instruments_needed=[], original_music_required=False),
+            Gig(genres=['pop', 'rock', 'folk', 'jazz'], instruments_needed=['drums', 'guitar'],
+                original_music_required=True),
+        ]
+    
+    def test_scores_match_baseline(self):
+        """Test the score matrix equals the original per-pair scores"""
+        matrix = MatchScorer().score_matrix(self.musicians, self.gigs)
+        
+        for row, musician in enumerate(self.musicians):
+            for column, gig in enumerate(self.gigs):
+                self.assertAlmostEqual(
+                    matrix[row, column], baseline_match_score(musician, gig), places=9
+                )
+    
+    def test_one_sided_scores_match_matrix(self):
+        """Test scoring one musician or one gig gives the matrix row or column"""
+        scorer = MatchScorer()
+        matrix = scorer.score_matrix(self.musicians, self.gigs)
+        
+        self.assertEqual(scorer.score_gigs(self.musicians[0], self.gigs).tolist(), matrix[0].tolist())
+        self.assertEqual(
+            scorer.score_musicians(self.gigs[1], self.musicians).tolist(), matrix[:, 1].tolist()
+        )
+    
+    def test_experience_levels(self):
+        """Test experience years map to the gig levels a musician qualifies for"""
+        self.assertEqual(experience_levels_for(0), ['beginner'])
+        self.assertEqual(experience_levels_for(3), ['beginner', 'intermediate'])
+        self.assertEqual(experience_levels_for(10), ['beginner', 'intermediate', 'professional'])
+
+
+class GigMatchingViewTest(TestCase):
+    """Test cases for the gig matching endpoint"""
+    
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.venue = create_venue()
+        self.musician = create_musician(
+            genres=['rock'], instruments=['guitar'], experience_years=1
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.musician.user)
+    
+    def test_matches_respect_experience_level(self):
+        """Test gigs are matched up to the musician's experience level"""
+        beginner_gig = create_gig(
+            self.venue, 'Open Mic', genres=['rock'], instruments_needed=['guitar']
+        )
+        create_gig(
+            self.venue, 'Arena Show', genres=['rock'], instruments_needed=['guitar'],
+            experience_level='professional'
+        )
+        
+        response = self.client.post('/api/match-gigs/')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [match['recommended_gig']['id'] for match in response.data['results']],
+            [beginner_gig.id]
+        )
+        self.assertAlmostEqual(
+            response.data['results'][0]['confidence_score'],
+            baseline_match_score(self.musician, beginner_gig)
+        )
+
+
+class MusicianMatchBackfillTest(TestCase):
+    """Test cases for matching a musician against the whole open catalogue"""
+    
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.venue = create_venue()
+        self.older_gigs = [
+            create_gig(self.venue, f'Older {number}', genres=['rock'], instruments_needed=['guitar'])
+            for number in range(5)
+        ]
+        self.musician = create_musician(genres=['rock'], instruments=['guitar'])
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.musician.user)
+    
+    def _matched_titles(self):
+        """Return the match response data and the sorted titles of the matched gigs"""
+        response = self.client.post('/api/match-gigs/')
+        self.assertEqual(response.status_code, 200)
+        return response.data, sorted(
+            match['recommended_gig']['title'] for match in response.data['results']
+        )
+    
+    def test_partial_matches_are_not_served_before_backfill(self):
+        """Test matches stored by gig saves alone do not hide older gigs"""
+        new_gig = create_gig(self.venue, 'New', genres=['rock'], instruments_needed=['guitar'])
+        precompute_gig_matches(new_gig.pk)
+        
+        data, titles = self._matched_titles()
+        
+        self.assertEqual(titles, ['New'] + [gig.title for gig in self.older_gigs])
+        self.assertFalse(data['precomputed'])
+        self.musician.refresh_from_db()
+        self.assertIsNotNone(self.musician.matches_computed_at)
+    
+    def test_signup_backfills_matches(self):
+        """Test a new musician profile is matched in the background"""
+        with mock.patch('ai_services.signals.backfill_musician_matches.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                musician = create_musician('newcomer', genres=['rock'], instruments=['guitar'])
+        delay.assert_called_once_with(musician.pk)
+        
+        backfill_musician_matches(musician.pk)
+        musician.refresh_from_db()
+        self.assertIsNotNone(musician.matches_computed_at)
+        self.assertEqual(
+            AIRecommendation.objects.filter(user=musician.user).count(), len(self.older_gigs)
+        )
+        
+        self.client.force_authenticate(user=musician.user)
+        data, titles = self._matched_titles()
+        self.assertTrue(data['precomputed'])
+        self.assertEqual(titles, [gig.title for gig in self.older_gigs])
+    
+    def test_profile_change_drops_stale_matches(self):
+        """Test matches of the old profile are neither stored nor served after a change"""
+        jazz_gig = create_gig(self.venue, 'Jazz Brunch', genres=['jazz'], instruments_needed=['sax'])
+        backfill_musician_matches(self.musician.pk)
+        self.assertFalse(
+            AIRecommendation.objects.filter(user=self.musician.user, recommended_gig=jazz_gig).exists()
+        )
+        
+        self.musician.genres = ['jazz']
+        self.musician.instruments = ['sax']
+        self.musician.save()
+        
+        self.assertFalse(AIRecommendation.objects.filter(user=self.musician.user).exists())
+        data, titles = self._matched_titles()
+        self.assertEqual(titles, ['Jazz Brunch'])
+        self.assertEqual(
+            list(AIRecommendation.objects.filter(user=self.musician.user).values_list(
+                'recommended_gig', flat=True
+            )),
+            [jazz_gig.pk]
+        )
+    
+    def test_both_directions_agree_on_untagged_gigs(self):
+        """Test gig-side and musician-side matching store the same matches"""
+        untagged_gig = create_gig(self.venue, 'Anything Goes')
+        open_musician = create_musician('open', genres=[], instruments=[])
+        
+        def matched_users():
+            return set(AIRecommendation.objects.filter(
+                recommended_gig=untagged_gig
+            ).values_list('user_id', flat=True))
+        
+        precompute_gig_matches(untagged_gig.pk)
+        from_gig = matched_users()
+        for musician in (self.musician, open_musician):
+            backfill_musician_matches(musician.pk)
+        
+        self.assertEqual(matched_users(), from_gig)
+        self.assertEqual(from_gig, {open_musician.user_id})
+        
+        precompute_gig_matches(untagged_gig.pk)
+        self.assertEqual(matched_users(), from_gig)
+
+class GigMatchStorageTest(TestCase):
+    """Test cases for storing gig match recommendations"""
+    
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.venue = create_venue()
+        self.gig = create_gig(self.venue, 'Rock Night', genres=['rock'], instruments_needed=['guitar'])
+        self.rocker = create_musician('rocker', genres=['rock'], instruments=['guitar'])
+        self.other = create_musician('other', genres=['rock'], instruments=['guitar'])
+    
+    def _recommendation(self, musician, score):
+        """Build an unsaved gig match for `musician`"""
+        return AIRecommendation(
+            user=musician.user,
+            recommendation_type='gig_match',
+            title=f'Perfect Match: {self.gig.title}',
+            description='Matches your profile',
+            confidence_score=score,
+            recommended_gig=self.gig
+        )
+    
+    def test_upsert_is_idempotent(self):
+        """Test upserting again updates rows in place and keeps user interaction"""
+        AIRecommendation.objects.upsert([self._recommendation(self.rocker, 0.5)])
+        AIRecommendation.objects.filter(user=self.rocker.user).update(is_viewed=True)
+        
+        AIRecommendation.objects.upsert([self._recommendation(self.rocker, 0.8)])
+        AIRecommendation.objects.upsert([self._recommendation(self.rocker, 0.8)])
+        
+        recommendation = AIRecommendation.objects.get()
+        self.assertEqual(recommendation.confidence_score, 0.8)
+        self.assertTrue(recommendation.is_viewed)
+    
+    def test_precompute_stores_and_drops_matches(self):
+        """Test precomputing replaces matches that dropped out, but keeps accepted ones"""
+        self.assertEqual(precompute_gig_matches(self.gig.pk), 2)
+        self.assertEqual(
+            set(AIRecommendation.objects.values_list('user_id', flat=True)),
+            {self.rocker.user_id, self.other.user_id}
+        )
+        AIRecommendation.objects.filter(user=self.other.user).update(is_accepted=True)
+        
+        MusicianProfile.objects.filter(pk__in=[self.rocker.pk, self.other.pk]).update(genres=['polka'])
+        self.assertEqual(precompute_gig_matches(self.gig.pk), 0)
+        
+        self.assertEqual(
+            list(AIRecommendation.objects.values_list('user_id', flat=True)), [self.other.user_id]
+        )
+        self.assertEqual(precompute_gig_matches(self.gig.pk), 0)
+        self.assertEqual(AIRecommendation.objects.count(), 1)
+
+
+GIG_WORDS = (
+    'rock jazz blues funk soul pop folk metal punk country guitar bass drums sax piano '
+    'violin vocals trumpet wedding bar club festival acoustic electric covers originals '
+    'dance night weekend brunch lounge rooftop outdoor'
+).split()
+
+
+class EmbeddingTest(TestCase):
+    """Test cases for text embeddings"""
+    
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+    
+    def test_embed_is_deterministic_and_normalized(self):
+        """Test a text always embeds to the same unit vector"""
+        vector = embed('Jazz trio wanted for a Sunday brunch')
+        
+        self.assertEqual(vector.dtype, np.float32)
+        self.assertEqual(vector.shape, (DIMENSIONS,))
+        self.assertAlmostEqual(float(np.linalg.norm(vector)), 1.0, places=5)
+        self.assertEqual(vector.tobytes(), embed('Jazz trio wanted for a Sunday brunch').tobytes())
+        self.assertFalse(embed('').any())
+    
+    def test_only_gig_embeddings_log_changes(self):
+        """Test re-embedding a musician leaves the semantic gig indexes alone"""
+        sequence = get_change_sequence()
+        with self.captureOnCommitCallbacks(execute=True):
+            store_embedding('musician', 1, 'Jazz saxophonist')
+        self.assertEqual(get_change_sequence(), sequence)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            store_embedding('gig', 1, 'Jazz night')
+            store_embedding('gig', 1, 'Jazz night')
+        self.assertEqual(get_change_sequence(), sequence + 1)
+
+
+class SemanticGigIndexTest(TestCase):
+    """Test cases for the semantic gig index"""
+    
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+    
+    def test_recall_against_exact_search(self):
+        """Test the LSH neighbours are about as similar as the exact top k"""
+        rng = random.Random(1)
+        matrix = np.vstack([embed(' '.join(rng.sample(GIG_WORDS, 8))) for _ in range(1000)])
+        index = SemanticGigIndex()
+        
+        with mock.patch.object(
+            index, '_load_vectors', return_value=(np.arange(len(matrix), dtype=np.int64), matrix)
+        ):
+            recalls = []
+            for _ in range(50):
+                vector = embed(' '.join(rng.sample(GIG_WORDS, 6)))
+                gig_ids, similarities = index.query(vector, k=10)
+                
+                exact = matrix @ vector
+                self.assertTrue(np.allclose(similarities, exact[gig_ids]))
+                # Ties at the k-th similarity make any of the tied gigs a hit
+                recalls.append(np.mean(similarities >= np.sort(exact)[-10] - 1e-6))
+        
+        self.assertGreaterEqual(np.mean(recalls), 0.85)
+    
+    def test_patched_from_change_log(self):
+        """Test re-embedded and closed gigs are patched in without a rebuild"""
+        venue = create_venue()
+        gigs = [create_gig(venue, title) for title in ('Jazz Brunch', 'Metal Night', 'Folk Evening')]
+        for gig in gigs:
+            store_embedding('gig', gig.pk, gig_text(gig))
+        index = SemanticGigIndex()
+        index.refresh()
+        query = embed('Blues jam session')
+        
+        with mock.patch.object(index, '_build') as build:
+            with self.captureOnCommitCallbacks(execute=True):
+                store_embedding('gig', gigs[1].pk, 'Blues jam session')
+            self.assertEqual(index.query(query, k=1)[0].tolist(), [gigs[1].pk])
+            
+            with self.captureOnCommitCallbacks(execute=True):
+                gigs[1].status = 'closed'
+                gigs[1].save()
+            self.assertNotIn(gigs[1].pk, index.query(query, k=3)[0].tolist())
+        
+        build.assert_not_called()
+
+
+class SemanticGigMatchingViewTest(TestCase):
+    """Test cases for the semantic gig matching endpoint"""
+    
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        venue = create_venue()
+        self.jazz_gig = create_gig(
+            venue, 'Jazz Brunch', description='Saxophone jazz standards for Sunday brunch',
+            genres=['jazz']
+        )
+        self.metal_gig = create_gig(
+            venue, 'Metal Night', description='Loud drums and distorted guitars', genres=['metal']
+        )
+        for gig in (self.jazz_gig, self.metal_gig):
+            store_embedding('gig', gig.pk, gig_text(gig))
+        self.musician = create_musician(genres=['jazz'])
+        self.musician.user.bio = 'Jazz saxophone player, standards and brunch sets'
+        self.musician.user.save()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.musician.user)
+    
+    def test_similar_gigs_without_writes(self):
+        """Test the closest gig ranks first and the musician is embedded in the background"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.get('/api/match-gigs/semantic/')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [match['gig']['id'] for match in response.data['results']],
+            [self.jazz_gig.pk, self.metal_gig.pk]
+        )
+        self.assertFalse(Embedding.objects.filter(kind='musician').exists())
+        
+        with mock.patch('ai_services.tasks.refresh_musician_embedding.delay') as delay:
+            for callback in callbacks:
+                callback()
+        delay.assert_called_once_with(self.musician.pk)
+
+
+@override_settings(**FAKE_PROVIDER_SETTINGS)
+class ContentGenerationTest(TestCase):
+    """Test cases for queueing and storing AI content generation"""
+    
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = create_musician().user
+        self.ai_service = AIService.objects.create(
+            user=self.user, content_type='musician_bio', prompt='Write a bio for a jazz trio'
+        )
+    
+    def test_enqueue_claims_service_once(self):
+        """Test a pending service is queued once, however many requests race for it"""
+        stale_copy = AIService.objects.get(pk=self.ai_service.pk)
+        
+        with self.captureOnCommitCallbacks() as callbacks:
+            ai_task = enqueue_generation(self.ai_service)
+            self.assertIsNone(enqueue_generation(stale_copy))
+        
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(ai_task.status, 'pending')
+        self.assertEqual(ai_task.task_type, 'generate_bio')
+        self.ai_service.refresh_from_db()
+        self.assertEqual(self.ai_service.status, 'processing')
+        self.assertEqual(AITask.objects.count(), 1)
+    
+    def test_generated_content_is_stored(self):
+        """Test the completion, token usage and cost are stored on the service and task"""
+        with self.captureOnCommitCallbacks():
+            ai_task = enqueue_generation(self.ai_service)
+        
+        generate_ai_content(ai_task.pk)
+        
+        self.ai_service.refresh_from_db()
+        ai_task.refresh_from_db()
+        self.assertEqual(self.ai_service.status, 'completed')
+        self.assertEqual(len(self.ai_service.generated_content.split()), 12)
+        self.assertGreater(self.ai_service.tokens_used, 12)
+        self.assertFalse(self.ai_service.metadata['cache_hit'])
+        self.assertEqual(ai_task.status, 'completed')
+        self.assertEqual(ai_task.progress_percentage, 100)
+        self.assertEqual(ai_task.result_data['tokens_used'], self.ai_service.tokens_used)
+    
+    def test_cached_completion_is_stored_on_enqueue(self):
+        """Test a prompt answered before completes at once, free of charge"""
+        completion = Completion(text='Cached bio.', model=self.ai_service.ai_model, prompt_tokens=20,
+                                completion_tokens=5)
+        cache_completion(self.ai_service.prompt, self.ai_service.ai_model, 'musician_bio', completion)
+        
+        with self.captureOnCommitCallbacks() as callbacks:
+            ai_task = enqueue_generation(self.ai_service)
+        
+        self.assertEqual(callbacks, [])
+        self.ai_service.refresh_from_db()
+        self.assertEqual(self.ai_service.status, 'completed')
+        self.assertEqual(self.ai_service.generated_content, 'Cached bio.')
+        self.assertEqual(self.ai_service.tokens_used, 0)
+        self.assertTrue(self.ai_service.metadata['cache_hit'])
+        self.assertEqual(AITask.objects.get(pk=ai_task.pk).status, 'completed')
+    
+    def test_failure_is_stored(self):
+        """Test a provider error marks the service and its task as failed"""
+        with self.captureOnCommitCallbacks():
+            ai_task = enqueue_generation(self.ai_service)
+        
+        with mock.patch(
+            'ai_services.providers.FakeProvider.complete', side_effect=ProviderError('Model is down')
+        ):
+            generate_ai_content(ai_task.pk)
+        
+        self.ai_service.refresh_from_db()
+        ai_task.refresh_from_db()
+        self.assertEqual(self.ai_service.status, 'failed')
+        self.assertEqual(self.ai_service.metadata['error'], 'Model is down')
+        self.assertEqual(ai_task.status, 'failed')
+        self.assertEqual(ai_task.error_message, 'Model is down')
+
+
+@override_settings(**FAKE_PROVIDER_SETTINGS)
+class CompletionCacheTest(TestCase):
+    """Test cases for the completion cache"""
+    
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = create_musician().user
+    
+    def _generate(self, prompt):
+        """Queue and run generation of `prompt`, returning the refreshed service"""
+        ai_service = AIService.objects.create(user=self.user, content_type='setlist', prompt=prompt)
+        with self.captureOnCommitCallbacks():
+            ai_task = enqueue_generation(ai_service)
+        if ai_task.status == 'pending':
+            generate_ai_content(ai_task.pk)
+        ai_service.refresh_from_db()
+        return ai_service
+    
+    def test_key_is_stable(self):
+        """Test the key ignores whitespace but not the model or the provider"""
+        key = response_cache_key('Setlist for a  jazz\nbrunch', 'gpt-4o-mini')
+        
+        self.assertEqual(key, response_cache_key(' Setlist for a jazz brunch ', 'gpt-4o-mini'))
+        self.assertNotEqual(key, response_cache_key('Setlist for a jazz brunch', 'gpt-4o'))
+        self.assertNotEqual(key, response_cache_key('Setlist for a blues brunch', 'gpt-4o-mini'))
+    
+    def test_cache_hit_skips_provider(self):
+        """Test an identical request is answered from the cache, free of charge"""
+        first = self._generate('Setlist for a jazz brunch')
+        
+        with mock.patch('ai_services.providers.FakeProvider.complete') as complete:
+            second = self._generate('Setlist for a  jazz brunch')
+        
+        complete.assert_not_called()
+        self.assertEqual(second.generated_content, first.generated_content)
+        self.assertTrue(second.metadata['cache_hit'])
+        self.assertEqual(second.tokens_used, 0)
+        self.assertGreater(first.tokens_used, 0)
+    
+    def test_failures_are_not_cached(self):
+        """Test a failed generation is retried with the provider next time"""
+        with mock.patch(
+            'ai_services.providers.FakeProvider.complete', side_effect=ProviderError('Model is down')
+        ):
+            failed = self._generate('Setlist for a jazz brunch')
+        
+        self.assertEqual(failed.status, 'failed')
+        self.assertIsNone(get_cached_completion(failed.prompt, failed.ai_model))
+        ai_service = self._generate('Setlist for a jazz brunch')
+        self.assertEqual(ai_service.status, 'completed')
+        self.assertFalse(ai_service.metadata['cache_hit'])
+
+
+def fake_completion(prompt, model):
+    """A completion echoing `prompt`"""
+    return Completion(text=prompt.upper(), model=model, prompt_tokens=10, completion_tokens=5)
+
+
+@override_settings(AI_BATCH_WINDOW_MS=300, AI_BATCH_MAX_SIZE=2, AI_BATCH_MAX_PROMPT_CHARS=600)
+class LLMDispatcherTest(TestCase):
+    """Test cases for request coalescing and micro-batching"""
+    
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.dispatcher = LLMDispatcher()
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='caller')
+        self.addCleanup(self.executor.shutdown)
+    
+    def _submit(self, prompt):
+        """Call the dispatcher from another thread"""
+        return self.executor.submit(self.dispatcher.complete, prompt, 'gpt-4o-mini')
+    
+    def test_identical_requests_coalesce(self):
+        """Test concurrent identical prompts share one model call"""
+        started, release = threading.Event(), threading.Event()
+        
+        def slow_completion(prompt, model):
+            started.set()
+            release.wait(5)
+            return fake_completion(prompt, model)
+        
+        with mock.patch('ai_services.dispatch.complete', side_effect=slow_completion) as complete:
+            self.dispatcher.batching = False
+            leader = self._submit('Bio for a jazz trio')
+            self.assertTrue(started.wait(5))
+            follower = self._submit('Bio for a  jazz trio')
+            time.sleep(0.1)
+            release.set()
+            
+            self.assertEqual(leader.result(5), (fake_completion('Bio for a jazz trio', 'gpt-4o-mini'), False))
+            self.assertEqual(follower.result(5), (fake_completion('Bio for a jazz trio', 'gpt-4o-mini'), True))
+        complete.assert_called_once()
+    
+    def test_batches_split_at_max_size(self):
+        """Test a full batch is sent at once and a later prompt waits a full window of its own"""
+        batch_completions = lambda prompts, model: [fake_completion(prompt, model) for prompt in prompts]
+        with mock.patch('ai_services.dispatch.complete_batch', side_effect=batch_completions) as batch, \
+                mock.patch('ai_services.dispatch.complete', side_effect=fake_completion) as complete:
+            first, second = self._submit('Setlist one'), self._submit('Setlist two')
+            self.assertEqual(first.result(5)[0].text, 'SETLIST ONE')
+            self.assertEqual(second.result(5)[0].text, 'SETLIST TWO')
+            
+            # The first batch's timer must not send this one early
+            time.sleep(0.2)
+            submitted = time.monotonic()
+            self.assertEqual(self._submit('Setlist three').result(5)[0].text, 'SETLIST THREE')
+            self.assertGreaterEqual(time.monotonic() - submitted, 0.25)
+        
+        batch.assert_called_once()
+        self.assertEqual(sorted(batch.call_args.args[0]), ['Setlist one', 'Setlist two'])
+        complete.assert_called_once_with('Setlist three', 'gpt-4o-mini')
+    
+    def test_single_task_processes_skip_batching(self):
+        """Test prefork and solo pool processes send prompts without waiting for a batch"""
+        self.addCleanup(setattr, llm_dispatcher, 'batching', True)
+        worker_process_init.send(sender=None)
+        self.assertFalse(llm_dispatcher.batching)
+        
+        with mock.patch('ai_services.dispatch.complete', side_effect=fake_completion) as complete:
+            started = time.monotonic()
+            llm_dispatcher.complete('Setlist one', 'gpt-4o-mini')
+            self.assertLess(time.monotonic() - started, 0.2)
+        complete.assert_called_once_with('Setlist one', 'gpt-4o-mini')
+    
+    @override_settings(AI_BATCH_WINDOW_MS=100, AI_BATCH_MAX_SIZE=3)
+    def test_failed_batch_falls_back_in_caller_threads(self):
+        """Test each prompt of a failed batch is completed alone by its own caller, not the timer"""
+        calling_threads = []
+        
+        def single_completion(prompt, model):
+            calling_threads.append(threading.current_thread().name)
+            return fake_completion(prompt, model)
+        
+        with mock.patch('ai_services.dispatch.complete_batch', side_effect=ValueError('Malformed')), \
+                mock.patch('ai_services.dispatch.complete', side_effect=single_completion):
+            futures = [self._submit('Setlist one'), self._submit('Setlist two')]
+            results = [future.result(5)[0].text for future in futures]
+        
+        self.assertEqual(results, ['SETLIST ONE', 'SETLIST TWO'])
+        self.assertEqual(len(calling_threads), 2)
+        self.assertTrue(all(name.startswith('caller') for name in calling_threads), calling_threads)
+    
+    def test_errors_reach_coalesced_callers(self):
+        """Test every caller sharing a failed model call gets its error"""
+        started, release = threading.Event(), threading.Event()
+        
+        def failing_completion(prompt, model):
+            started.set()
+            release.wait(5)
+            raise ProviderError('Model is down')
+        
+        with mock.patch('ai_services.dispatch.complete', side_effect=failing_completion):
+            self.dispatcher.batching = False
+            leader = self._submit('Bio for a jazz trio')
+            self.assertTrue(started.wait(5))
+            follower = self._submit('Bio for a jazz trio')
+            time.sleep(0.1)
+            release.set()
+            
+            for future in (leader, follower):
+                with self.assertRaisesMessage(ProviderError, 'Model is down'):
+                    future.result(5)
+
+
+def parse_events(body):
+    """The (event, data) pairs of a Server-Sent Events body, comments skipped"""
+    events = []
+    for block in body.decode().split('\n\n'):
+        fields = dict(
+            line.split(': ', 1) for line in block.splitlines() if line and not line.startswith(':')
+        )
+        if fields:
+            events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+@override_settings(**FAKE_PROVIDER_SETTINGS)
+class StreamGeneratedContentTest(TestCase):
+    """Test cases for streaming generated content"""
+    
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = create_musician().user
+        self.ai_service = AIService.objects.create(
+            user=self.user, content_type='musician_bio', prompt='Write a bio for a jazz trio'
+        )
+        self.url = f'/api/services/{self.ai_service.pk}/stream/'
+        self.client = AsyncClient()
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+    
+    async def _stream(self):
+        """GET the stream and return the response with its parsed events"""
+        response = await self.client.get(self.url, headers=self.headers)
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        return response, parse_events(body)
+    
+    async def test_requires_authentication(self):
+        """Test the stream rejects requests without a valid token"""
+        response = await self.client.get(self.url)
+        self.assertEqual(response.status_code, 401)
+        
+        response = await self.client.get(self.url, headers={'Authorization': 'Bearer not-a-token'})
+        self.assertEqual(response.status_code, 401)
+    
+    async def test_streams_tokens_then_done(self):
+        """Test the text arrives as token events followed by a done event"""
+        response, events = await self._stream()
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        names = [event for event, _ in events]
+        self.assertEqual(names, ['token'] * 12 + ['done'])
+        text = ''.join(data['text'] for event, data in events if event == 'token')
+        self.assertEqual(len(text.split()), 12)
+        self.assertEqual(events[-1][1]['id'], self.ai_service.pk)
+        self.assertEqual(events[-1][1]['status'], 'completed')
+    
+    async def test_result_is_stored(self):
+        """Test the streamed text is stored and replayed to later requests"""
+        _, events = await self._stream()
+        text = ''.join(data['text'] for event, data in events if event == 'token')
+        
+        ai_service = await AIService.objects.aget(pk=self.ai_service.pk)
+        ai_task = await AITask.objects.aget(ai_service=ai_service)
+        self.assertEqual(ai_service.status, 'completed')
+        self.assertEqual(ai_service.generated_content, text.strip())
+        self.assertGreater(ai_service.tokens_used, 0)
+        self.assertEqual(ai_task.status, 'completed')
+        
+        _, replayed = await self._stream()
+        self.assertEqual(replayed[0], ('token', {'text': ai_service.generated_content}))
+        self.assertEqual(replayed[-1][0], 'done')
+        self.assertEqual(await AITask.objects.filter(ai_service=ai_service).acount(), 1)
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    AI_USER_TOKENS_PER_MINUTE=600, AI_USER_TOKEN_BURST=300,
+    AI_MODEL_TOKENS_PER_MINUTE=600, AI_MODEL_TOKEN_BURST=1000,
+    AI_MAX_COMPLETION_TOKENS=100, **FAKE_PROVIDER_SETTINGS
+)
+class TokenBudgetTest(TestCase):
+    """Test cases for LLM token budgets (on the local cache fallback)"""
+    
+    def setUp(self):
+        """Set up test data, with the budget clock frozen"""
+        cache.clear()
+        self.user = create_musician().user
+        self.ai_service = AIService.objects.create(
+            user=self.user, content_type='musician_bio', prompt='Write a bio for a jazz trio'
+        )
+        patcher = mock.patch('ai_services.ratelimit.time')
+        self.clock = patcher.start().time
+        self.clock.return_value = 1000.0
+        self.addCleanup(patcher.stop)
+    
+    def _level(self, bucket):
+        """The bucket's level at the current time, without charging it"""
+        return consume([bucket], 0)[2][0]
+    
+    def test_refill_math(self):
+        """Test buckets refill at their rate up to capacity, and charge all or nothing"""
+        bucket = Bucket('test:bucket', capacity=100, rate=10)
+        other = Bucket('test:other', capacity=100, rate=10)
+        
+        self.assertEqual(consume([bucket], 80), (None, 0.0, [20]))
+        self.clock.return_value += 1
+        self.assertEqual(consume([other, bucket], 50), (bucket, 2.0, [100, 30]))
+        self.assertEqual(self._level(other), 100)
+        
+        self.clock.return_value += 2
+        self.assertEqual(consume([bucket], 50), (None, 0.0, [0]))
+        self.clock.return_value += 3600
+        self.assertEqual(self._level(bucket), 100)
+    
+    def test_user_over_budget_is_rejected_then_allowed(self):
+        """Test a request over the user's budget gets 429 until the bucket refills"""
+        consume([user_bucket(self.user.pk)], 300)
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        url = f'/api/services/{self.ai_service.pk}/generate_content/'
+        
+        response = client.post(url)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '11')
+        self.assertEqual(response['X-AI-Token-Remaining'], '0')
+        
+        self.clock.return_value += 11
+        with self.captureOnCommitCallbacks():
+            response = client.post(url)
+        self.assertEqual(response.status_code, 202)
+    
+    def test_task_waits_for_the_model_budget(self):
+        """Test generation is retried until the model's shared bucket refills"""
+        shared = model_bucket(self.ai_service.ai_model)
+        consume([shared], 1000)
+        budget = TokenBudget.reserve(self.user.pk, self.ai_service.ai_model, self.ai_service.prompt)
+        self.assertTrue(budget.allowed)
+        self.assertFalse(budget.model_reserved)
+        self.assertAlmostEqual(budget.model_wait, budget.tokens / 10)
+        with self.captureOnCommitCallbacks():
+            ai_task = enqueue_generation(self.ai_service, budget)
+        
+        with self.assertRaises(Retry):
+            generate_ai_content(ai_task.pk, **budget.task_kwargs())
+        self.assertEqual(AITask.objects.get(pk=ai_task.pk).status, 'pending')
+        
+        self.clock.return_value += 20
+        generate_ai_content(ai_task.pk, **budget.task_kwargs())
+        
+        self.ai_service.refresh_from_db()
+        self.assertEqual(self.ai_service.status, 'completed')
+        self.assertEqual(self._level(shared), 200 - self.ai_service.tokens_used)
+    
+    def test_unused_tokens_are_refunded(self):
+        """Test releasing a reservation returns what the completion did not use"""
+        budget = TokenBudget.reserve(self.user.pk, self.ai_service.ai_model, self.ai_service.prompt)
+        self.assertEqual(budget.user_remaining, 300 - budget.tokens)
+        self.assertEqual(self._level(model_bucket(budget.model)), 1000 - budget.tokens)
+        
+        budget.release(used=30)
+        
+        self.assertEqual(self._level(user_bucket(self.user.pk)), 270)
+        self.assertEqual(self._level(model_bucket(budget.model)), 970)
+        
+        budget.release(used=budget.tokens)
+        self.assertEqual(self._level(user_bucket(self.user.pk)), 270)
+
+
+class ProviderTest(TestCase):
+    """Test cases for language model providers"""
+    
+    def test_provider_is_selected_by_setting(self):
+        """Test the provider comes from AI_PROVIDER and is reused across calls"""
+        with override_settings(AI_PROVIDER='ai_services.providers.OpenAIProvider'):
+            self.assertIsInstance(get_provider(), OpenAIProvider)
+        with override_settings(AI_PROVIDER='ai_services.providers.FakeProvider'):
+            self.assertIsInstance(get_provider(), FakeProvider)
+            self.assertIs(get_provider(), get_provider())
+    
+    def test_provider_interface_is_abstract(self):
+        """Test a provider must implement every call"""
+        class PartialProvider(LLMProvider):
+            def complete(self, prompt, model):
+                return fake_completion(prompt, model)
+        
+        with self.assertRaises(TypeError):
+            PartialProvider()
+    
+    @override_settings(**FAKE_PROVIDER_SETTINGS)
+    def test_fake_provider_output(self):
+        """Test fake answers are deterministic per prompt and streamed word by word"""
+        provider = FakeProvider()
+        completion = provider.complete('Bio for a jazz trio', 'gpt-4o-mini')
+        
+        self.assertEqual(completion, provider.complete('Bio for a jazz trio', 'gpt-4o-mini'))
+        self.assertNotEqual(completion.text, provider.complete('Bio for a rock band', 'gpt-4o-mini').text)
+        self.assertEqual(completion.completion_tokens, 12)
+        self.assertEqual(len(completion.text.split()), 12)
+        self.assertEqual(
+            provider.complete_batch(['Bio for a jazz trio', 'Bio for a rock band'], 'gpt-4o-mini')[0],
+            completion
+        )
+        
+        async def collect():
+            return [piece async for piece in provider.stream('Bio for a jazz trio', 'gpt-4o-mini')]
+        
+        pieces = asyncio.run(collect())
+        self.assertEqual(pieces[-1], completion)
+        self.assertEqual(''.join(pieces[:-1]), completion.text)
+    
+    @override_settings(AI_FAKE_PROVIDER={**FAKE_PROVIDER_SETTINGS['AI_FAKE_PROVIDER'], 'failure_rate': 1.0})
+    def test_fake_provider_failures(self):
+        """Test the fake provider fails at its configured rate"""
+        with self.assertRaises(ProviderError):
+            FakeProvider().complete('Bio for a jazz trio', 'gpt-4o-mini')
+    
+    def test_cache_key_depends_on_provider(self):
+        """Test completions of one provider are never served for another"""
+        with override_settings(AI_PROVIDER='ai_services.providers.OpenAIProvider'):
+            openai_key = response_cache_key('Bio for a jazz trio', 'gpt-4o-mini')
+        with override_settings(AI_PROVIDER='ai_services.providers.FakeProvider'):
+            fake_key = response_cache_key('Bio for a jazz trio', 'gpt-4o-mini')
+        
+        self.assertNotEqual(openai_key, fake_key)
+
+
+class TokenBucketScriptTest(TestCase):
+    """Test cases for the Redis token bucket script (skipped without a Redis cache)"""
+    
+    def setUp(self):
+        """Skip unless the default cache is Redis"""
+        try:
+            from django_redis import get_redis_connection
+            get_redis_connection('default').ping()
+        except Exception:
+            self.skipTest('The default cache is not Redis.')
+        cache.clear()
+        # Slow enough that refills during the test are negligible
+        self.bucket = Bucket('test:script:bucket', capacity=100, rate=0.001)
+        self.other = Bucket('test:script:other', capacity=100, rate=0.001)
+    
+    def test_consumes_all_or_nothing(self):
+        """Test buckets are charged together, or not at all when one is short"""
+        short, wait, levels = consume([self.bucket], 80)
+        self.assertIsNone(short)
+        self.assertAlmostEqual(levels[0], 20, places=0)
+        
+        short, wait, levels = consume([self.other, self.bucket], 50)
+        self.assertEqual(short, self.bucket)
+        self.assertAlmostEqual(wait, 30 / 0.001, delta=100)
+        self.assertAlmostEqual(levels[0], 100, places=0)
+        self.assertAlmostEqual(consume([self.other], 0)[2][0], 100, places=0)
+    
+    def test_refunds_are_capped_at_capacity(self):
+        """Test negative amounts refund tokens up to the bucket's capacity"""
+        consume([self.bucket], 80)
+        
+        self.assertAlmostEqual(consume([self.bucket], -30)[2][0], 50, places=0)
+        self.assertAlmostEqual(consume([self.bucket], -1000)[2][0], 100, places=6)
@@ -11,10 +11,14 @@ router.register(r'recommendations', views.AIRecommendationViewSet, basename='air
 router.register(r'tasks', views.AITaskViewSet, basename='aitask')
 
 urlpatterns = [
+    # Server-Sent Events stream of generated content (async view)
+    path('services/<int:pk>/stream/', views.stream_generated_content, name='stream_generated_content'),
+    
     # Include router URLs
     path('', include(router.urls)),
     
     # Additional endpoints
     path('generate-content/', views.AIContentGenerationView.as_view(), name='generate_content'),
     path('match-gigs/', views.AIGigMatchingView.as_view(), name='match_gigs'),
+    path('match-gigs/semantic/', views.SemanticGigMatchingView.as_view(), name='semantic_match_gigs'),
 ]
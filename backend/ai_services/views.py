@@ -1,16 +1,32 @@
+from asgiref.sync import sync_to_async
 from rest_framework import generics, status, permissions
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.decorators import action
 from rest_framework.viewsets import ModelViewSet
+from rest_framework_simplejwt.authentication import JWTAuthentication
 from django.shortcuts import get_object_or_404
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from django.db.models import Q
+from django.utils import timezone
+from .cache import cached_matches, invalidate_matches
+from .embeddings import musician_vector, semantic_gig_index
+from .llm import get_cached_completion
 from .models import AIService, AIRecommendation, AITask
+from .ratelimit import TokenBudget
+from .streaming import generation_events, stored_content_events
+from .tasks import (
+    backfill_musician_matches, create_generation_task, enqueue_generation, store_completion
+)
 from .serializers import (
     AIServiceSerializer, AIServiceCreateSerializer, AIRecommendationSerializer,
-    AIRecommendationUpdateSerializer, AITaskSerializer, AITaskCreateSerializer
+    AIRecommendationListSerializer, AIRecommendationUpdateSerializer,
+    AITaskSerializer, AITaskCreateSerializer
 )
 from users.models import MusicianProfile, VenueProfile
-from gigs.models import Gig, GigApplication
+from gigs.models import Gig, GigApplication, OpenGigFeed
+from gigs.serializers import GigListSerializer
 
 class AIServiceViewSet(ModelViewSet):
     """ViewSet for AI Service operations"""
@@ -42,17 +58,115 @@ class AIServiceViewSet(ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Update status to processing
-        ai_service.status = 'processing'
-        ai_service.save()
+        budget = TokenBudget.reserve(request.user.pk, ai_service.ai_model, ai_service.prompt)
+        if not budget.allowed:
+            return _budget_exceeded_response(budget)
         
-        # TODO: Trigger Celery task for AI content generation
-        # For now, we'll simulate the process
+        # Generation runs in a Celery worker; poll the task for progress
+        ai_task = enqueue_generation(ai_service, budget)
+        if ai_task is None:
+            # Another request claimed the service since it was read
+            return Response(
+                {'error': 'AI service is not in pending status.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         return Response({
             'message': 'AI content generation started.',
-            'task_id': f'task_{ai_service.id}'
-        })
+            'task_id': ai_task.id,
+            'celery_task_id': ai_task.celery_task_id
+        }, status=status.HTTP_202_ACCEPTED, headers=budget.headers())
+
+async def stream_generated_content(request, pk):
+    """Stream the generated content of a pending AI service as Server-Sent Events.
+    
+    DRF views are synchronous, so this is a plain async Django view that
+    authenticates the JWT itself. Tokens are relayed as the model writes
+    them and the final text is stored on the service. Completed services
+    replay their stored content. Serve through gig_router.asgi to stream.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    
+    user = await sync_to_async(_authenticate_jwt)(request)
+    if user is None:
+        return JsonResponse(
+            {'error': 'Authentication credentials were not provided or are invalid.'},
+            status=status.HTTP_401_UNAUTHORIZED
+        )
+    
+    ai_service = await AIService.objects.filter(pk=pk, user=user).afirst()
+    if ai_service is None:
+        return JsonResponse({'error': 'AI service not found.'}, status=status.HTTP_404_NOT_FOUND)
+    
+    budget = None
+    if ai_service.status == 'completed':
+        events = stored_content_events(ai_service)
+    elif ai_service.status != 'pending':
+        return _not_pending_response()
+    else:
+        budget = await sync_to_async(TokenBudget.reserve)(user.pk, ai_service.ai_model, ai_service.prompt)
+        if not budget.model_reserved:
+            # A stream cannot wait in the queue for the shared budget to refill
+            if budget.allowed:
+                await sync_to_async(budget.release)()
+                budget.allowed, budget.retry_after = False, budget.model_wait
+            response = JsonResponse(
+                {'error': 'AI token budget exceeded. Try again later.'},
+                status=status.HTTP_429_TOO_MANY_REQUESTS
+            )
+            for header, value in budget.headers().items():
+                response[header] = value
+            return response
+        
+        # Claim the service so a concurrent request cannot generate it too
+        claimed = await AIService.objects.filter(pk=pk, status='pending').aupdate(status='processing')
+        if not claimed:
+            await sync_to_async(budget.release)()
+            return _not_pending_response()
+        ai_service.status = 'processing'
+        ai_task = await sync_to_async(create_generation_task)(
+            ai_service, status='running', started_at=timezone.now()
+        )
+        
+        cached = await sync_to_async(get_cached_completion)(ai_service.prompt, ai_service.ai_model)
+        if cached is not None:
+            await sync_to_async(budget.release)()
+            await sync_to_async(store_completion)(ai_task, ai_service, cached, cache_hit=True)
+            events = stored_content_events(ai_service)
+        else:
+            events = generation_events(ai_task, ai_service, budget)
+    
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    if budget is not None:
+        for header, value in budget.headers().items():
+            response[header] = value
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+def _not_pending_response():
+    return JsonResponse(
+        {'error': 'AI service is not in pending status.'},
+        status=status.HTTP_409_CONFLICT
+    )
+
+def _budget_exceeded_response(budget):
+    """429 response for a request over its LLM token budget"""
+    return Response(
+        {'error': 'AI token budget exceeded. Try again later.'},
+        status=status.HTTP_429_TOO_MANY_REQUESTS,
+        headers=budget.headers()
+    )
+
+def _authenticate_jwt(request):
+    """The user of the request's JWT bearer token, or None"""
+    try:
+        authenticated = JWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return authenticated[0] if authenticated else None
 
 class AIRecommendationViewSet(ModelViewSet):
     """ViewSet for AI Recommendation operations"""
@@ -63,11 +177,24 @@ class AIRecommendationViewSet(ModelViewSet):
         """Return appropriate serializer based on action"""
         if self.action in ['update', 'partial_update']:
             return AIRecommendationUpdateSerializer
+        if self.action == 'list':
+            return AIRecommendationListSerializer
         return AIRecommendationSerializer
     
     def get_queryset(self):
         """Filter recommendations by user"""
-        return AIRecommendation.objects.filter(user=self.request.user)
+        queryset = AIRecommendation.objects.filter(
+            user=self.request.user
+        ).for_serializer()
+        
+        if self.action == 'list':
+            queryset = AIRecommendationListSerializer.restrict_queryset(queryset, self.request)
+        return queryset
+    
+    def perform_destroy(self, instance):
+        """Delete a recommendation and drop the user's cached matches"""
+        instance.delete()
+        invalidate_matches([instance.user_id])
     
     @action(detail=True, methods=['post'])
     def mark_viewed(self, request, pk=None):
@@ -175,14 +302,22 @@ class AIContentGenerationView(APIView):
         )
         
         if serializer.is_valid():
+            model = serializer.validated_data.get(
+                'ai_model', AIService._meta.get_field('ai_model').get_default()
+            )
+            budget = TokenBudget.reserve(request.user.pk, model, ai_service_data['prompt'])
+            if not budget.allowed:
+                return _budget_exceeded_response(budget)
+            
             ai_service = serializer.save(user=request.user)
             
-            # TODO: Trigger Celery task for actual AI generation
-            # For now, return the created service
+            # Generation runs in a Celery worker; poll the task for progress
+            ai_task = enqueue_generation(ai_service, budget)
             
             return Response(
-                AIServiceSerializer(ai_service).data,
-                status=status.HTTP_201_CREATED
+                {**AIServiceSerializer(ai_service).data, 'task': AITaskSerializer(ai_task).data},
+                status=status.HTTP_201_CREATED,
+                headers=budget.headers()
             )
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -222,92 +357,87 @@ class AIGigMatchingView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Get matching gigs based on musician profile
-        matching_gigs = self._find_matching_gigs(musician_profile)
-        
-        # Create recommendations
-        recommendations = []
-        for gig in matching_gigs:
-            recommendation = AIRecommendation.objects.create(
-                user=request.user,
-                recommendation_type='gig_match',
-                title=f"Perfect Match: {gig.title}",
-                description=f"This gig at {gig.venue.venue_name} matches your profile perfectly!",
-                confidence_score=self._calculate_match_score(musician_profile, gig),
-                reasoning=self._generate_match_reasoning(musician_profile, gig),
-                recommended_gig=gig
-            )
-            recommendations.append(recommendation)
+        return Response(cached_matches(
+            request.user.pk, lambda: self._matches_data(request.user, musician_profile)
+        ))
+    
+    def _matches_data(self, user, musician_profile):
+        """Response data with the user's best gig matches"""
+        # Matches are precomputed in the background (ai_services.tasks) when
+        # the profile or a gig changes. They are only computed here while
+        # the profile's backfill has not completed yet.
+        precomputed = musician_profile.matches_computed_at is not None
+        if not precomputed:
+            backfill_musician_matches(musician_profile.pk)
+            musician_profile.refresh_from_db(fields=['matches_computed_at'])
+        recommendations = list(self._stored_matches(user))
         
         serializer = AIRecommendationSerializer(recommendations, many=True)
-        return Response(serializer.data)
+        return {
+            'results': list(serializer.data),
+            'computed_at': musician_profile.matches_computed_at,
+            'precomputed': precomputed
+        }
     
-    def _find_matching_gigs(self, musician_profile):
-        """Find gigs that match musician profile"""
-        from django.db.models import Q
-        
-        # Basic matching criteria
-        queryset = Gig.objects.filter(status='open')
-        
-        # Match genres
-        if musician_profile.genres:
-            queryset = queryset.filter(genres__overlap=musician_profile.genres)
-        
-        # Match instruments
-        if musician_profile.instruments:
-            queryset = queryset.filter(instruments_needed__overlap=musician_profile.instruments)
-        
-        # Match experience level
-        queryset = queryset.filter(experience_level__lte=musician_profile.experience_years)
-        
-        # Match location (within travel distance)
-        if musician_profile.user.city:
-            # TODO: Implement location-based matching
-            pass
-        
-        return queryset[:10]  # Return top 10 matches
+    def _stored_matches(self, user, limit=10):
+        """The user's best stored matches with gigs still open for applications"""
+        return AIRecommendation.objects.filter(
+            user=user,
+            recommendation_type='gig_match',
+            recommended_gig__status='open'
+        ).filter(
+            Q(recommended_gig__deadline__isnull=True) |
+            Q(recommended_gig__deadline__gt=timezone.now())
+        ).for_serializer()[:limit]
+
+
+class SemanticGigMatchingView(APIView):
+    """Open gigs whose text is most similar to the musician's bio and setlist"""
     
-    def _calculate_match_score(self, musician_profile, gig):
-        """Calculate match score between musician and gig"""
-        score = 0.0
-        
-        # Genre match
-        if musician_profile.genres and gig.genres:
-            genre_matches = len(set(musician_profile.genres) & set(gig.genres))
-            score += (genre_matches / len(gig.genres)) * 0.4
-        
-        # Instrument match
-        if musician_profile.instruments and gig.instruments_needed:
-            instrument_matches = len(set(musician_profile.instruments) & set(gig.instruments_needed))
-            score += (instrument_matches / len(gig.instruments_needed)) * 0.3
-        
-        # Experience match
-        if musician_profile.experience_years >= 5:
-            score += 0.2
-        elif musician_profile.experience_years >= 2:
-            score += 0.1
-        
-        # Original music preference
-        if musician_profile.original_music == gig.original_music_required:
-            score += 0.1
-        
-        return min(score, 1.0)
+    permission_classes = [permissions.IsAuthenticated]
+    default_limit = 10
+    max_limit = 50
     
-    def _generate_match_reasoning(self, musician_profile, gig):
-        """Generate reasoning for match"""
-        reasons = []
-        
-        if musician_profile.genres and gig.genres:
-            common_genres = set(musician_profile.genres) & set(gig.genres)
-            if common_genres:
-                reasons.append(f"Genre match: {', '.join(common_genres)}")
+    def get(self, request):
+        """Return the top-k semantically similar open gigs"""
+        try:
+            musician_profile = MusicianProfile.objects.select_related('user').get(user=request.user)
+        except MusicianProfile.DoesNotExist:
+            return Response(
+                {'error': 'Musician profile not found.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        if musician_profile.instruments and gig.instruments_needed:
-            common_instruments = set(musician_profile.instruments) & set(gig.instruments_needed)
-            if common_instruments:
-                reasons.append(f"Instrument match: {', '.join(common_instruments)}")
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            return Response(
+                {'error': 'limit must be an integer.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = min(max(limit, 1), self.max_limit)
         
-        if musician_profile.experience_years >= gig.band_size_min:
-            reasons.append(f"Experience level suitable ({musician_profile.experience_years} years)")
+        # Ask for spare neighbours: some may be past their deadline
+        gig_ids, similarities = semantic_gig_index.query(
+            musician_vector(musician_profile), k=limit * 2
+        )
+        applicable = set(
+            OpenGigFeed.objects.applicable()
+            .filter(pk__in=gig_ids.tolist()).values_list('pk', flat=True)
+        )
+        matches = [
+            (gig_id, similarity)
+            for gig_id, similarity in zip(gig_ids.tolist(), similarities.tolist())
+            if gig_id in applicable
+        ][:limit]
         
-        return "; ".join(reasons) if reasons else "Good general match"
+        gigs = Gig.objects.for_serializer().in_bulk([gig_id for gig_id, _ in matches])
+        return Response({
+            'results': [
+                {
+                    'gig': GigListSerializer(gigs[gig_id], context={'request': request}).data,
+                    'similarity': round(similarity, 4)
+                }
+                for gig_id, similarity in matches if gig_id in gigs
+            ]
+        })
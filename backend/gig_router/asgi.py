@@ -3,6 +3,16 @@ ASGI config for gig_router project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The production image serves every request from here (see the Dockerfile),
+since streaming endpoints (AI content over Server-Sent Events) only stream
+under ASGI:
+
+    gunicorn gig_router.asgi:application -k uvicorn.workers.UvicornWorker
+
+Sync views (all of DRF) then run in a thread via sync_to_async, one at a
+time per worker process like a sync worker; scale with gunicorn workers
+(WEB_CONCURRENCY).
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
@@ -0,0 +1,45 @@
+import hashlib
+import json
+
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def make_etag(*parts):
+    """Build a weak ETag from JSON-serializable version data"""
+    digest = hashlib.sha1(json.dumps(parts, default=str).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(request, etag):
+    """Whether the request's If-None-Match header matches `etag` (weak comparison)"""
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    if etags == ['*']:
+        return True
+    return etag.removeprefix('W/') in {tag.removeprefix('W/') for tag in etags}
+
+
+def conditional_response(request, version, build):
+    """
+    Answer a GET with 304 Not Modified when the client already has `version`.
+
+    `version` is cheap data (timestamps, counts) that changes whenever the
+    rendered representation does. `build` is only called when the client's
+    copy is stale, so nothing is loaded or serialized for a 304.
+    """
+    etag = make_etag(request.accepted_media_type, version)
+    if etag_matches(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = build()
+
+    if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+        response['ETag'] = etag
+        # Responses are per user; make clients revalidate instead of reusing them
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,89 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+
+
+def count_queryset(queryset, version=None):
+    """
+    Count the rows of `queryset` without running COUNT(*) on every request.
+
+    Exact counts are cached per normalized query for ``COUNT_CACHE_TTL``
+    seconds. When the planner estimates more than
+    ``COUNT_ESTIMATE_THRESHOLD`` rows the estimate is used instead of an
+    exact count. `version` is passed on to the cache so callers can retire
+    cached counts early. Returns a ``(count, is_estimate)`` tuple.
+    """
+    queryset = queryset.order_by()
+    cache_key = _count_cache_key(queryset)
+    cached = cache.get(cache_key, version=version)
+    if cached is not None:
+        return tuple(cached)
+
+    estimate = _planner_estimate(queryset)
+    if estimate is not None and estimate >= settings.COUNT_ESTIMATE_THRESHOLD:
+        result = (estimate, True)
+    else:
+        result = (queryset.count(), False)
+
+    cache.set(cache_key, result, settings.COUNT_CACHE_TTL, version=version)
+    return result
+
+
+def _count_cache_key(queryset):
+    """Build a cache key from the compiled SQL and parameters of `queryset`"""
+    sql, params = queryset.query.sql_with_params()
+    digest = hashlib.sha256(
+        json.dumps([sql, params], default=str).encode()
+    ).hexdigest()
+    return f'count:{queryset.model._meta.label_lower}:{digest}'
+
+
+def _planner_estimate(queryset):
+    """Return the planner's row estimate for `queryset` (PostgreSQL only)"""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator whose total count goes through count_queryset()"""
+
+    count_is_estimate = False
+
+    @cached_property
+    def count(self):
+        """Return the cached or estimated number of objects"""
+        if not hasattr(self.object_list, 'query'):
+            return super().count
+        count, self.count_is_estimate = count_queryset(self.object_list)
+        return count
+
+
+class CachedCountPageNumberPagination(PageNumberPagination):
+    """PageNumberPagination with cached and estimated totals"""
+
+    django_paginator_class = CachedCountPaginator
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data['count_is_estimate'] = self.page.paginator.count_is_estimate
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema['properties']['count_is_estimate'] = {'type': 'boolean'}
+        return schema
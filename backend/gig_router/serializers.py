@@ -0,0 +1,96 @@
+def parse_field_list(value):
+    """Split a comma separated query param into a list of names"""
+    if not value:
+        return []
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def model_columns(model, prefix=''):
+    """Every concrete field of `model` as a QuerySet.only() path"""
+    return tuple(f'{prefix}{field.name}' for field in model._meta.concrete_fields)
+
+
+class DynamicFieldsMixin:
+    """
+    ModelSerializer mixin implementing the ``?fields=`` / ``?expand=`` contract.
+
+    ``?fields=id,title`` renders only the named fields. Relations listed in
+    ``Meta.expandable_fields`` are left out unless named in ``?expand=``,
+    in which case they are rendered with their full nested serializer.
+
+    ``restrict_queryset()`` applies the same selection to the database
+    query: only the columns behind the selected fields are fetched, using
+    ``Meta.field_sources`` for fields that do not map to a model column.
+    """
+
+    fields_param = 'fields'
+    expand_param = 'expand'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        request = self.context.get('request')
+        selected, expanded = self.get_selection(request)
+
+        for name in expanded:
+            serializer_class, _ = self.Meta.expandable_fields[name]
+            self.fields[name] = serializer_class(read_only=True)
+        for name in set(self.fields) - selected - expanded:
+            self.fields.pop(name)
+
+    @classmethod
+    def get_selection(cls, request):
+        """Return the ``(fields, expanded relations)`` requested by `request`"""
+        default = set(cls.Meta.fields)
+        if request is None:
+            return default, set()
+
+        expandable = getattr(cls.Meta, 'expandable_fields', {})
+        expanded = set(parse_field_list(request.query_params.get(cls.expand_param)))
+        requested = set(parse_field_list(request.query_params.get(cls.fields_param)))
+
+        selected = (requested & default) or default
+        return selected | {'id'}, expanded & set(expandable)
+
+    @classmethod
+    def restrict_queryset(cls, queryset, request, required=()):
+        """
+        Limit `queryset` to the columns the requested fields read.
+
+        `required` names extra model fields to keep loaded, e.g. the
+        fields a view orders or paginates on.
+        """
+        selected, expanded = cls.get_selection(request)
+        model = cls.Meta.model
+        field_sources = getattr(cls.Meta, 'field_sources', {})
+        concrete = {field.name for field in model._meta.concrete_fields}
+
+        paths = {model._meta.pk.name} | (set(required) & concrete)
+        for name in selected:
+            if name in field_sources:
+                paths.update(field_sources[name])
+            elif name in concrete:
+                paths.add(name)
+        for name in expanded:
+            _, sources = cls.Meta.expandable_fields[name]
+            paths.update(sources)
+
+        relations = set()
+        for path in paths:
+            relations.update(_traversed_relations(model, path))
+
+        queryset = queryset.select_related(None)
+        if relations:
+            queryset = queryset.select_related(*relations)
+        return queryset.only(*paths)
+
+
+def _traversed_relations(model, path):
+    """select_related() paths needed to reach the end of `path`"""
+    parts = path.split('__')
+    relations = []
+    for index, part in enumerate(parts[:-1]):
+        field = model._meta.get_field(part)
+        relations.append('__'.join(parts[:index + 1]))
+        model = field.related_model
+    return relations
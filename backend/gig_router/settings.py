@@ -25,6 +25,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.sites',
+    'django.contrib.postgres',
     
     # Third party apps
     'rest_framework',
@@ -154,10 +155,20 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'gig_router.pagination.CachedCountPageNumberPagination',
     'PAGE_SIZE': 20,
 }
 
+# Result counts (see gig_router.pagination.count_queryset)
+COUNT_CACHE_TTL = config('COUNT_CACHE_TTL', default=30, cast=int)  # seconds
+COUNT_ESTIMATE_THRESHOLD = config('COUNT_ESTIMATE_THRESHOLD', default=10000, cast=int)
+
+# Shared gig search/listing responses (see gigs.cache); saving a gig invalidates them
+GIG_RESPONSE_CACHE_TTL = config('GIG_RESPONSE_CACHE_TTL', default=60, cast=int)  # seconds
+
+# Per-musician gig match results (see ai_services.cache); bounds staleness from passing deadlines
+MATCH_CACHE_TTL = config('MATCH_CACHE_TTL', default=300, cast=int)  # seconds
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -275,8 +286,50 @@ ACCOUNT_UNIQUE_EMAIL = True
 # Email settings (for development)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
+# Language model backend (see ai_services.providers); set to
+# ai_services.providers.FakeProvider to run and load test offline
+AI_PROVIDER = config('AI_PROVIDER', default='ai_services.providers.OpenAIProvider')
+AI_DEFAULT_MODEL = config('AI_DEFAULT_MODEL', default='gpt-3.5-turbo')
+
+# Simulated model of FakeProvider
+AI_FAKE_PROVIDER = {
+    'latency_ms': config('AI_FAKE_LATENCY_MS', default=400, cast=int),  # to first token
+    'jitter_ms': config('AI_FAKE_JITTER_MS', default=150, cast=int),
+    'tokens_per_second': config('AI_FAKE_TOKENS_PER_SECOND', default=60, cast=float),
+    'completion_tokens': config('AI_FAKE_COMPLETION_TOKENS', default=150, cast=int),
+    'failure_rate': config('AI_FAKE_FAILURE_RATE', default=0.0, cast=float),
+}
+
 # OpenAI API Key
 OPENAI_API_KEY = config('OPENAI_API_KEY', default='')
+AI_REQUEST_TIMEOUT = config('AI_REQUEST_TIMEOUT', default=60, cast=int)  # seconds
+AI_MAX_COMPLETION_TOKENS = config('AI_MAX_COMPLETION_TOKENS', default=800, cast=int)
+
+# Micro-batching of short prompts (see ai_services.dispatch); a max size below 2 disables it.
+# Batches only form in a threads or gevent Celery pool; prefork and solo workers skip it
+AI_BATCH_WINDOW_MS = config('AI_BATCH_WINDOW_MS', default=50, cast=int)
+AI_BATCH_MAX_SIZE = config('AI_BATCH_MAX_SIZE', default=8, cast=int)
+AI_BATCH_MAX_PROMPT_CHARS = config('AI_BATCH_MAX_PROMPT_CHARS', default=600, cast=int)
+
+# LLM token budgets (see ai_services.ratelimit): token buckets per user and
+# per model, refilled at the per-minute rate up to the burst size
+AI_USER_TOKENS_PER_MINUTE = config('AI_USER_TOKENS_PER_MINUTE', default=4000, cast=int)
+AI_USER_TOKEN_BURST = config('AI_USER_TOKEN_BURST', default=12000, cast=int)
+AI_MODEL_TOKENS_PER_MINUTE = config('AI_MODEL_TOKENS_PER_MINUTE', default=90000, cast=int)
+AI_MODEL_TOKEN_BURST = config('AI_MODEL_TOKEN_BURST', default=90000, cast=int)
+
+# Seconds identical generation requests reuse a cached completion, per
+# AIService content type (see ai_services.llm); 0 disables caching
+AI_RESPONSE_CACHE_TTLS = {
+    'default': config('AI_RESPONSE_CACHE_TTL', default=86400, cast=int),
+    'musician_bio': 7 * 86400,
+    'venue_description': 7 * 86400,
+    'setlist': 3 * 86400,
+    'gig_description': 86400,
+    'marketing_copy': 86400,
+    'cover_letter': 86400,
+    'proposal': 86400,
+}
 
 # Spectacular settings
 SPECTACULAR_SETTINGS = {
@@ -5,3 +5,6 @@ class GigsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'gigs'
     verbose_name = 'Gigs and Applications'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,66 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+GIG_GENERATION_KEY = 'gigs:generation'
+
+
+def _initial_generation():
+    # Time based, so a counter lost to eviction never restarts at a value
+    # that cached entries or in-process indexes were built for
+    return time.time_ns()
+
+
+def get_gig_generation():
+    """Return the current gig cache generation"""
+    generation = cache.get(GIG_GENERATION_KEY)
+    if generation is None:
+        initial = _initial_generation()
+        cache.add(GIG_GENERATION_KEY, initial, timeout=None)
+        generation = cache.get(GIG_GENERATION_KEY, initial)
+    return generation
+
+
+def bump_gig_generation():
+    """Invalidate every cached gig response by moving to a new generation"""
+    try:
+        return cache.incr(GIG_GENERATION_KEY)
+    except ValueError:
+        # Key missing (evicted or never set): a fresh value retires old entries
+        cache.add(GIG_GENERATION_KEY, _initial_generation(), timeout=None)
+        return cache.incr(GIG_GENERATION_KEY)
+
+
+def normalize_query_params(query_params):
+    """Canonical, order-independent representation of a QueryDict"""
+    normalized = {}
+    for key in sorted(query_params):
+        values = sorted(value.strip() for value in query_params.getlist(key))
+        values = [value for value in values if value]
+        if values:
+            normalized[key] = values
+    return normalized
+
+
+def cached_gig_response(prefix, request, build):
+    """
+    Return response data for `request` from the gig response cache.
+
+    `build` is called on a miss. Entries are keyed on the current gig
+    generation plus the normalized query params, so saving any gig
+    retires them all at once.
+    """
+    params = json.dumps(
+        [request.get_host(), request.path, normalize_query_params(request.query_params)]
+    )
+    digest = hashlib.sha256(params.encode()).hexdigest()
+    cache_key = f'gigs:response:{prefix}:{get_gig_generation()}:{digest}'
+
+    data = cache.get(cache_key)
+    if data is None:
+        data = build()
+        cache.set(cache_key, data, settings.GIG_RESPONSE_CACHE_TTL)
+    return data
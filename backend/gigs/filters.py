@@ -0,0 +1,33 @@
+from django.db import connection
+from rest_framework import filters
+
+
+class GigSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter with a PostgreSQL full-text mode.
+    
+    ``?search_mode=fulltext`` matches ``?search=`` against the stored
+    ``Gig.search_vector`` (GIN indexed) instead of ``icontains`` scans over
+    ``search_fields``, and annotates each gig with ``search_rank``.
+    """
+    
+    search_mode_param = 'search_mode'
+    fulltext_mode = 'fulltext'
+    
+    def filter_queryset(self, request, queryset, view):
+        terms = request.query_params.get(self.search_param, '').strip()
+        mode = request.query_params.get(self.search_mode_param)
+        
+        if terms and mode == self.fulltext_mode and connection.vendor == 'postgresql':
+            return queryset.search(terms)
+        return super().filter_queryset(request, queryset, view)
+
+
+class GigOrderingFilter(filters.OrderingFilter):
+    """OrderingFilter that ranks full-text results by relevance by default"""
+    
+    def filter_queryset(self, request, queryset, view):
+        ranked = 'search_rank' in queryset.query.annotations
+        if ranked and not request.query_params.get(self.ordering_param):
+            return queryset.order_by('-search_rank', '-id')
+        return super().filter_queryset(request, queryset, view)
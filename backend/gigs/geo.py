@@ -0,0 +1,79 @@
+import math
+
+import numpy as np
+from django.db.models import Q
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE_LATITUDE = 69.0
+
+
+def parse_point(value):
+    """Parse a ``"lat,lng"`` string into a ``(lat, lng)`` tuple of floats"""
+    try:
+        lat, lng = (float(part) for part in value.split(','))
+    except (AttributeError, ValueError):
+        raise ValueError('Expected "lat,lng".')
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError('Coordinates out of range.')
+    return lat, lng
+
+
+def bounding_box_q(lat, lng, radius, lat_field='latitude', lng_field='longitude'):
+    """
+    A Q matching rows inside the box enclosing a `radius` mile circle.
+
+    The box is a cheap, indexable superset of the circle; rows in it still
+    need an exact distance check.
+    """
+    lat_delta = radius / MILES_PER_DEGREE_LATITUDE
+    min_lat, max_lat = lat - lat_delta, lat + lat_delta
+    q = Q(**{f'{lat_field}__gte': max(min_lat, -90), f'{lat_field}__lte': min(max_lat, 90)})
+
+    # The circle covers a pole: every longitude is in range
+    if min_lat <= -90 or max_lat >= 90:
+        return q
+
+    lng_delta = lat_delta / max(math.cos(math.radians(max(abs(min_lat), abs(max_lat)))), 1e-6)
+    if lng_delta >= 180:
+        return q
+    min_lng, max_lng = lng - lng_delta, lng + lng_delta
+    if min_lng < -180:
+        # Box wraps across the antimeridian
+        return q & (Q(**{f'{lng_field}__gte': min_lng + 360}) | Q(**{f'{lng_field}__lte': max_lng}))
+    if max_lng > 180:
+        return q & (Q(**{f'{lng_field}__gte': min_lng}) | Q(**{f'{lng_field}__lte': max_lng - 360}))
+    return q & Q(**{f'{lng_field}__gte': min_lng, f'{lng_field}__lte': max_lng})
+
+
+def haversine_miles(lat, lng, lats, lngs):
+    """Great-circle distances in miles from one point to arrays of points"""
+    lat1, lng1 = np.radians(lat), np.radians(lng)
+    lat2 = np.radians(np.asarray(lats, dtype=float))
+    lng2 = np.radians(np.asarray(lngs, dtype=float))
+
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2 +
+        np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def distances_within(queryset, lat, lng, radius, lat_field='latitude', lng_field='longitude'):
+    """
+    Return ``{pk: distance}`` for the rows of `queryset` within `radius` miles.
+
+    Candidates are pruned in the database with a bounding box, then only
+    their coordinates are fetched and measured in one vectorized pass.
+    """
+    rows = list(
+        queryset.filter(bounding_box_q(lat, lng, radius, lat_field, lng_field))
+        .order_by()
+        .values_list('pk', lat_field, lng_field)
+    )
+    if not rows:
+        return {}
+
+    pks, lats, lngs = zip(*rows)
+    distances = haversine_miles(lat, lng, lats, lngs)
+    inside = distances <= radius
+    return dict(zip(np.asarray(pks)[inside].tolist(), distances[inside].tolist()))
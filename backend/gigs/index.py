@@ -0,0 +1,245 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+
+import numpy as np
+from django.core.cache import cache
+
+EMPTY_IDS = np.array([], dtype=np.int64)
+
+# Change log shared by the indexes of every process: a sequence number
+# plus one entry per sequence value holding the changed gig ids
+INDEX_SEQUENCE_KEY = 'gigs:index:sequence'
+CHANGE_LOG_TTL = 60 * 60
+# Pending changes beyond which a full rebuild is cheaper than patching
+MAX_CATCH_UP = 500
+# Seconds to wait for a missing log entry (written just after its
+# sequence number is taken, or evicted) before rebuilding instead
+CHANGE_LOG_GRACE = 5
+
+
+def _change_key(sequence):
+    return f'gigs:index:change:{sequence}'
+
+
+def _initial_sequence():
+    # Time based, so a lost counter never restarts below a value an index
+    # has already applied (see gigs.cache). Microseconds rather than
+    # nanoseconds: django-redis increments through a Lua script, whose
+    # numbers are doubles, so the values must stay below 2 ** 53.
+    return time.time_ns() // 1000
+
+
+def get_change_sequence():
+    """Return the sequence number of the latest logged gig change"""
+    sequence = cache.get(INDEX_SEQUENCE_KEY)
+    if sequence is None:
+        initial = _initial_sequence()
+        cache.add(INDEX_SEQUENCE_KEY, initial, timeout=None)
+        sequence = cache.get(INDEX_SEQUENCE_KEY, initial)
+    return sequence
+
+
+def record_gig_changes(gig_ids):
+    """Log gigs that were saved or deleted, for every process's index to patch in"""
+    try:
+        sequence = cache.incr(INDEX_SEQUENCE_KEY)
+    except ValueError:
+        cache.add(INDEX_SEQUENCE_KEY, _initial_sequence(), timeout=None)
+        sequence = cache.incr(INDEX_SEQUENCE_KEY)
+    cache.set(_change_key(sequence), list(gig_ids), CHANGE_LOG_TTL)
+
+
+class GigChangeFollower(ABC):
+    """
+    Base of per-process in-memory gig indexes kept fresh from the change log.
+
+    The index is built once (``_build``), then each ``refresh`` patches in
+    only the gigs logged by ``record_gig_changes`` since the last one
+    (``_patch``). It is rebuilt only when the log cannot be followed
+    (lagging too far, or an entry missing for longer than
+    ``CHANGE_LOG_GRACE``). Snapshots are replaced as a whole, so readers
+    never see a partial update.
+    """
+
+    empty_snapshot = ()
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sequence = None  # last change log entry applied
+        self._stalled_since = None
+        self._snapshot = self.empty_snapshot
+
+    def refresh(self, force=False):
+        """Apply logged gig changes, rebuilding the index if they cannot be followed"""
+        sequence = get_change_sequence()
+        if not force and sequence == self._sequence:
+            return
+        with self._lock:
+            if force or self._sequence is None or sequence - self._sequence > MAX_CATCH_UP:
+                self._rebuild(sequence)
+            elif sequence > self._sequence:
+                # (Another thread may have caught up past `sequence` meanwhile)
+                self._catch_up(sequence)
+
+    def _rebuild(self, sequence):
+        # Swap in a complete snapshot so readers never see a partial build.
+        # Changes logged while building are patched in again later, which
+        # is harmless.
+        self._snapshot = self._build()
+        self._sequence = sequence
+        self._stalled_since = None
+
+    def _catch_up(self, sequence):
+        """Patch in the changes logged after the last applied one, up to `sequence`"""
+        numbers = range(self._sequence + 1, sequence + 1)
+        entries = cache.get_many([_change_key(number) for number in numbers])
+        gig_ids, applied = set(), self._sequence
+        for number in numbers:
+            changed = entries.get(_change_key(number))
+            if changed is None:
+                break
+            gig_ids.update(changed)
+            applied = number
+
+        if applied == sequence:
+            self._stalled_since = None
+        elif self._stalled_since is None:
+            self._stalled_since = time.monotonic()
+        elif time.monotonic() - self._stalled_since > CHANGE_LOG_GRACE:
+            return self._rebuild(sequence)
+
+        if gig_ids:
+            self._snapshot = self._patch(self._snapshot, gig_ids)
+        self._sequence = applied
+
+    @abstractmethod
+    def _build(self):
+        """Return a snapshot of every open gig"""
+
+    @abstractmethod
+    def _patch(self, snapshot, gig_ids):
+        """Return a copy of `snapshot` with `gig_ids` re-read (added, updated or removed)"""
+
+
+class OpenGigIndex(GigChangeFollower):
+    """
+    Per-process inverted index of open gigs by genre and instrument.
+
+    Each tag maps to a sorted array of gig ids, so "open gigs playing any
+    of these genres and needing any of these instruments" is a union and
+    an intersection of sorted arrays in memory. Changed gigs are patched
+    in from their open gig feed entries.
+    """
+
+    # (all ids, genre index, instrument index, tags per gig)
+    empty_snapshot = (EMPTY_IDS, {}, {}, {})
+
+    def candidates(self, genres=(), instruments=()):
+        """
+        Sorted ids of open gigs matching any of `genres` and any of `instruments`.
+
+        An empty tag list does not restrict that facet.
+        """
+        self.refresh()
+        all_ids, genre_index, instrument_index, _ = self._snapshot
+
+        ids = None
+        for index, tags in ((genre_index, genres), (instrument_index, instruments)):
+            if not tags:
+                continue
+            matched = self._union(index, tags)
+            ids = matched if ids is None else np.intersect1d(ids, matched, assume_unique=True)
+        return all_ids if ids is None else ids
+
+    def filter_queryset(self, queryset, genres=(), instruments=(), max_ids=1000):
+        """
+        Restrict `queryset` (of gigs or feed entries) to the index candidates.
+
+        Past `max_ids` candidates an ``IN`` list stops paying off, so the
+        array overlap filters are applied in SQL instead.
+        """
+        if not genres and not instruments:
+            return queryset
+        ids = self.candidates(genres, instruments)
+        if len(ids) > max_ids:
+            if genres:
+                queryset = queryset.filter(genres__overlap=list(genres))
+            if instruments:
+                queryset = queryset.filter(instruments_needed__overlap=list(instruments))
+            return queryset
+        return queryset.filter(pk__in=ids.tolist())
+
+    def _build(self):
+        from .models import OpenGigFeed
+
+        all_ids, genres, instruments, tags = [], defaultdict(list), defaultdict(list), {}
+        rows = OpenGigFeed.objects.values_list('gig_id', 'genres', 'instruments_needed')
+        for gig_id, gig_genres, gig_instruments in rows.iterator(chunk_size=2000):
+            all_ids.append(gig_id)
+            tags[gig_id] = (frozenset(gig_genres), frozenset(gig_instruments))
+            for tag in tags[gig_id][0]:
+                genres[tag].append(gig_id)
+            for tag in tags[gig_id][1]:
+                instruments[tag].append(gig_id)
+        all_ids = np.unique(np.array(all_ids, dtype=np.int64))
+        return all_ids, self._freeze(genres), self._freeze(instruments), tags
+
+    def _patch(self, snapshot, gig_ids):
+        """A copy of `snapshot` with the entries of `gig_ids` re-read from the feed"""
+        from .models import OpenGigFeed
+
+        all_ids, genre_index, instrument_index, tags = snapshot
+        rows = OpenGigFeed.objects.filter(gig_id__in=gig_ids).values_list(
+            'gig_id', 'genres', 'instruments_needed'
+        )
+        current = {
+            gig_id: (frozenset(gig_genres), frozenset(gig_instruments))
+            for gig_id, gig_genres, gig_instruments in rows
+        }
+
+        # Only the tags of changed gigs (before or after) need new id arrays
+        tags = dict(tags)
+        affected = (set(), set())
+        for gig_id in gig_ids:
+            for gig_tags in (tags.pop(gig_id, None), current.get(gig_id)):
+                if gig_tags is not None:
+                    affected[0].update(gig_tags[0])
+                    affected[1].update(gig_tags[1])
+        tags.update(current)
+
+        changed = np.array(sorted(gig_ids), dtype=np.int64)
+        indexes = []
+        for facet, index in enumerate((genre_index, instrument_index)):
+            index = dict(index)
+            for tag in affected[facet]:
+                added = np.array(
+                    [gig_id for gig_id, gig_tags in current.items() if tag in gig_tags[facet]],
+                    dtype=np.int64
+                )
+                ids = np.union1d(np.setdiff1d(index.get(tag, EMPTY_IDS), changed), added)
+                if len(ids):
+                    index[tag] = ids
+                else:
+                    index.pop(tag, None)
+            indexes.append(index)
+
+        all_ids = np.union1d(
+            np.setdiff1d(all_ids, changed), np.array(list(current), dtype=np.int64)
+        )
+        return (all_ids, *indexes, tags)
+
+    @staticmethod
+    def _freeze(index):
+        return {tag: np.unique(np.array(ids, dtype=np.int64)) for tag, ids in index.items()}
+
+    @staticmethod
+    def _union(index, tags):
+        arrays = [index[tag] for tag in set(tags) if tag in index]
+        if not arrays:
+            return EMPTY_IDS
+        return np.unique(np.concatenate(arrays))
+
+
+open_gig_index = OpenGigIndex()
@@ -0,0 +1,40 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def populate_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Gig = apps.get_model('gigs', 'Gig')
+    VenueProfile = apps.get_model('users', 'VenueProfile')
+    venue_name = Subquery(
+        VenueProfile.objects.filter(pk=OuterRef('venue_id')).values('venue_name')[:1]
+    )
+    Gig.objects.update(search_vector=(
+        SearchVector('title', weight='A', config='english') +
+        SearchVector(venue_name, weight='A', config='english') +
+        SearchVector('description', weight='B', config='english')
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gigs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gig',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='gig',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='gig_search_vector_gin'),
+        ),
+        migrations.RunPython(populate_search_vector, migrations.RunPython.noop),
+    ]
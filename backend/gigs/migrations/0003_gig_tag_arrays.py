@@ -0,0 +1,82 @@
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+def json_to_array(value):
+    if not isinstance(value, list):
+        return []
+    return [str(item) for item in value if item not in (None, '')]
+
+
+def copy_tags_to_arrays(apps, schema_editor):
+    Gig = apps.get_model('gigs', 'Gig')
+    batch = []
+    for gig in Gig.objects.only('genres', 'instruments_needed').iterator(chunk_size=1000):
+        gig.genres_array = json_to_array(gig.genres)
+        gig.instruments_needed_array = json_to_array(gig.instruments_needed)
+        batch.append(gig)
+        if len(batch) >= 1000:
+            Gig.objects.bulk_update(batch, ['genres_array', 'instruments_needed_array'])
+            batch = []
+    Gig.objects.bulk_update(batch, ['genres_array', 'instruments_needed_array'])
+
+
+def copy_arrays_to_tags(apps, schema_editor):
+    Gig = apps.get_model('gigs', 'Gig')
+    batch = []
+    for gig in Gig.objects.only('genres_array', 'instruments_needed_array').iterator(chunk_size=1000):
+        gig.genres = list(gig.genres_array)
+        gig.instruments_needed = list(gig.instruments_needed_array)
+        batch.append(gig)
+        if len(batch) >= 1000:
+            Gig.objects.bulk_update(batch, ['genres', 'instruments_needed'])
+            batch = []
+    Gig.objects.bulk_update(batch, ['genres', 'instruments_needed'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gigs', '0002_gig_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gig',
+            name='genres_array',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=100), default=list, size=None),
+        ),
+        migrations.AddField(
+            model_name='gig',
+            name='instruments_needed_array',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=100), default=list, size=None),
+        ),
+        migrations.RunPython(copy_tags_to_arrays, copy_arrays_to_tags),
+        migrations.RemoveField(
+            model_name='gig',
+            name='genres',
+        ),
+        migrations.RemoveField(
+            model_name='gig',
+            name='instruments_needed',
+        ),
+        migrations.RenameField(
+            model_name='gig',
+            old_name='genres_array',
+            new_name='genres',
+        ),
+        migrations.RenameField(
+            model_name='gig',
+            old_name='instruments_needed_array',
+            new_name='instruments_needed',
+        ),
+        migrations.AddIndex(
+            model_name='gig',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['genres'], name='gig_genres_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='gig',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['instruments_needed'], name='gig_instruments_gin'),
+        ),
+    ]
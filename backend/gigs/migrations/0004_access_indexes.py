@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gigs', '0003_gig_tag_arrays'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gig',
+            index=models.Index(condition=models.Q(('status', 'open')), fields=['event_date', 'id'], name='gig_open_event_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gig',
+            index=models.Index(condition=models.Q(('status', 'open')), fields=['payment_amount', 'id'], name='gig_open_payment_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gig',
+            index=models.Index(condition=models.Q(('status', 'open')), fields=['created_at', 'id'], name='gig_open_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gig',
+            index=models.Index(fields=['venue', 'event_date'], name='gig_venue_event_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gig',
+            index=models.Index(fields=['status', 'event_date'], name='gig_status_event_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gigapplication',
+            index=models.Index(fields=['musician', 'applied_at'], name='gigapp_musician_applied_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gigapplication',
+            index=models.Index(fields=['musician', 'status', 'applied_at'], name='gigapp_musician_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gigapplication',
+            index=models.Index(fields=['gig', 'status'], name='gigapp_gig_status_idx'),
+        ),
+    ]
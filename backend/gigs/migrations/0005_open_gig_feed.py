@@ -0,0 +1,97 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:16
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models.functions import Coalesce
+
+
+def populate_feed(apps, schema_editor):
+    Gig = apps.get_model('gigs', 'Gig')
+    GigApplication = apps.get_model('gigs', 'GigApplication')
+    OpenGigFeed = apps.get_model('gigs', 'OpenGigFeed')
+
+    applications = GigApplication.objects.filter(
+        gig=models.OuterRef('pk')
+    ).order_by().values('gig').annotate(total=models.Count('pk')).values('total')
+    gigs = Gig.objects.filter(status='open').select_related('venue__user').annotate(
+        applications_count=Coalesce(models.Subquery(applications), 0)
+    )
+
+    batch = []
+    for gig in gigs.iterator(chunk_size=1000):
+        venue = gig.venue
+        batch.append(OpenGigFeed(
+            gig_id=gig.pk,
+            venue_id=venue.pk,
+            title=gig.title,
+            event_date=gig.event_date,
+            deadline=gig.deadline,
+            created_at=gig.created_at,
+            genres=gig.genres,
+            instruments_needed=gig.instruments_needed,
+            payment_amount=gig.payment_amount,
+            payment_type=gig.payment_type,
+            experience_level=gig.experience_level,
+            is_featured=gig.is_featured,
+            is_urgent=gig.is_urgent,
+            applications_count=gig.applications_count,
+            search_vector=gig.search_vector,
+            venue_name=venue.venue_name,
+            city=venue.user.city,
+            state=venue.user.state,
+            city_normalized=venue.city_normalized,
+            state_normalized=venue.state_normalized,
+            latitude=venue.latitude,
+            longitude=venue.longitude,
+        ))
+        if len(batch) >= 1000:
+            OpenGigFeed.objects.bulk_create(batch)
+            batch = []
+    OpenGigFeed.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_musicianprofile_tag_arrays'),
+        ('gigs', '0004_access_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OpenGigFeed',
+            fields=[
+                ('gig', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='feed_entry', serialize=False, to='gigs.gig')),
+                ('title', models.CharField(max_length=200)),
+                ('event_date', models.DateTimeField()),
+                ('deadline', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('genres', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=100), default=list, size=None)),
+                ('instruments_needed', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=100), default=list, size=None)),
+                ('payment_amount', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('payment_type', models.CharField(max_length=20)),
+                ('experience_level', models.CharField(max_length=20)),
+                ('is_featured', models.BooleanField(default=False)),
+                ('is_urgent', models.BooleanField(default=False)),
+                ('applications_count', models.PositiveIntegerField(default=0)),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(null=True)),
+                ('venue_name', models.CharField(max_length=200)),
+                ('city', models.CharField(blank=True, max_length=100)),
+                ('state', models.CharField(blank=True, max_length=100)),
+                ('city_normalized', models.CharField(blank=True, max_length=100)),
+                ('state_normalized', models.CharField(blank=True, max_length=100)),
+                ('latitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('longitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('venue', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='open_gig_feed', to='users.venueprofile')),
+            ],
+            options={
+                'verbose_name': 'Open Gig Feed Entry',
+                'verbose_name_plural': 'Open Gig Feed',
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='feed_search_vector_gin'), django.contrib.postgres.indexes.GinIndex(fields=['genres'], name='feed_genres_gin'), django.contrib.postgres.indexes.GinIndex(fields=['instruments_needed'], name='feed_instruments_gin'), models.Index(fields=['event_date', 'gig'], name='feed_event_date_idx'), models.Index(fields=['payment_amount', 'gig'], name='feed_payment_idx'), models.Index(fields=['created_at', 'gig'], name='feed_created_idx'), models.Index(fields=['city_normalized'], name='feed_city_norm_prefix_idx', opclasses=['varchar_pattern_ops']), models.Index(fields=['state_normalized'], name='feed_state_norm_prefix_idx', opclasses=['varchar_pattern_ops'])],
+            },
+        ),
+        migrations.RunPython(populate_feed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gigs', '0005_open_gig_feed'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='opengigfeed',
+            index=models.Index(fields=['latitude', 'longitude'], name='feed_lat_lng_idx'),
+        ),
+    ]
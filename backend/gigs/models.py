@@ -1,8 +1,89 @@
-from django.db import models
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector, SearchVectorField
+)
+from django.db import connections, models
+from django.db.models import Count, F, OuterRef, Prefetch, Q, Subquery
+from django.db.models.functions import Cast, Coalesce
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from users.models import User, MusicianProfile, VenueProfile
 
+class FullTextSearchMixin:
+    """QuerySet mixin for full-text search on a stored ``search_vector`` column"""
+    
+    def search(self, terms):
+        """Full-text search on the stored search vector, annotated with search_rank"""
+        query = SearchQuery(terms, search_type='websearch', config=Gig.SEARCH_CONFIG)
+        # ts_rank() returns real; cast so cursor values round-trip exactly
+        return self.filter(search_vector=query).annotate(
+            search_rank=Cast(SearchRank(F('search_vector'), query), models.FloatField())
+        )
+
+class GigQuerySet(FullTextSearchMixin, models.QuerySet):
+    """QuerySet with helpers for the gig read paths"""
+    
+    def with_applications_count(self):
+        """Annotate each gig with its number of applications.
+        
+        A correlated subquery is used rather than ``Count('applications')``
+        so the count is not skewed by joins on ``applications`` made by
+        earlier filters (e.g. the musician visibility filter).
+        """
+        applications = GigApplication.objects.filter(
+            gig=OuterRef('pk')
+        ).order_by().values('gig').annotate(total=Count('pk')).values('total')
+        return self.annotate(
+            applications_count=Coalesce(Subquery(applications), 0)
+        )
+    
+    def for_serializer(self):
+        """Load everything GigSerializer renders in a fixed number of queries"""
+        return self.select_related('venue__user').with_applications_count()
+    
+    def versions(self):
+        """Per-gig version data covering everything GigSerializer renders.
+        
+        Only timestamps, counts and the columns behind the time-dependent
+        fields are read, so this is a cheap basis for ETags.
+        """
+        queryset = self.prefetch_related(None)
+        if 'applications_count' not in queryset.query.annotations:
+            queryset = queryset.with_applications_count()
+        rows = queryset.order_by('pk').values_list(
+            'pk', 'updated_at', 'venue__updated_at', 'venue__user__updated_at',
+            'applications_count', 'status', 'deadline', 'event_date'
+        )
+        versions = []
+        for *stamps, status, deadline, event_date in rows:
+            gig = Gig(status=status, deadline=deadline, event_date=event_date)
+            versions.append((*stamps, gig.days_until_event, gig.is_open_for_applications))
+        return versions
+    
+    def update_search_vector(self):
+        """Recompute the stored search vector of every gig in the queryset"""
+        if connections[self.db].vendor != 'postgresql':
+            return 0
+        return self.update(search_vector=Gig.search_vector_expression())
+
+class GigApplicationQuerySet(models.QuerySet):
+    """QuerySet with helpers for the gig application read paths"""
+    
+    def for_serializer(self):
+        """Load everything GigApplicationSerializer renders in a fixed number of queries"""
+        # The gig is prefetched rather than joined so it keeps its
+        # applications_count annotation.
+        return self.select_related('musician__user').prefetch_related(
+            Prefetch('gig', queryset=Gig.objects.for_serializer())
+        )
+    
+    def versions(self):
+        """Per-application version data (the nested gig is versioned separately)"""
+        return list(self.prefetch_related(None).order_by('pk').values_list(
+            'pk', 'updated_at', 'gig_id', 'musician__updated_at', 'musician__user__updated_at'
+        ))
+
 class Gig(models.Model):
     STATUS_CHOICES = [
         ('open', 'Open'),
@@ -37,8 +118,8 @@ class Gig(models.Model):
     setup_time = models.PositiveIntegerField(default=30)  # minutes
     
     # Musical requirements
-    genres = models.JSONField(default=list)  # List of genres
-    instruments_needed = models.JSONField(default=list)  # List of instruments
+    genres = ArrayField(models.CharField(max_length=100), default=list)  # List of genres
+    instruments_needed = ArrayField(models.CharField(max_length=100), default=list)  # List of instruments
     band_size_min = models.PositiveIntegerField(default=1)
     band_size_max = models.PositiveIntegerField(default=5)
     
@@ -84,14 +165,54 @@ class Gig(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     deadline = models.DateTimeField(null=True, blank=True)
     
+    # Full-text search (maintained by gigs.signals)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
+    objects = GigQuerySet.as_manager()
+    
+    SEARCH_CONFIG = 'english'
+    
     class Meta:
         verbose_name = 'Gig'
         verbose_name_plural = 'Gigs'
         ordering = ['-event_date', '-created_at']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='gig_search_vector_gin'),
+            GinIndex(fields=['genres'], name='gig_genres_gin'),
+            GinIndex(fields=['instruments_needed'], name='gig_instruments_gin'),
+            # Open-gig listings (search, matching), one per GigSearchView sort
+            models.Index(
+                fields=['event_date', 'id'], condition=Q(status='open'),
+                name='gig_open_event_date_idx'
+            ),
+            models.Index(
+                fields=['payment_amount', 'id'], condition=Q(status='open'),
+                name='gig_open_payment_idx'
+            ),
+            models.Index(
+                fields=['created_at', 'id'], condition=Q(status='open'),
+                name='gig_open_created_idx'
+            ),
+            # Venue owner listings and ?status= filters
+            models.Index(fields=['venue', 'event_date'], name='gig_venue_event_date_idx'),
+            models.Index(fields=['status', 'event_date'], name='gig_status_event_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} at {self.venue.venue_name} - {self.event_date.strftime('%B %d, %Y')}"
     
+    @staticmethod
+    def search_vector_expression():
+        """Weighted search vector over title, venue name and description"""
+        venue_name = Subquery(
+            VenueProfile.objects.filter(pk=OuterRef('venue_id')).values('venue_name')[:1]
+        )
+        return (
+            SearchVector('title', weight='A', config=Gig.SEARCH_CONFIG) +
+            SearchVector(venue_name, weight='A', config=Gig.SEARCH_CONFIG) +
+            SearchVector('description', weight='B', config=Gig.SEARCH_CONFIG)
+        )
+    
     @property
     def is_open_for_applications(self):
         return self.status == 'open' and (not self.deadline or self.deadline > timezone.now())
@@ -137,11 +258,22 @@ class GigApplication(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     responded_at = models.DateTimeField(null=True, blank=True)
     
+    objects = GigApplicationQuerySet.as_manager()
+    
     class Meta:
         verbose_name = 'Gig Application'
         verbose_name_plural = 'Gig Applications'
         unique_together = ['gig', 'musician']
         ordering = ['-applied_at']
+        indexes = [
+            # Musician listings, with and without a ?status= filter
+            models.Index(fields=['musician', 'applied_at'], name='gigapp_musician_applied_idx'),
+            models.Index(
+                fields=['musician', 'status', 'applied_at'], name='gigapp_musician_status_idx'
+            ),
+            # Venue owner views of a gig's applications
+            models.Index(fields=['gig', 'status'], name='gigapp_gig_status_idx'),
+        ]
     
     def __str__(self):
         return f"{self.musician.user.get_full_name()} - {self.gig.title}"
@@ -157,3 +289,142 @@ class GigApplication(models.Model):
     @property
     def is_rejected(self):
         return self.status == 'rejected'
+
+
+class OpenGigFeedQuerySet(FullTextSearchMixin, models.QuerySet):
+    """QuerySet with helpers for reading the open gig feed"""
+    
+    def applicable(self):
+        """Entries whose application deadline has not passed"""
+        return self.filter(Q(deadline__isnull=True) | Q(deadline__gt=timezone.now()))
+
+class OpenGigFeed(models.Model):
+    """
+    Denormalized read model of open gigs.
+    
+    One narrow row per open gig with the venue and location columns
+    flattened in, so open-gig reads need no joins. Rows are kept in step
+    with their gig, venue and applications by gigs.signals; the deadline
+    moves with time and is applied at read time via ``applicable()``.
+    """
+    
+    gig = models.OneToOneField(
+        Gig, on_delete=models.CASCADE, primary_key=True, related_name='feed_entry'
+    )
+    venue = models.ForeignKey(VenueProfile, on_delete=models.CASCADE, related_name='open_gig_feed')
+    
+    # Gig columns
+    title = models.CharField(max_length=200)
+    event_date = models.DateTimeField()
+    deadline = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    genres = ArrayField(models.CharField(max_length=100), default=list)
+    instruments_needed = ArrayField(models.CharField(max_length=100), default=list)
+    payment_amount = models.DecimalField(max_digits=8, decimal_places=2)
+    payment_type = models.CharField(max_length=20)
+    experience_level = models.CharField(max_length=20)
+    is_featured = models.BooleanField(default=False)
+    is_urgent = models.BooleanField(default=False)
+    applications_count = models.PositiveIntegerField(default=0)
+    search_vector = SearchVectorField(null=True)
+    
+    # Venue and location columns
+    venue_name = models.CharField(max_length=200)
+    city = models.CharField(max_length=100, blank=True)
+    state = models.CharField(max_length=100, blank=True)
+    city_normalized = models.CharField(max_length=100, blank=True)
+    state_normalized = models.CharField(max_length=100, blank=True)
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    
+    objects = OpenGigFeedQuerySet.as_manager()
+    
+    # Columns copied from the gig on every refresh
+    SYNCED_FIELDS = [
+        'venue', 'title', 'event_date', 'deadline', 'created_at', 'genres',
+        'instruments_needed', 'payment_amount', 'payment_type', 'experience_level',
+        'is_featured', 'is_urgent', 'applications_count', 'search_vector',
+        'venue_name', 'city', 'state', 'city_normalized', 'state_normalized',
+        'latitude', 'longitude',
+    ]
+    REFRESH_BATCH_SIZE = 1000
+    
+    class Meta:
+        verbose_name = 'Open Gig Feed Entry'
+        verbose_name_plural = 'Open Gig Feed'
+        indexes = [
+            GinIndex(fields=['search_vector'], name='feed_search_vector_gin'),
+            GinIndex(fields=['genres'], name='feed_genres_gin'),
+            GinIndex(fields=['instruments_needed'], name='feed_instruments_gin'),
+            # One per GigSearchView sort
+            models.Index(fields=['event_date', 'gig'], name='feed_event_date_idx'),
+            models.Index(fields=['payment_amount', 'gig'], name='feed_payment_idx'),
+            models.Index(fields=['created_at', 'gig'], name='feed_created_idx'),
+            # Bounding box prefilter for distance searches (see gigs.geo)
+            models.Index(fields=['latitude', 'longitude'], name='feed_lat_lng_idx'),
+            models.Index(
+                fields=['city_normalized'], opclasses=['varchar_pattern_ops'],
+                name='feed_city_norm_prefix_idx'
+            ),
+            models.Index(
+                fields=['state_normalized'], opclasses=['varchar_pattern_ops'],
+                name='feed_state_norm_prefix_idx'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.title} at {self.venue_name}"
+    
+    @classmethod
+    def from_gig(cls, gig):
+        """Build the feed entry for `gig` (loaded with venue__user and applications_count)"""
+        venue = gig.venue
+        return cls(
+            gig_id=gig.pk,
+            venue=venue,
+            title=gig.title,
+            event_date=gig.event_date,
+            deadline=gig.deadline,
+            created_at=gig.created_at,
+            genres=gig.genres,
+            instruments_needed=gig.instruments_needed,
+            payment_amount=gig.payment_amount,
+            payment_type=gig.payment_type,
+            experience_level=gig.experience_level,
+            is_featured=gig.is_featured,
+            is_urgent=gig.is_urgent,
+            applications_count=gig.applications_count,
+            search_vector=gig.search_vector,
+            venue_name=venue.venue_name,
+            city=venue.user.city,
+            state=venue.user.state,
+            city_normalized=venue.city_normalized,
+            state_normalized=venue.state_normalized,
+            latitude=venue.latitude,
+            longitude=venue.longitude,
+        )
+    
+    @classmethod
+    def refresh(cls, gigs):
+        """Re-sync the feed entries of `gigs` (a Gig queryset) with the gigs"""
+        gig_ids = list(gigs.order_by().values_list('pk', flat=True))
+        for start in range(0, len(gig_ids), cls.REFRESH_BATCH_SIZE):
+            batch = gig_ids[start:start + cls.REFRESH_BATCH_SIZE]
+            entries = [
+                cls.from_gig(gig) for gig in
+                Gig.objects.filter(pk__in=batch, status='open').for_serializer()
+            ]
+            # Gigs that are no longer open (or no longer exist) leave the feed
+            cls.objects.filter(gig_id__in=batch).exclude(
+                gig_id__in=[entry.gig_id for entry in entries]
+            ).delete()
+            cls.objects.bulk_create(
+                entries, update_conflicts=True,
+                unique_fields=['gig'], update_fields=cls.SYNCED_FIELDS
+            )
+    
+    @classmethod
+    def rebuild(cls):
+        """Rebuild the whole feed from the gigs table"""
+        cls.objects.exclude(gig__status='open').delete()
+        cls.refresh(Gig.objects.filter(status='open'))
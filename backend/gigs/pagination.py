@@ -0,0 +1,78 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+
+
+class GigKeysetPagination:
+    """
+    Keyset (cursor) pagination over a fixed ``(field, 'pk')`` ordering.
+
+    Instead of ``OFFSET`` the next page is fetched with a ``WHERE`` clause
+    on the last row seen, so every page costs the same regardless of depth.
+    The primary key tie-breaker keeps pages stable when the sort field repeats.
+    """
+
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, ordering):
+        field, tie_breaker = ordering
+        assert tie_breaker.lstrip('-') in ('id', 'pk'), 'Keyset ordering must end with the pk'
+        assert field.startswith('-') == tie_breaker.startswith('-'), (
+            'Keyset ordering fields must share a direction'
+        )
+        self.ordering = ordering
+        self.field = field.lstrip('-')
+        self.descending = field.startswith('-')
+
+    def paginate_queryset(self, queryset, cursor, page_size):
+        """Return ``(rows, next_cursor)`` for the page after ``cursor``"""
+        queryset = queryset.order_by(*self.ordering)
+
+        if cursor:
+            value, pk = self.decode_cursor(cursor, self._sort_field(queryset))
+            comparison = 'lt' if self.descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{self.field}__{comparison}': value}) |
+                Q(**{self.field: value, f'pk__{comparison}': pk})
+            )
+
+        # Fetch one extra row to find out whether there is a next page
+        rows = list(queryset[:page_size + 1])
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = self.encode_cursor(rows[-1])
+
+        return rows, next_cursor
+
+    def encode_cursor(self, row):
+        """Encode the position of `row` as an opaque cursor string"""
+        value = getattr(row, self.field)
+        value = value.isoformat() if hasattr(value, 'isoformat') else str(value)
+        payload = json.dumps({'o': self.ordering[0], 'v': value, 'id': row.pk})
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, cursor, field):
+        """Decode a cursor string into ``(value, pk)``, `value` parsed by model `field`"""
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if payload['o'] != self.ordering[0]:
+                # Cursor was issued for a different sort order
+                raise ValueError(payload['o'])
+            # A tampered value would otherwise only fail when the query runs
+            value = field.to_python(payload['v'])
+            if value is None:
+                raise ValueError(payload['v'])
+            return value, int(payload['id'])
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _sort_field(self, queryset):
+        """The model field (or annotation output field) the pages are sorted on"""
+        annotation = queryset.query.annotations.get(self.field)
+        if annotation is not None:
+            return annotation.output_field
+        return queryset.model._meta.get_field(self.field)
@@ -1,6 +1,9 @@
 from rest_framework import serializers
-from .models import Gig, GigApplication
+from .models import Gig, GigApplication, OpenGigFeed
+from users.models import MusicianProfile, User, VenueProfile
 from users.serializers import MusicianProfileSerializer, VenueProfileSerializer
+from gig_router.serializers import DynamicFieldsMixin, model_columns
+from django.db.models import Prefetch
 from django.utils import timezone
 
 class GigSerializer(serializers.ModelSerializer):
@@ -34,6 +37,10 @@ class GigSerializer(serializers.ModelSerializer):
     
     def get_applications_count(self, obj):
         """Get the number of applications for this gig"""
+        # Prefer the annotation from Gig.objects.with_applications_count()
+        annotated = getattr(obj, 'applications_count', None)
+        if annotated is not None:
+            return annotated
         return obj.applications.count()
     
     def get_days_until_event(self, obj):
@@ -62,6 +69,70 @@ class GigSerializer(serializers.ModelSerializer):
                 )
         return value
 
+class GigListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Compact serializer for gig lists (supports ?fields= and ?expand=venue)"""
+    
+    venue_name = serializers.CharField(source='venue.venue_name', read_only=True)
+    city = serializers.CharField(source='venue.user.city', read_only=True)
+    state = serializers.CharField(source='venue.user.state', read_only=True)
+    applications_count = serializers.SerializerMethodField()
+    is_open_for_applications = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Gig
+        fields = [
+            'id', 'title', 'event_date', 'venue_id', 'venue_name', 'city',
+            'state', 'genres', 'instruments_needed', 'payment_amount',
+            'payment_type', 'experience_level', 'status', 'is_featured',
+            'is_urgent', 'deadline', 'applications_count',
+            'is_open_for_applications'
+        ]
+        read_only_fields = fields
+        field_sources = {
+            'venue_id': ['venue'],
+            'venue_name': ['venue__venue_name'],
+            'city': ['venue__user__city'],
+            'state': ['venue__user__state'],
+            'is_open_for_applications': ['status', 'deadline'],
+        }
+        expandable_fields = {
+            'venue': (
+                VenueProfileSerializer,
+                model_columns(VenueProfile, 'venue__') + model_columns(User, 'venue__user__')
+            ),
+        }
+    
+    get_applications_count = GigSerializer.get_applications_count
+    get_is_open_for_applications = GigSerializer.get_is_open_for_applications
+
+class OpenGigFeedSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Renders open gig feed entries in the GigListSerializer format"""
+    
+    id = serializers.IntegerField(source='gig_id', read_only=True)
+    venue_id = serializers.IntegerField(read_only=True)
+    status = serializers.SerializerMethodField()
+    is_open_for_applications = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = OpenGigFeed
+        fields = GigListSerializer.Meta.fields
+        read_only_fields = fields
+        field_sources = {
+            'id': ['gig'],
+            'venue_id': ['venue'],
+            'status': [],
+            'is_open_for_applications': ['deadline'],
+        }
+        expandable_fields = GigListSerializer.Meta.expandable_fields
+    
+    def get_status(self, obj):
+        """Feed entries are open gigs by definition"""
+        return 'open'
+    
+    def get_is_open_for_applications(self, obj):
+        """Check if the gig's application deadline has not passed"""
+        return not obj.deadline or obj.deadline > timezone.now()
+
 class GigCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating gigs"""
     
@@ -156,6 +227,53 @@ class GigApplicationSerializer(serializers.ModelSerializer):
         
         return data
 
+class GigApplicationListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Compact serializer for application lists (supports ?fields= and ?expand=gig,musician)"""
+    
+    gig_title = serializers.CharField(source='gig.title', read_only=True)
+    musician_name = serializers.CharField(source='musician.user.get_full_name', read_only=True)
+    
+    class Meta:
+        model = GigApplication
+        fields = [
+            'id', 'gig_id', 'gig_title', 'musician_id', 'musician_name',
+            'proposed_rate', 'status', 'applied_at', 'updated_at', 'responded_at'
+        ]
+        read_only_fields = fields
+        field_sources = {
+            'gig_id': ['gig'],
+            'gig_title': ['gig'],
+            'musician_id': ['musician'],
+            'musician_name': [
+                'musician__user__first_name', 'musician__user__last_name',
+                'musician__user__username'
+            ],
+        }
+        expandable_fields = {
+            # The gig itself is prefetched by GigApplication.objects.for_serializer()
+            'gig': (GigSerializer, ['gig']),
+            'musician': (
+                MusicianProfileSerializer,
+                model_columns(MusicianProfile, 'musician__') + model_columns(User, 'musician__user__')
+            ),
+        }
+    
+    @classmethod
+    def restrict_queryset(cls, queryset, request, required=()):
+        """Also narrow the gig prefetch to what the selected fields render"""
+        queryset = super().restrict_queryset(queryset, request, required)
+        selected, expanded = cls.get_selection(request)
+        if 'gig' in expanded:
+            return queryset
+        
+        # Without ?expand=gig only the title is read from the gig
+        queryset = queryset.prefetch_related(None)
+        if 'gig_title' in selected:
+            queryset = queryset.prefetch_related(
+                Prefetch('gig', queryset=Gig.objects.only('id', 'title'))
+            )
+        return queryset
+
 class GigApplicationCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating gig applications"""
     
@@ -0,0 +1,105 @@
+from celery.signals import worker_process_init
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from users.models import User, VenueProfile
+from .cache import bump_gig_generation
+from .index import open_gig_index, record_gig_changes
+from .models import Gig, GigApplication, OpenGigFeed
+
+# Fields that feed Gig.search_vector
+SEARCH_VECTOR_FIELDS = {'title', 'description', 'venue'}
+
+
+@receiver(post_save, sender=Gig)
+def update_gig_search_vector(sender, instance, update_fields=None, **kwargs):
+    """Keep the stored search vector in step with the gig text"""
+    if update_fields is not None and not SEARCH_VECTOR_FIELDS & set(update_fields):
+        return
+    Gig.objects.filter(pk=instance.pk).update_search_vector()
+
+
+@receiver(post_save, sender=VenueProfile)
+def update_venue_gigs_search_vector(sender, instance, created, update_fields=None, **kwargs):
+    """Re-index a venue's gigs when its name changes"""
+    if created or (update_fields is not None and 'venue_name' not in update_fields):
+        return
+    Gig.objects.filter(venue=instance).update_search_vector()
+
+
+# User fields rendered in cached gig responses
+VENUE_USER_FIELDS = {'city', 'state'}
+
+
+@receiver(post_save, sender=Gig)
+@receiver(post_delete, sender=Gig)
+@receiver(post_save, sender=VenueProfile)
+def invalidate_gig_responses(sender, **kwargs):
+    """Retire cached gig responses once the change is committed"""
+    transaction.on_commit(bump_gig_generation)
+
+
+@receiver(post_save, sender=User)
+def invalidate_venue_location_responses(sender, instance, update_fields=None, **kwargs):
+    """Cached gig responses include the venue owner's location"""
+    if not instance.is_venue_owner:
+        return
+    if update_fields is not None and not VENUE_USER_FIELDS & set(update_fields):
+        return
+    transaction.on_commit(bump_gig_generation)
+
+
+@receiver(post_save, sender=Gig)
+def refresh_gig_feed_entry(sender, instance, **kwargs):
+    """Add, update or drop the gig's open feed entry"""
+    OpenGigFeed.refresh(Gig.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=VenueProfile)
+def refresh_venue_feed_entries(sender, instance, created, **kwargs):
+    """Copy venue changes into the feed entries of its gigs"""
+    if not created:
+        OpenGigFeed.refresh(Gig.objects.filter(venue=instance, status='open'))
+
+
+@receiver(post_save, sender=User)
+def refresh_venue_location_feed_entries(sender, instance, update_fields=None, **kwargs):
+    """Copy the venue owner's location into the feed entries of their gigs"""
+    if not instance.is_venue_owner:
+        return
+    if update_fields is not None and not VENUE_USER_FIELDS & set(update_fields):
+        return
+    OpenGigFeed.refresh(Gig.objects.filter(venue__user=instance, status='open'))
+
+
+@receiver(post_save, sender=GigApplication)
+def count_new_application_in_feed(sender, instance, created, **kwargs):
+    """Keep the feed's applications_count in step with new applications"""
+    if created:
+        _update_feed_applications_count(instance.gig_id)
+
+
+@receiver(post_delete, sender=GigApplication)
+def count_deleted_application_in_feed(sender, instance, **kwargs):
+    """Keep the feed's applications_count in step with deleted applications"""
+    _update_feed_applications_count(instance.gig_id)
+
+
+def _update_feed_applications_count(gig_id):
+    OpenGigFeed.objects.filter(gig_id=gig_id).update(
+        applications_count=GigApplication.objects.filter(gig_id=gig_id).count()
+    )
+
+
+@receiver(post_save, sender=Gig)
+@receiver(post_delete, sender=Gig)
+def log_open_gig_index_change(sender, instance, **kwargs):
+    """Have every process patch the gig into its open gig index once committed"""
+    gig_id = instance.pk
+    transaction.on_commit(lambda: record_gig_changes([gig_id]))
+
+
+@worker_process_init.connect
+def warm_open_gig_index(**kwargs):
+    """Build the in-memory open gig index when a worker process starts"""
+    open_gig_index.refresh()
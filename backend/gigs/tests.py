@@ -1,11 +1,20 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.db import IntegrityError
+from django.db import IntegrityError, connection
 from django.utils import timezone
+import base64
+import json
 from decimal import Decimal
+from unittest import mock
 from datetime import datetime, timedelta
+from rest_framework.test import APIClient
 from users.models import User, MusicianProfile, VenueProfile
-from .models import Gig, GigApplication
+from gig_router.pagination import count_queryset
+from .geo import bounding_box_q, haversine_miles
+from .index import INDEX_SEQUENCE_KEY, OpenGigIndex, get_change_sequence
+from .models import Gig, GigApplication, OpenGigFeed
 
 
 class GigModelTest(TestCase):
@@ -471,3 +480,1134 @@ class GigApplicationRelationshipTest(TestCase):
         self.assertEqual(len(applications), 2)
         self.assertIn(app1, applications)
         self.assertIn(app2, applications)
+
+
+class GigQuerySetTest(TestCase):
+    """Test cases for the Gig read-path queryset helpers"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.venue_profile = VenueProfile.objects.create(
+            user=User.objects.create_user(
+                email='venue@example.com',
+                username='venue',
+                password='testpass123',
+                user_type='venue'
+            ),
+            venue_name='Test Venue',
+            venue_type='Bar',
+            capacity=200,
+            address='123 Test Street'
+        )
+        
+        self.musicians = [
+            MusicianProfile.objects.create(
+                user=User.objects.create_user(
+                    email=f'musician{i}@example.com',
+                    username=f'musician{i}',
+                    password='testpass123',
+                    user_type='musician'
+                ),
+                primary_instrument='Guitar'
+            )
+            for i in range(3)
+        ]
+        
+        self.gigs = [
+            Gig.objects.create(
+                title=f'Gig {i}',
+                description='Test description',
+                venue=self.venue_profile,
+                event_date=timezone.now() + timedelta(days=30 + i),
+                payment_amount=Decimal('500.00'),
+                payment_type='per_gig',
+                experience_level='beginner'
+            )
+            for i in range(3)
+        ]
+        
+        # Gig 0 gets three applications, gig 1 gets one, gig 2 gets none
+        for musician in self.musicians:
+            GigApplication.objects.create(
+                gig=self.gigs[0], musician=musician, cover_letter='Hi'
+            )
+        GigApplication.objects.create(
+            gig=self.gigs[1], musician=self.musicians[0], cover_letter='Hi'
+        )
+    
+    def test_with_applications_count(self):
+        """Test the applications_count annotation"""
+        counts = dict(
+            Gig.objects.with_applications_count().values_list('title', 'applications_count')
+        )
+        self.assertEqual(counts, {'Gig 0': 3, 'Gig 1': 1, 'Gig 2': 0})
+    
+    def test_with_applications_count_ignores_filter_joins(self):
+        """Test the count is not narrowed by filters on applications"""
+        gig = Gig.objects.filter(
+            applications__musician=self.musicians[1]
+        ).with_applications_count().get()
+        self.assertEqual(gig.applications_count, 3)
+    
+    def test_serializer_uses_annotation(self):
+        """Test GigSerializer reads the annotation instead of querying"""
+        from .serializers import GigSerializer
+        
+        gig = Gig.objects.with_applications_count().get(pk=self.gigs[0].pk)
+        serializer = GigSerializer()
+        with self.assertNumQueries(0):
+            self.assertEqual(serializer.get_applications_count(gig), 3)
+        
+        # Un-annotated instances fall back to a COUNT query
+        with self.assertNumQueries(1):
+            self.assertEqual(serializer.get_applications_count(self.gigs[1]), 1)
+
+
+class GigReadQueryCountTest(TestCase):
+    """Test that gig read endpoints run a fixed number of queries"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.venue_user = User.objects.create_user(
+            email='venue@example.com',
+            username='venue',
+            password='testpass123',
+            user_type='venue'
+        )
+        self.venue_profile = VenueProfile.objects.create(
+            user=self.venue_user,
+            venue_name='Test Venue',
+            venue_type='Bar',
+            capacity=200,
+            address='123 Test Street'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.venue_user)
+    
+    def _create_gigs_with_applications(self, count):
+        """Create `count` gigs, each with one application from a new musician"""
+        start = Gig.objects.count()
+        for i in range(start, start + count):
+            gig = Gig.objects.create(
+                title=f'Gig {i}',
+                description='Test description',
+                venue=self.venue_profile,
+                event_date=timezone.now() + timedelta(days=30),
+                payment_amount=Decimal('500.00'),
+                payment_type='per_gig',
+                experience_level='beginner'
+            )
+            musician = MusicianProfile.objects.create(
+                user=User.objects.create_user(
+                    email=f'musician{i}@example.com',
+                    username=f'musician{i}',
+                    password='testpass123',
+                    user_type='musician'
+                ),
+                primary_instrument='Guitar'
+            )
+            GigApplication.objects.create(gig=gig, musician=musician, cover_letter='Hi')
+    
+    def _count_queries(self, url):
+        """Return the number of queries issued while fetching `url`"""
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+    
+    def test_list_endpoints_do_not_scale_with_rows(self):
+        """Test list endpoints issue the same queries for 1 and 5 rows"""
+        urls = ['/api/gigs/', '/api/applications/', '/api/my-gigs/']
+        
+        self._create_gigs_with_applications(1)
+        baseline = {url: self._count_queries(url) for url in urls}
+        
+        self._create_gigs_with_applications(4)
+        for url in urls:
+            self.assertEqual(self._count_queries(url), baseline[url], url)
+
+
+class GigSearchPaginationTest(TestCase):
+    """Test cases for GigSearchView pagination"""
+    
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        venue_user = User.objects.create_user(
+            email='venue@example.com',
+            username='venue',
+            password='testpass123',
+            user_type='venue'
+        )
+        venue_profile = VenueProfile.objects.create(
+            user=venue_user,
+            venue_name='Test Venue',
+            venue_type='Bar',
+            capacity=200,
+            address='123 Test Street'
+        )
+        
+        # Payment amounts repeat so the id tie-breaker is exercised
+        self.gigs = [
+            Gig.objects.create(
+                title=f'Gig {i}',
+                description='Test description',
+                venue=venue_profile,
+                event_date=timezone.now() + timedelta(days=30 + i),
+                payment_amount=Decimal(100 * (i % 3)),
+                payment_type='per_gig',
+                experience_level='beginner'
+            )
+            for i in range(7)
+        ]
+        
+        self.client = APIClient()
+        self.client.force_authenticate(user=venue_user)
+    
+    def _walk(self, **params):
+        """Follow next_cursor until exhausted, returning all result ids"""
+        ids = []
+        params = {'cursor': '', 'page_size': 3, **params}
+        while True:
+            response = self.client.get('/api/search/', params)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(gig['id'] for gig in response.data['results'])
+            if not response.data['next_cursor']:
+                return ids
+            params['cursor'] = response.data['next_cursor']
+    
+    def test_cursor_pages_follow_sort_order(self):
+        """Test cursor pages cover every gig exactly once in sort order"""
+        expected = [
+            gig.id for gig in sorted(
+                self.gigs, key=lambda gig: (gig.payment_amount, gig.id), reverse=True
+            )
+        ]
+        self.assertEqual(self._walk(sort_by='payment'), expected)
+        self.assertEqual(
+            self._walk(sort_by='date'),
+            [gig.id for gig in sorted(self.gigs, key=lambda gig: gig.event_date)]
+        )
+    
+    def test_invalid_cursor(self):
+        """Test malformed or mismatched cursors are rejected"""
+        response = self.client.get('/api/search/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+        
+        first_page = self.client.get(
+            '/api/search/', {'cursor': '', 'page_size': 3, 'sort_by': 'payment'}
+        )
+        response = self.client.get(
+            '/api/search/', {'cursor': first_page.data['next_cursor'], 'sort_by': 'date'}
+        )
+        self.assertEqual(response.status_code, 404)
+    
+    def test_tampered_cursor_value(self):
+        """Test well-formed cursors holding a bad sort value are rejected"""
+        for ordering, sort_by in [
+            ('-event_date', 'event_date'), ('-payment_amount', 'payment'),
+            ('-search_rank', 'relevance'),
+        ]:
+            for value in ['garbage', 'x', None]:
+                payload = json.dumps({'o': ordering, 'v': value, 'id': self.gigs[0].id})
+                cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+                response = self.client.get(
+                    '/api/search/', {'cursor': cursor, 'sort_by': sort_by, 'search': 'test'}
+                )
+                self.assertEqual(response.status_code, 404, (ordering, value))
+    
+    def test_page_size_is_capped(self):
+        """Test page_size is clamped to the view maximum"""
+        response = self.client.get('/api/search/', {'page_size': 10000})
+        self.assertEqual(response.data['page_size'], 100)
+        self.assertEqual(response.data['count'], 7)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CountQuerysetTest(TestCase):
+    """Test cases for cached and estimated result counts"""
+    
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        venue_profile = VenueProfile.objects.create(
+            user=User.objects.create_user(
+                email='venue@example.com',
+                username='venue',
+                password='testpass123',
+                user_type='venue'
+            ),
+            venue_name='Test Venue',
+            venue_type='Bar',
+            capacity=200,
+            address='123 Test Street'
+        )
+        for i in range(3):
+            Gig.objects.create(
+                title=f'Gig {i}',
+                description='Test description',
+                venue=venue_profile,
+                event_date=timezone.now() + timedelta(days=30),
+                payment_amount=Decimal('500.00'),
+                payment_type='per_gig',
+                experience_level='beginner',
+                status='open' if i else 'cancelled'
+            )
+    
+    @override_settings(COUNT_ESTIMATE_THRESHOLD=10 ** 9)
+    def test_exact_count_is_cached_per_filter_set(self):
+        """Test exact counts are cached and keyed on the filters"""
+        open_gigs = Gig.objects.filter(status='open')
+        self.assertEqual(count_queryset(open_gigs), (2, False))
+        
+        with self.assertNumQueries(0):
+            self.assertEqual(count_queryset(Gig.objects.filter(status='open')), (2, False))
+        
+        self.assertEqual(count_queryset(Gig.objects.all()), (3, False))
+    
+    @override_settings(COUNT_ESTIMATE_THRESHOLD=0)
+    def test_large_counts_use_planner_estimate(self):
+        """Test counts above the threshold come from the planner"""
+        if connection.vendor != 'postgresql':
+            self.skipTest('Planner estimates require PostgreSQL')
+        
+        count, is_estimate = count_queryset(Gig.objects.all())
+        self.assertTrue(is_estimate)
+        self.assertGreaterEqual(count, 0)
+
+
+class GigFullTextSearchTest(TestCase):
+    """Test cases for the PostgreSQL full-text gig search"""
+    
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        if connection.vendor != 'postgresql':
+            self.skipTest('Full-text search requires PostgreSQL')
+        
+        self.venue_user = User.objects.create_user(
+            email='venue@example.com',
+            username='venue',
+            password='testpass123',
+            user_type='venue'
+        )
+        self.venue_profile = VenueProfile.objects.create(
+            user=self.venue_user,
+            venue_name='Blue Note',
+            venue_type='Club',
+            capacity=200,
+            address='123 Test Street'
+        )
+        
+        def create_gig(title, description):
+            return Gig.objects.create(
+                title=title,
+                description=description,
+                venue=self.venue_profile,
+                event_date=timezone.now() + timedelta(days=30),
+                payment_amount=Decimal('500.00'),
+                payment_type='per_gig',
+                experience_level='beginner'
+            )
+        
+        self.jazz_gig = create_gig('Jazz Night', 'Smooth jazz trio wanted')
+        self.mention_gig = create_gig('Friday Covers', 'Covers band, some jazz standards welcome')
+        self.rock_gig = create_gig('Rock Night', 'Loud guitars')
+        
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.venue_user)
+    
+    def test_search_ranks_by_relevance(self):
+        """Test fulltext mode matches stemmed terms and ranks title hits first"""
+        response = self.client.get('/api/gigs/', {'search': 'Jazz', 'search_mode': 'fulltext'})
+        ids = [gig['id'] for gig in response.data['results']]
+        self.assertEqual(ids, [self.jazz_gig.id, self.mention_gig.id])
+        
+        response = self.client.get('/api/search/', {'search': 'jazz'})
+        ids = [gig['id'] for gig in response.data['results']]
+        self.assertEqual(ids, [self.jazz_gig.id, self.mention_gig.id])
+    
+    def test_search_vector_follows_venue_name(self):
+        """Test renaming a venue re-indexes its gigs"""
+        self.assertFalse(Gig.objects.search('Vanguard').exists())
+        
+        self.venue_profile.venue_name = 'Village Vanguard'
+        self.venue_profile.save()
+        
+        self.assertEqual(Gig.objects.search('Vanguard').count(), 3)
+    
+    def test_cursor_pagination_by_relevance(self):
+        """Test relevance ordering works with cursor pagination"""
+        params = {'search': 'jazz', 'cursor': '', 'page_size': 1}
+        first = self.client.get('/api/search/', params)
+        second = self.client.get('/api/search/', {**params, 'cursor': first.data['next_cursor']})
+        
+        self.assertEqual(first.data['results'][0]['id'], self.jazz_gig.id)
+        self.assertEqual(second.data['results'][0]['id'], self.mention_gig.id)
+        self.assertIsNone(second.data['next_cursor'])
+
+
+class GigSearchLocationTest(TestCase):
+    """Test cases for the GigSearchView location filters"""
+    
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.gigs = {}
+        for city, state in [('San Francisco', 'CA'), ('San Diego', 'CA'), ('Austin', 'TX')]:
+            user = User.objects.create_user(
+                email=f'{city}@example.com',
+                username=city,
+                password='testpass123',
+                user_type='venue',
+                city=city,
+                state=state
+            )
+            venue = VenueProfile.objects.create(
+                user=user,
+                venue_name=f'{city} Venue',
+                venue_type='Bar',
+                capacity=200,
+                address='123 Test Street'
+            )
+            self.gigs[city] = Gig.objects.create(
+                title=f'{city} Gig',
+                description='Test description',
+                venue=venue,
+                event_date=timezone.now() + timedelta(days=30),
+                payment_amount=Decimal('500.00'),
+                payment_type='per_gig',
+                experience_level='beginner'
+            )
+        
+        self.client = APIClient()
+        self.client.force_authenticate(user=user)
+    
+    def _search_titles(self, **params):
+        response = self.client.get('/api/search/', params)
+        return sorted(gig['title'] for gig in response.data['results'])
+    
+    def test_city_prefix_is_case_insensitive(self):
+        """Test city filters match normalized prefixes"""
+        self.assertEqual(
+            self._search_titles(city='san'),
+            ['San Diego Gig', 'San Francisco Gig']
+        )
+        self.assertEqual(self._search_titles(city='SAN  francisco'), ['San Francisco Gig'])
+        self.assertEqual(self._search_titles(state='tx'), ['Austin Gig'])
+    
+    def test_city_filter_uses_index(self):
+        """Test the city filter can be served by the prefix index"""
+        if connection.vendor != 'postgresql':
+            self.skipTest('EXPLAIN output is PostgreSQL specific')
+        
+        queryset = VenueProfile.objects.filter(city_normalized__startswith='san')
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        self.assertIn('venue_city_norm_prefix_idx', queryset.explain())
+
+
+class GigTagArrayTest(TestCase):
+    """Test cases for the array-backed genre and instrument tags"""
+    
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        venue_user = User.objects.create_user(
+            email='venue@example.com',
+            username='venue',
+            password='testpass123',
+            user_type='venue'
+        )
+        venue_profile = VenueProfile.objects.create(
+            user=venue_user,
+            venue_name='Test Venue',
+            venue_type='Bar',
+            capacity=200,
+            address='123 Test Street'
+        )
+        for title, genres in [('Jazz Gig', ['jazz', 'blues']), ('Rock Gig', ['rock'])]:
+            Gig.objects.create(
+                title=title,
+                description='Test description',
+                venue=venue_profile,
+                event_date=timezone.now() + timedelta(days=30),
+                genres=genres,
+                instruments_needed=['guitar'],
+                payment_amount=Decimal('500.00'),
+                payment_type='per_gig',
+                experience_level='beginner'
+            )
+        
+        self.client = APIClient()
+        self.client.force_authenticate(user=venue_user)
+    
+    def test_search_genre_overlap(self):
+        """Test the genres filter matches any overlapping genre"""
+        response = self.client.get('/api/search/', {'genres': ['blues', 'folk']})
+        self.assertEqual([gig['title'] for gig in response.data['results']], ['Jazz Gig'])
+    
+    def test_overlap_uses_gin_index(self):
+        """Test overlap filters can be served by the GIN indexes"""
+        if connection.vendor != 'postgresql':
+            self.skipTest('EXPLAIN output is PostgreSQL specific')
+        
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        self.assertIn('gig_genres_gin', Gig.objects.filter(genres__overlap=['jazz']).explain())
+        self.assertIn(
+            'musician_instruments_gin',
+            MusicianProfile.objects.filter(instruments__overlap=['guitar']).explain()
+        )
+
+
+class GigIndexUsageTest(TestCase):
+    """EXPLAIN-based checks that the hot gig queries use their indexes"""
+    
+    def setUp(self):
+        """Set up test data"""
+        if connection.vendor != 'postgresql':
+            self.skipTest('EXPLAIN output is PostgreSQL specific')
+        
+        self.venue_profile = VenueProfile.objects.create(
+            user=User.objects.create_user(
+                email='venue@example.com',
+                username='venue',
+                password='testpass123',
+                user_type='venue'
+            ),
+            venue_name='Test Venue',
+            venue_type='Bar',
+            capacity=200,
+            address='123 Test Street'
+        )
+        self.musician_profile = MusicianProfile.objects.create(
+            user=User.objects.create_user(
+                email='musician@example.com',
+                username='musician',
+                password='testpass123',
+                user_type='musician'
+            ),
+            primary_instrument='Guitar'
+        )
+        self.gig = Gig.objects.create(
+            title='Test Gig',
+            description='Test description',
+            venue=self.venue_profile,
+            event_date=timezone.now() + timedelta(days=30),
+            payment_amount=Decimal('500.00'),
+            payment_type='per_gig',
+            experience_level='beginner'
+        )
+        
+        # The test tables are tiny, so make sequential scans unattractive
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('ANALYZE gigs_gig, gigs_gigapplication')
+    
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, f'{index_name} not used:\n{plan}')
+    
+    def test_open_gig_sort_orders(self):
+        """Test each GigSearchView sort order is served by a partial index"""
+        open_gigs = Gig.objects.filter(status='open')
+        self.assertUsesIndex(
+            open_gigs.order_by('-event_date', '-id')[:20], 'gig_open_event_date_idx'
+        )
+        self.assertUsesIndex(
+            open_gigs.order_by('event_date', 'id')[:20], 'gig_open_event_date_idx'
+        )
+        self.assertUsesIndex(
+            open_gigs.order_by('-payment_amount', '-id')[:20], 'gig_open_payment_idx'
+        )
+        self.assertUsesIndex(
+            open_gigs.order_by('-created_at', '-id')[:20], 'gig_open_created_idx'
+        )
+    
+    def test_venue_and_status_listings(self):
+        """Test venue owner listings and status filters"""
+        self.assertUsesIndex(
+            Gig.objects.filter(venue=self.venue_profile).order_by('-event_date')[:20],
+            'gig_venue_event_date_idx'
+        )
+        self.assertUsesIndex(
+            Gig.objects.filter(status='confirmed').order_by('-event_date')[:20],
+            'gig_status_event_date_idx'
+        )
+    
+    def test_application_listings(self):
+        """Test musician and gig application lookups"""
+        applications = GigApplication.objects.filter(musician=self.musician_profile)
+        self.assertUsesIndex(
+            applications.order_by('-applied_at')[:20], 'gigapp_musician_applied_idx'
+        )
+        self.assertUsesIndex(
+            applications.filter(status='pending').order_by('-applied_at')[:20],
+            'gigapp_musician_status_idx'
+        )
+        self.assertUsesIndex(
+            GigApplication.objects.filter(gig=self.gig, status='pending'),
+            'gigapp_gig_status_idx'
+        )
+
+
+class GigListFieldSelectionTest(TestCase):
+    """Test cases for the ?fields= / ?expand= list contract"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.venue_user = User.objects.create_user(
+            email='venue@example.com',
+            username='venue',
+            password='testpass123',
+            user_type='venue',
+            city='Austin'
+        )
+        venue_profile = VenueProfile.objects.create(
+            user=self.venue_user,
+            venue_name='Test Venue',
+            venue_type='Bar',
+            capacity=200,
+            address='123 Test Street'
+        )
+        gig = Gig.objects.create(
+            title='Test Gig',
+            description='Test description',
+            venue=venue_profile,
+            event_date=timezone.now() + timedelta(days=30),
+            payment_amount=Decimal('500.00'),
+            payment_type='per_gig',
+            experience_level='beginner'
+        )
+        GigApplication.objects.create(
+            gig=gig,
+            musician=MusicianProfile.objects.create(
+                user=User.objects.create_user(
+                    email='musician@example.com',
+                    username='musician',
+                    password='testpass123',
+                    user_type='musician',
+                    first_name='Jane',
+                    last_name='Doe'
+                ),
+                primary_instrument='Guitar'
+            ),
+            cover_letter='Hi'
+        )
+        
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.venue_user)
+    
+    def test_compact_list_by_default(self):
+        """Test lists render flat venue columns instead of nested objects"""
+        gig = self.client.get('/api/gigs/').data['results'][0]
+        self.assertNotIn('venue', gig)
+        self.assertNotIn('description', gig)
+        self.assertEqual(gig['venue_name'], 'Test Venue')
+        self.assertEqual(gig['city'], 'Austin')
+        self.assertEqual(gig['applications_count'], 1)
+        
+        application = self.client.get('/api/applications/').data['results'][0]
+        self.assertEqual(application['gig_title'], 'Test Gig')
+        self.assertEqual(application['musician_name'], 'Jane Doe')
+    
+    def test_fields_limit_columns_and_output(self):
+        """Test ?fields= limits both the response and the SELECT list"""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/gigs/', {'fields': 'title,bogus'})
+        
+        self.assertEqual(set(response.data['results'][0]), {'id', 'title'})
+        gig_select = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT "gigs_gig"."id"')
+        ][0]
+        self.assertNotIn('"description"', gig_select)
+        self.assertNotIn('"users_user"', gig_select)
+    
+    def test_gig_title_prefetches_title_only(self):
+        """Test application lists fetch only the gig title unless the gig is expanded"""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/applications/', {'fields': 'gig_title'})
+        
+        self.assertEqual(response.data['results'][0]['gig_title'], 'Test Gig')
+        gig_select = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT "gigs_gig"."id"')
+        ][0]
+        self.assertNotIn('"description"', gig_select)
+        self.assertNotIn('"users_venueprofile"', gig_select)
+        self.assertNotIn('COUNT(', gig_select)
+    
+    def test_expand_nests_full_objects(self):
+        """Test ?expand= renders nested serializers for the named relations"""
+        gig = self.client.get('/api/gigs/', {'expand': 'venue'}).data['results'][0]
+        self.assertEqual(gig['venue']['user']['city'], 'Austin')
+        
+        response = self.client.get(
+            '/api/applications/', {'fields': 'status', 'expand': 'gig,musician'}
+        )
+        application = response.data['results'][0]
+        self.assertEqual(set(application), {'id', 'status', 'gig', 'musician'})
+        self.assertEqual(application['gig']['applications_count'], 1)
+        self.assertEqual(application['musician']['user']['first_name'], 'Jane')
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class GigResponseCacheTest(TestCase):
+    """Test cases for the generation-versioned gig response cache"""
+    
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        venue_user = User.objects.create_user(
+            email='venue@example.com',
+            username='venue',
+            password='testpass123',
+            user_type='venue'
+        )
+        self.venue_profile = VenueProfile.objects.create(
+            user=venue_user,
+            venue_name='Test Venue',
+            venue_type='Bar',
+            capacity=200,
+            address='123 Test Street'
+        )
+        self.gig = self._create_gig('First Gig')
+        
+        musician_user = User.objects.create_user(
+            email='musician@example.com',
+            username='musician',
+            password='testpass123',
+            user_type='musician'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=musician_user)
+        self.venue_client = APIClient()
+        self.venue_client.force_authenticate(user=venue_user)
+    
+    def _create_gig(self, title):
+        """Create an open gig and commit it"""
+        with self.captureOnCommitCallbacks(execute=True):
+            return Gig.objects.create(
+                title=title,
+                description='Test description',
+                venue=self.venue_profile,
+                event_date=timezone.now() + timedelta(days=30),
+                payment_amount=Decimal('500.00'),
+                payment_type='per_gig',
+                experience_level='beginner'
+            )
+    
+    def _get(self, client, url, params):
+        """Return ``(response, query count)`` for a GET request"""
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(context.captured_queries)
+    
+    def test_search_is_cached_on_normalized_params(self):
+        """Test equivalent searches are served from the cache"""
+        first, queries = self._get(
+            self.client, '/api/search/', {'min_payment': '100', 'experience_level': 'beginner'}
+        )
+        self.assertGreater(queries, 0)
+        
+        second, queries = self._get(
+            self.client, '/api/search/', {'experience_level': 'beginner', 'min_payment': ' 100 '}
+        )
+        self.assertEqual(queries, 0)
+        self.assertEqual(second.data, first.data)
+    
+    def test_gig_changes_invalidate_cached_responses(self):
+        """Test saving, creating and cancelling gigs retires cached responses"""
+        self.assertEqual(self.client.get('/api/search/').data['count'], 1)
+        
+        self._create_gig('Second Gig')
+        self.assertEqual(self.client.get('/api/search/').data['count'], 2)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.gig.status = 'cancelled'
+            self.gig.save()
+        self.assertEqual(self.client.get('/api/search/').data['count'], 1)
+    
+    def test_only_shared_listings_are_cached(self):
+        """Test GigViewSet.list caches the open listing but not per-user ones"""
+        self._get(self.client, '/api/gigs/', {'status': 'open'})
+        _, queries = self._get(self.client, '/api/gigs/', {'status': 'open'})
+        self.assertEqual(queries, 0)
+        
+        self._get(self.venue_client, '/api/gigs/', {'status': 'open'})
+        _, queries = self._get(self.venue_client, '/api/gigs/', {'status': 'open'})
+        self.assertGreater(queries, 0)
+        
+        self._get(self.client, '/api/gigs/', {})
+        _, queries = self._get(self.client, '/api/gigs/', {})
+        self.assertGreater(queries, 0)
+
+
+class GigConditionalGetTest(TestCase):
+    """Test cases for ETag support on gig resources"""
+    
+    def setUp(self):
+        """Set up test data"""
+        venue_user = User.objects.create_user(
+            email='venue@example.com',
+            username='venue',
+            password='testpass123',
+            user_type='venue'
+        )
+        venue_profile = VenueProfile.objects.create(
+            user=venue_user,
+            venue_name='Test Venue',
+            venue_type='Bar',
+            capacity=200,
+            address='123 Test Street'
+        )
+        self.gig = Gig.objects.create(
+            title='Test Gig',
+            description='Test description',
+            venue=venue_profile,
+            event_date=timezone.now() + timedelta(days=30),
+            payment_amount=Decimal('500.00'),
+            payment_type='per_gig',
+            experience_level='beginner'
+        )
+        self.musician_profile = MusicianProfile.objects.create(
+            user=User.objects.create_user(
+                email='musician@example.com',
+                username='musician',
+                password='testpass123',
+                user_type='musician'
+            ),
+            primary_instrument='Guitar'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=venue_user)
+        self.url = f'/api/gigs/{self.gig.pk}/'
+    
+    def test_not_modified_skips_loading_the_gig(self):
+        """Test a matching If-None-Match is answered by one cheap query"""
+        etag = self.client.get(self.url)['ETag']
+        
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"other", {etag}')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(context.captured_queries), 1)
+    
+    def test_etag_changes_with_rendered_data(self):
+        """Test new applications and venue edits change the gig ETag"""
+        etag = self.client.get(self.url)['ETag']
+        
+        GigApplication.objects.create(
+            gig=self.gig, musician=self.musician_profile, cover_letter='Hi'
+        )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['applications_count'], 1)
+        
+        etag = response['ETag']
+        self.gig.venue.venue_name = 'Renamed Venue'
+        self.gig.venue.save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+    
+    def test_my_gigs_conditional_get(self):
+        """Test /api/my-gigs/ supports If-None-Match for both user types"""
+        etag = self.client.get('/api/my-gigs/')['ETag']
+        response = self.client.get('/api/my-gigs/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        
+        self.client.force_authenticate(user=self.musician_profile.user)
+        application = GigApplication.objects.create(
+            gig=self.gig, musician=self.musician_profile, cover_letter='Hi'
+        )
+        etag = self.client.get('/api/my-gigs/')['ETag']
+        self.assertEqual(
+            self.client.get('/api/my-gigs/', HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+        
+        application.status = 'accepted'
+        application.save()
+        self.assertEqual(
+            self.client.get('/api/my-gigs/', HTTP_IF_NONE_MATCH=etag).status_code, 200
+        )
+
+
+class OpenGigFeedTest(TestCase):
+    """Test cases for the incrementally maintained open gig feed"""
+    
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.venue_user = User.objects.create_user(
+            email='venue@example.com',
+            username='venue',
+            password='testpass123',
+            user_type='venue',
+            city='Austin',
+            state='TX'
+        )
+        self.venue_profile = VenueProfile.objects.create(
+            user=self.venue_user,
+            venue_name='Test Venue',
+            venue_type='Bar',
+            capacity=200,
+            address='123 Test Street'
+        )
+        self.gig = self._create_gig('Jazz Night')
+        
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.venue_user)
+    
+    def _create_gig(self, title, **kwargs):
+        """Create an open gig at the test venue"""
+        return Gig.objects.create(
+            title=title,
+            description='Test description',
+            venue=self.venue_profile,
+            event_date=timezone.now() + timedelta(days=30),
+            payment_amount=Decimal('500.00'),
+            payment_type='per_gig',
+            experience_level='beginner',
+            genres=['jazz'],
+            **kwargs
+        )
+    
+    def test_entry_follows_gig_lifecycle(self):
+        """Test gigs enter the feed when open and leave it when cancelled"""
+        entry = OpenGigFeed.objects.get(gig=self.gig)
+        self.assertEqual(entry.venue_name, 'Test Venue')
+        self.assertEqual(entry.city_normalized, 'austin')
+        self.assertEqual(entry.genres, ['jazz'])
+        
+        self.gig.payment_amount = Decimal('750.00')
+        self.gig.save()
+        entry.refresh_from_db()
+        self.assertEqual(entry.payment_amount, Decimal('750.00'))
+        
+        self.gig.status = 'cancelled'
+        self.gig.save()
+        self.assertFalse(OpenGigFeed.objects.filter(gig=self.gig).exists())
+    
+    def test_entry_follows_venue_and_applications(self):
+        """Test venue, location and application changes reach the feed"""
+        self.venue_profile.venue_name = 'Renamed Venue'
+        self.venue_profile.save()
+        self.venue_user.city = 'Dallas'
+        self.venue_user.save()
+        musician = MusicianProfile.objects.create(
+            user=User.objects.create_user(
+                email='musician@example.com',
+                username='musician',
+                password='testpass123',
+                user_type='musician'
+            ),
+            primary_instrument='Guitar'
+        )
+        application = GigApplication.objects.create(
+            gig=self.gig, musician=musician, cover_letter='Hi'
+        )
+        
+        entry = OpenGigFeed.objects.get(gig=self.gig)
+        self.assertEqual(entry.venue_name, 'Renamed Venue')
+        self.assertEqual(entry.city, 'Dallas')
+        self.assertEqual(entry.city_normalized, 'dallas')
+        self.assertEqual(entry.applications_count, 1)
+        
+        application.delete()
+        entry.refresh_from_db()
+        self.assertEqual(entry.applications_count, 0)
+    
+    def test_search_reads_only_the_feed(self):
+        """Test GigSearchView skips closed deadlines without joining other tables"""
+        self._create_gig('Expired', deadline=timezone.now() - timedelta(days=1))
+        
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/search/', {'search': 'jazz'})
+        
+        self.assertEqual([gig['id'] for gig in response.data['results']], [self.gig.id])
+        self.assertEqual(response.data['results'][0]['venue_name'], 'Test Venue')
+        self.assertEqual(response.data['results'][0]['status'], 'open')
+        for query in context.captured_queries:
+            self.assertNotIn('JOIN', query['sql'])
+    
+    def test_rebuild(self):
+        """Test rebuild() recreates the feed from the gigs table"""
+        OpenGigFeed.objects.all().delete()
+        self._create_gig('Cancelled', status='cancelled')
+        
+        OpenGigFeed.rebuild()
+        self.assertEqual(
+            list(OpenGigFeed.objects.values_list('gig_id', flat=True)), [self.gig.id]
+        )
+
+
+class GigGeoSearchTest(TestCase):
+    """Test cases for distance filtering on venue coordinates"""
+    
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.gigs = {}
+        # Austin, Round Rock (~17 miles) and Dallas (~182 miles)
+        for name, lat, lng in [
+            ('Austin', '30.267153', '-97.743061'),
+            ('Round Rock', '30.508255', '-97.678896'),
+            ('Dallas', '32.776664', '-96.796988'),
+        ]:
+            user = User.objects.create_user(
+                email=f'{name.replace(" ", "")}@example.com',
+                username=name,
+                password='testpass123',
+                user_type='venue'
+            )
+            venue = VenueProfile.objects.create(
+                user=user,
+                venue_name=f'{name} Venue',
+                venue_type='Bar',
+                capacity=200,
+                address='123 Test Street',
+                latitude=Decimal(lat),
+                longitude=Decimal(lng)
+            )
+            self.gigs[name] = Gig.objects.create(
+                title=f'{name} Gig',
+                description='Test description',
+                venue=venue,
+                event_date=timezone.now() + timedelta(days=30),
+                payment_amount=Decimal('500.00'),
+                payment_type='per_gig',
+                experience_level='beginner'
+            )
+        
+        self.client = APIClient()
+        self.client.force_authenticate(user=user)
+    
+    def test_haversine_miles(self):
+        """Test vectorized distances against a known value"""
+        distances = haversine_miles(
+            30.267153, -97.743061, [30.267153, 32.776664], [-97.743061, -96.796988]
+        )
+        self.assertAlmostEqual(distances[0], 0)
+        self.assertAlmostEqual(distances[1], 182, delta=2)
+    
+    def test_bounding_box_wraps_antimeridian(self):
+        """Test boxes crossing 180 degrees match both sides"""
+        feed = OpenGigFeed.objects.all()
+        self.assertEqual(feed.filter(bounding_box_q(0, 179.9, 50)).count(), 0)
+        self.assertIn('OR', str(feed.filter(bounding_box_q(0, 179.9, 50)).query))
+    
+    def test_near_filter(self):
+        """Test ?near=&radius= keeps only gigs inside the circle"""
+        response = self.client.get('/api/search/', {'near': '30.267153,-97.743061', 'radius': 20})
+        self.assertEqual(
+            {gig['id'] for gig in response.data['results']},
+            {self.gigs['Austin'].id, self.gigs['Round Rock'].id}
+        )
+        
+        response = self.client.get('/api/search/', {'near': '30.267153,-97.743061', 'radius': 5})
+        self.assertEqual([gig['id'] for gig in response.data['results']], [self.gigs['Austin'].id])
+    
+    def test_invalid_near(self):
+        """Test malformed coordinates are rejected"""
+        response = self.client.get('/api/search/', {'near': 'austin'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('near', response.data)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class OpenGigIndexTest(TestCase):
+    """Test cases for the in-memory open gig inverted index"""
+    
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        venue_user = User.objects.create_user(
+            email='venue@example.com',
+            username='venue',
+            password='testpass123',
+            user_type='venue'
+        )
+        self.venue_profile = VenueProfile.objects.create(
+            user=venue_user,
+            venue_name='Test Venue',
+            venue_type='Bar',
+            capacity=200,
+            address='123 Test Street'
+        )
+        self.jazz_piano = self._create_gig(['jazz'], ['piano'])
+        self.jazz_drums = self._create_gig(['jazz', 'blues'], ['drums'])
+        self.rock_drums = self._create_gig(['rock'], ['drums'])
+        self.index = OpenGigIndex()
+    
+    def _create_gig(self, genres, instruments, status='open'):
+        """Create a gig with the given tags"""
+        return Gig.objects.create(
+            title='Test Gig',
+            description='Test description',
+            venue=self.venue_profile,
+            event_date=timezone.now() + timedelta(days=30),
+            payment_amount=Decimal('500.00'),
+            payment_type='per_gig',
+            experience_level='beginner',
+            genres=genres,
+            instruments_needed=instruments,
+            status=status
+        )
+    
+    def test_candidates_union_within_and_intersection_across_facets(self):
+        """Test any-of matching per facet and all-of across facets"""
+        self.assertEqual(
+            self.index.candidates(genres=['blues', 'rock']).tolist(),
+            [self.jazz_drums.id, self.rock_drums.id]
+        )
+        self.assertEqual(
+            self.index.candidates(genres=['jazz'], instruments=['drums']).tolist(),
+            [self.jazz_drums.id]
+        )
+        self.assertEqual(self.index.candidates(genres=['polka']).tolist(), [])
+        self.assertEqual(len(self.index.candidates()), 3)
+    
+    def test_patched_from_change_log(self):
+        """Test committed gig changes are patched in without a rebuild"""
+        self.index.refresh()
+        with self.captureOnCommitCallbacks(execute=True):
+            polka = self._create_gig(['polka'], ['drums'])
+            self._create_gig(['polka'], [], status='cancelled')
+            self.rock_drums.genres = ['punk']
+            self.rock_drums.save()
+            self.jazz_piano.delete()
+        
+        with mock.patch.object(OpenGigIndex, '_build') as build:
+            self.assertEqual(self.index.candidates(genres=['polka']).tolist(), [polka.id])
+            self.assertEqual(self.index.candidates(genres=['rock']).tolist(), [])
+            self.assertEqual(
+                self.index.candidates(genres=['punk'], instruments=['drums']).tolist(),
+                [self.rock_drums.id]
+            )
+            self.assertEqual(self.index.candidates(instruments=['piano']).tolist(), [])
+            self.assertEqual(len(self.index.candidates()), 3)
+        build.assert_not_called()
+    
+    def test_rebuilt_when_change_log_is_lost(self):
+        """Test a gap in the change log falls back to a rebuild"""
+        self.index.refresh()
+        polka = self._create_gig(['polka'], [])
+        cache.delete(INDEX_SEQUENCE_KEY)
+        self.assertEqual(self.index.candidates(genres=['polka']).tolist(), [polka.id])
+    
+    def test_sequence_is_exact_in_lua(self):
+        """Test a fresh sequence stays within the integers a double holds (django-redis incr)"""
+        cache.delete(INDEX_SEQUENCE_KEY)
+        self.assertLess(get_change_sequence() + 10 ** 6, 2 ** 53)
+    
+    def test_filter_queryset_falls_back_to_sql(self):
+        """Test large candidate sets use the SQL overlap filter instead of IN"""
+        queryset = Gig.objects.all()
+        small = self.index.filter_queryset(queryset, genres=['jazz'])
+        large = self.index.filter_queryset(queryset, genres=['jazz'], max_ids=1)
+        
+        self.assertIn(' IN (', str(small.query))
+        self.assertNotIn(' IN (', str(large.query))
+        self.assertEqual(set(small), set(large))
@@ -2,24 +2,33 @@ from rest_framework import generics, status, permissions, filters
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.viewsets import ModelViewSet
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
 from django.db.models import Q
 from django.utils import timezone
-from .models import Gig, GigApplication
+from .models import Gig, GigApplication, OpenGigFeed
+from .filters import GigOrderingFilter, GigSearchFilter
+from .geo import distances_within, parse_point
+from .index import open_gig_index
+from .cache import cached_gig_response, get_gig_generation
+from .pagination import GigKeysetPagination
 from .serializers import (
-    GigSerializer, GigCreateSerializer, GigApplicationSerializer,
-    GigApplicationCreateSerializer, GigApplicationUpdateSerializer
+    GigSerializer, GigListSerializer, GigCreateSerializer, GigApplicationSerializer,
+    GigApplicationListSerializer, GigApplicationCreateSerializer,
+    GigApplicationUpdateSerializer, OpenGigFeedSerializer
 )
-from users.models import MusicianProfile, VenueProfile
+from users.models import MusicianProfile, VenueProfile, normalize_location
+from gig_router.conditional import conditional_response
+from gig_router.pagination import count_queryset
 
 class GigViewSet(ModelViewSet):
     """ViewSet for Gig CRUD operations"""
     
     queryset = Gig.objects.all()
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, GigSearchFilter, GigOrderingFilter]
     filterset_fields = ['status','experience_level', 'payment_type']
     search_fields = ['title', 'description', 'venue__venue_name']
     ordering_fields = ['event_date', 'created_at', 'payment_amount']
@@ -29,11 +38,13 @@ class GigViewSet(ModelViewSet):
         """Return appropriate serializer based on action"""
         if self.action == 'create':
             return GigCreateSerializer
+        if self.action == 'list':
+            return GigListSerializer
         return GigSerializer
     
     def get_queryset(self):
         """Filter gigs based on user type and permissions"""
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().for_serializer()
         
         # Filter by user type
         if self.request.user.is_musician:
@@ -46,8 +57,34 @@ class GigViewSet(ModelViewSet):
             # Venue owners see their own gigs
             queryset = queryset.filter(venue__user=self.request.user)
         
+        if self.action == 'list':
+            queryset = GigListSerializer.restrict_queryset(
+                queryset, self.request, required=self.ordering_fields
+            )
         return queryset
     
+    def list(self, request, *args, **kwargs):
+        """List gigs, serving the shared open-gig listing from the cache"""
+        if not self._is_open_listing(request):
+            return super().list(request, *args, **kwargs)
+        
+        build = lambda: super(GigViewSet, self).list(request, *args, **kwargs).data
+        return Response(cached_gig_response('list', request, build))
+    
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve a gig, answering If-None-Match with 304 when it is unchanged"""
+        lookup = {self.lookup_field: self.kwargs[self.lookup_url_kwarg or self.lookup_field]}
+        versions = self.filter_queryset(self.get_queryset()).filter(**lookup).versions()
+        if not versions:
+            return super().retrieve(request, *args, **kwargs)
+        
+        build = lambda: super(GigViewSet, self).retrieve(request, *args, **kwargs)
+        return conditional_response(request, versions, build)
+    
+    def _is_open_listing(self, request):
+        """Whether the listing is the open gigs every musician sees alike"""
+        return request.user.is_musician and request.query_params.get('status') == 'open'
+    
     def perform_create(self, serializer):
         """Create gig and set venue"""
         venue_id = serializer.validated_data['venue_id']
@@ -118,7 +155,7 @@ class GigViewSet(ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        applications = gig.applications.all()
+        applications = GigApplication.objects.filter(gig=gig).for_serializer()
         serializer = GigApplicationSerializer(applications, many=True)
         return Response(serializer.data)
     
@@ -169,21 +206,25 @@ class GigApplicationViewSet(ModelViewSet):
             return GigApplicationCreateSerializer
         elif self.action in ['update', 'partial_update']:
             return GigApplicationUpdateSerializer
+        elif self.action == 'list':
+            return GigApplicationListSerializer
         return GigApplicationSerializer
     
     def get_queryset(self):
         """Filter applications based on user type"""
+        queryset = GigApplication.objects.for_serializer()
+        if self.action == 'list':
+            queryset = GigApplicationListSerializer.restrict_queryset(
+                queryset, self.request, required=self.ordering_fields
+            )
+        
         if self.request.user.is_musician:
             # Musicians see their own applications
-            return GigApplication.objects.filter(
-                musician__user=self.request.user
-            )
+            return queryset.filter(musician__user=self.request.user)
         elif self.request.user.is_venue_owner:
             # Venue owners see applications to their gigs
-            return GigApplication.objects.filter(
-                gig__venue__user=self.request.user
-            )
-        return GigApplication.objects.none()
+            return queryset.filter(gig__venue__user=self.request.user)
+        return queryset.none()
     
     def perform_create(self, serializer):
         """Create application"""
@@ -274,18 +315,43 @@ class GigSearchView(APIView):
     """Advanced gig search with filters"""
     
     permission_classes = [permissions.IsAuthenticated]
+    page_size = 20
+    max_page_size = 100
+    default_radius = 25  # miles
+    max_radius = 500
+    
+    # sort_by value -> keyset ordering (sort field plus id tie-breaker)
+    SORT_ORDERINGS = {
+        'event_date': ('-event_date', '-pk'),
+        'payment': ('-payment_amount', '-pk'),
+        'date': ('event_date', 'pk'),
+        'created': ('-created_at', '-pk'),
+        'relevance': ('-search_rank', '-pk'),
+    }
     
     def get(self, request):
         """Search gigs with advanced filters"""
-        queryset = Gig.objects.filter(status='open')
+        # Results do not depend on the user, so they are shared between users
+        return Response(cached_gig_response('search', request, lambda: self._search(request)))
+    
+    def _search(self, request):
+        """Build the search response data for `request`"""
+        # Open gigs still accepting applications, from the flattened feed table
+        queryset = OpenGigFeed.objects.applicable()
+        
+        # Full-text search
+        search = request.query_params.get('search', '').strip()
+        if search:
+            queryset = queryset.search(search)
         
         # Location filter
         city = request.query_params.get('city')
         state = request.query_params.get('state')
+        # Prefix match on the indexed, normalized location columns
         if city:
-            queryset = queryset.filter(venue__user__city__icontains=city)
+            queryset = queryset.filter(city_normalized__startswith=normalize_location(city))
         if state:
-            queryset = queryset.filter(venue__user__state__icontains=state)
+            queryset = queryset.filter(state_normalized__startswith=normalize_location(state))
         
         # Date filters
         date_from = request.query_params.get('date_from')
@@ -306,37 +372,83 @@ class GigSearchView(APIView):
         # Genre filter
         genres = request.query_params.getlist('genres')
         if genres:
-            queryset = queryset.filter(genres__overlap=genres)
+            queryset = open_gig_index.filter_queryset(queryset, genres=genres)
         
         # Experience level filter
         experience_level = request.query_params.get('experience_level')
         if experience_level:
             queryset = queryset.filter(experience_level=experience_level)
         
+        # Distance filter (?near=lat,lng&radius=miles)
+        near = request.query_params.get('near')
+        if near:
+            queryset = self._filter_near(queryset, request, near)
+        
         # Sort by
-        sort_by = request.query_params.get('sort_by', 'event_date')
-        if sort_by == 'payment':
-            queryset = queryset.order_by('-payment_amount')
-        elif sort_by == 'date':
-            queryset = queryset.order_by('event_date')
-        elif sort_by == 'created':
-            queryset = queryset.order_by('-created_at')
-        
-        # Pagination
-        page_size = int(request.query_params.get('page_size', 20))
-        page = int(request.query_params.get('page', 1))
+        sort_by = request.query_params.get('sort_by', 'relevance' if search else 'event_date')
+        if sort_by == 'relevance' and not search:
+            sort_by = 'event_date'
+        ordering = self.SORT_ORDERINGS.get(sort_by, self.SORT_ORDERINGS['event_date'])
+        page_size = self._get_int_param(request, 'page_size', self.page_size, self.max_page_size)
+        
+        # Cursor pagination (constant cost per page, no total count)
+        if 'cursor' in request.query_params:
+            paginator = GigKeysetPagination(ordering)
+            gigs, next_cursor = paginator.paginate_queryset(
+                self._restrict(queryset, request, ordering),
+                request.query_params.get('cursor'),
+                page_size
+            )
+            serializer = OpenGigFeedSerializer(gigs, many=True, context={'request': request})
+            
+            return {
+                'results': serializer.data,
+                'next_cursor': next_cursor,
+                'page_size': page_size
+            }
+        
+        # Page number pagination
+        queryset = queryset.order_by(*ordering)
+        page = self._get_int_param(request, 'page', 1)
         start = (page - 1) * page_size
         end = start + page_size
         
-        gigs = queryset[start:end]
-        serializer = GigSerializer(gigs, many=True)
+        gigs = self._restrict(queryset, request, ordering)[start:end]
+        serializer = OpenGigFeedSerializer(gigs, many=True, context={'request': request})
         
-        return Response({
+        count, count_is_estimate = count_queryset(queryset, version=get_gig_generation())
+        
+        return {
             'results': serializer.data,
-            'count': queryset.count(),
+            'count': count,
+            'count_is_estimate': count_is_estimate,
             'page': page,
             'page_size': page_size
-        })
+        }
+    
+    def _filter_near(self, queryset, request, near):
+        """Keep gigs within ?radius= miles of ?near= (bounding box, then exact distance)"""
+        try:
+            lat, lng = parse_point(near)
+        except ValueError as exc:
+            raise ValidationError({'near': [str(exc)]})
+        radius = self._get_int_param(request, 'radius', self.default_radius, self.max_radius)
+        distances = distances_within(queryset, lat, lng, radius)
+        return queryset.filter(pk__in=list(distances))
+    
+    def _restrict(self, queryset, request, ordering):
+        """Load only what the requested OpenGigFeedSerializer fields and `ordering` need"""
+        required = [field.lstrip('-') for field in ordering]
+        return OpenGigFeedSerializer.restrict_queryset(queryset, request, required=required)
+    
+    def _get_int_param(self, request, name, default, maximum=None):
+        """Read a positive integer query param, clamped to `maximum`"""
+        try:
+            value = int(request.query_params.get(name, default))
+        except (TypeError, ValueError):
+            value = default
+        value = max(value, 1)
+        return min(value, maximum) if maximum else value
 
 class MyGigsView(APIView):
     """Get user's gigs (created or applied to)"""
@@ -347,28 +459,30 @@ class MyGigsView(APIView):
         """Get user's gigs"""
         if request.user.is_venue_owner:
             # Venue owner's created gigs
-            gigs = Gig.objects.filter(venue__user=request.user)
-            serializer = GigSerializer(gigs, many=True)
-            return Response({
-                'created_gigs': serializer.data
+            gigs = Gig.objects.filter(
+                venue__user=request.user
+            ).for_serializer()
+            build = lambda: Response({
+                'created_gigs': GigSerializer(gigs, many=True).data
             })
+            return conditional_response(request, gigs.versions(), build)
         
         elif request.user.is_musician:
             # Musician's applications
             applications = GigApplication.objects.filter(
                 musician__user=request.user
-            )
-            application_serializer = GigApplicationSerializer(applications, many=True)
+            ).for_serializer()
             
             # Gigs they've applied to
             applied_gigs = Gig.objects.filter(
                 applications__musician__user=request.user
-            ).distinct()
-            gig_serializer = GigSerializer(applied_gigs, many=True)
+            ).distinct().for_serializer()
             
-            return Response({
-                'applications': application_serializer.data,
-                'applied_gigs': gig_serializer.data
+            build = lambda: Response({
+                'applications': GigApplicationSerializer(applications, many=True).data,
+                'applied_gigs': GigSerializer(applied_gigs, many=True).data
             })
+            version = [applications.versions(), applied_gigs.versions()]
+            return conditional_response(request, version, build)
         
         return Response({'error': 'Invalid user type.'}, status=status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,45 @@
+from django.db import migrations, models
+
+
+def normalize_location(value):
+    return ' '.join((value or '').casefold().split())
+
+
+def populate_location(apps, schema_editor):
+    VenueProfile = apps.get_model('users', 'VenueProfile')
+    venues = list(VenueProfile.objects.select_related('user'))
+    for venue in venues:
+        venue.city_normalized = normalize_location(venue.user.city)
+        venue.state_normalized = normalize_location(venue.user.state)
+    VenueProfile.objects.bulk_update(
+        venues, ['city_normalized', 'state_normalized'], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_remove_user_notification_preferences_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='venueprofile',
+            name='city_normalized',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='venueprofile',
+            name='state_normalized',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='venueprofile',
+            index=models.Index(fields=['city_normalized'], name='venue_city_norm_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='venueprofile',
+            index=models.Index(fields=['state_normalized'], name='venue_state_norm_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.RunPython(populate_location, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,82 @@
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+def json_to_array(value):
+    if not isinstance(value, list):
+        return []
+    return [str(item) for item in value if item not in (None, '')]
+
+
+def copy_tags_to_arrays(apps, schema_editor):
+    MusicianProfile = apps.get_model('users', 'MusicianProfile')
+    batch = []
+    for profile in MusicianProfile.objects.only('genres', 'instruments').iterator(chunk_size=1000):
+        profile.genres_array = json_to_array(profile.genres)
+        profile.instruments_array = json_to_array(profile.instruments)
+        batch.append(profile)
+        if len(batch) >= 1000:
+            MusicianProfile.objects.bulk_update(batch, ['genres_array', 'instruments_array'])
+            batch = []
+    MusicianProfile.objects.bulk_update(batch, ['genres_array', 'instruments_array'])
+
+
+def copy_arrays_to_tags(apps, schema_editor):
+    MusicianProfile = apps.get_model('users', 'MusicianProfile')
+    batch = []
+    for profile in MusicianProfile.objects.only('genres_array', 'instruments_array').iterator(chunk_size=1000):
+        profile.genres = list(profile.genres_array)
+        profile.instruments = list(profile.instruments_array)
+        batch.append(profile)
+        if len(batch) >= 1000:
+            MusicianProfile.objects.bulk_update(batch, ['genres', 'instruments'])
+            batch = []
+    MusicianProfile.objects.bulk_update(batch, ['genres', 'instruments'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_venueprofile_location_normalized'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='musicianprofile',
+            name='genres_array',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=100), default=list, size=None),
+        ),
+        migrations.AddField(
+            model_name='musicianprofile',
+            name='instruments_array',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=100), default=list, size=None),
+        ),
+        migrations.RunPython(copy_tags_to_arrays, copy_arrays_to_tags),
+        migrations.RemoveField(
+            model_name='musicianprofile',
+            name='genres',
+        ),
+        migrations.RemoveField(
+            model_name='musicianprofile',
+            name='instruments',
+        ),
+        migrations.RenameField(
+            model_name='musicianprofile',
+            old_name='genres_array',
+            new_name='genres',
+        ),
+        migrations.RenameField(
+            model_name='musicianprofile',
+            old_name='instruments_array',
+            new_name='instruments',
+        ),
+        migrations.AddIndex(
+            model_name='musicianprofile',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['genres'], name='musician_genres_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='musicianprofile',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['instruments'], name='musician_instruments_gin'),
+        ),
+    ]
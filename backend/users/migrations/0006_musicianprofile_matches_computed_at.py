@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_musicianprofile_coordinates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='musicianprofile',
+            name='matches_computed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -1,7 +1,14 @@
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.core.validators import RegexValidator
 
+
+def normalize_location(value):
+    """Normalize a city/state name for indexed prefix matching"""
+    return ' '.join((value or '').casefold().split())
+
 class User(AbstractUser):
     USER_TYPE_CHOICES = [
         ('musician', 'Musician'),
@@ -80,8 +87,8 @@ class MusicianProfile(models.Model):
     
     # Musical information
     primary_instrument = models.CharField(max_length=100)
-    instruments = models.JSONField(default=list)  # List of instruments
-    genres = models.JSONField(default=list)  # List of genres
+    instruments = ArrayField(models.CharField(max_length=100), default=list)  # List of instruments
+    genres = ArrayField(models.CharField(max_length=100), default=list)  # List of genres
     experience_years = models.PositiveIntegerField(default=0)
     
     # Performance details
@@ -101,6 +108,8 @@ class MusicianProfile(models.Model):
     # Availability
     availability_schedule = models.JSONField(default=dict)  # Weekly schedule
     travel_distance = models.PositiveIntegerField(default=50)  # miles
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     
     # Portfolio
     portfolio_links = models.JSONField(default=list)  # List of URLs
@@ -110,6 +119,9 @@ class MusicianProfile(models.Model):
     # AI-generated content
     ai_generated_bio = models.TextField(blank=True)
     ai_generated_setlist = models.JSONField(default=list)
+    # When the gig matches stored for the profile were last computed in
+    # full (see ai_services.tasks.backfill_musician_matches)
+    matches_computed_at = models.DateTimeField(null=True, blank=True, editable=False)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -117,6 +129,10 @@ class MusicianProfile(models.Model):
     class Meta:
         verbose_name = 'Musician Profile'
         verbose_name_plural = 'Musician Profiles'
+        indexes = [
+            GinIndex(fields=['genres'], name='musician_genres_gin'),
+            GinIndex(fields=['instruments'], name='musician_instruments_gin'),
+        ]
     
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.primary_instrument}"
@@ -134,6 +150,10 @@ class VenueProfile(models.Model):
     latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     
+    # Normalized copies of user.city/user.state (maintained by users.signals)
+    city_normalized = models.CharField(max_length=100, blank=True, editable=False)
+    state_normalized = models.CharField(max_length=100, blank=True, editable=False)
+    
     # Venue features
     has_stage = models.BooleanField(default=True)
     has_sound_system = models.BooleanField(default=True)
@@ -163,6 +183,22 @@ class VenueProfile(models.Model):
     class Meta:
         verbose_name = 'Venue Profile'
         verbose_name_plural = 'Venue Profiles'
+        indexes = [
+            # Pattern ops let LIKE 'prefix%' use the index
+            models.Index(
+                fields=['city_normalized'], opclasses=['varchar_pattern_ops'],
+                name='venue_city_norm_prefix_idx'
+            ),
+            models.Index(
+                fields=['state_normalized'], opclasses=['varchar_pattern_ops'],
+                name='venue_state_norm_prefix_idx'
+            ),
+        ]
+    
+    def sync_location(self):
+        """Copy the owner's city/state into the normalized location columns"""
+        self.city_normalized = normalize_location(self.user.city)
+        self.state_normalized = normalize_location(self.user.state)
     
     def __str__(self):
         return self.venue_name
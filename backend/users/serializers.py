@@ -60,8 +60,8 @@ class MusicianProfileSerializer(serializers.ModelSerializer):
             'experience_years', 'band_name', 'is_solo_artist', 'band_size',
             'setlist_examples', 'original_music', 'cover_music', 'hourly_rate',
             'per_gig_rate', 'availability_schedule', 'travel_distance',
-            'portfolio_links', 'audio_samples', 'video_samples',
-            'ai_generated_bio', 'ai_generated_setlist', 'created_at', 'updated_at'
+            'latitude', 'longitude', 'portfolio_links', 'audio_samples',
+            'video_samples', 'ai_generated_bio', 'ai_generated_setlist', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'user', 'created_at', 'updated_at']
 
@@ -0,0 +1,22 @@
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+from .models import User, VenueProfile, normalize_location
+
+
+@receiver(pre_save, sender=VenueProfile)
+def sync_venue_location(sender, instance, **kwargs):
+    """Fill the normalized location columns from the venue owner"""
+    instance.sync_location()
+
+
+@receiver(post_save, sender=User)
+def sync_user_venue_location(sender, instance, created, update_fields=None, **kwargs):
+    """Propagate city/state changes to the user's venue profile"""
+    if created:
+        return
+    if update_fields is not None and not {'city', 'state'} & set(update_fields):
+        return
+    VenueProfile.objects.filter(user=instance).update(
+        city_normalized=normalize_location(instance.city),
+        state_normalized=normalize_location(instance.state)
+    )
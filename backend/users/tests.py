@@ -5,7 +5,8 @@ from django.db import IntegrityError
 from decimal import Decimal
 from datetime import date, datetime
 from django.utils import timezone
-from .models import User, MusicianProfile, VenueProfile
+from rest_framework.test import APIClient
+from .models import User, MusicianProfile, VenueProfile, normalize_location
 
 User = get_user_model()
 
@@ -327,3 +328,78 @@ class UserManagerTest(TestCase):
         self.assertTrue(user.check_password('adminpass123'))
         self.assertTrue(user.is_staff)
         self.assertTrue(user.is_superuser)
+
+
+class VenueLocationSyncTest(TestCase):
+    """Test cases for the normalized venue location columns"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            email='venue@example.com',
+            username='venue',
+            password='testpass123',
+            user_type='venue',
+            city='  New   York ',
+            state='NY'
+        )
+        self.profile = VenueProfile.objects.create(
+            user=self.user,
+            venue_name='Test Venue',
+            venue_type='Bar',
+            capacity=200,
+            address='123 Test Street'
+        )
+    
+    def test_normalize_location(self):
+        """Test case and whitespace folding"""
+        self.assertEqual(normalize_location('  San   FRANCISCO '), 'san francisco')
+        self.assertEqual(normalize_location(None), '')
+    
+    def test_profile_copies_owner_location(self):
+        """Test the profile picks up the owner's location on save"""
+        self.assertEqual(self.profile.city_normalized, 'new york')
+        self.assertEqual(self.profile.state_normalized, 'ny')
+    
+    def test_user_location_change_propagates(self):
+        """Test changing the owner's city updates the profile"""
+        self.user.city = 'Brooklyn'
+        self.user.save()
+        
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.city_normalized, 'brooklyn')
+
+
+class MusicianProfileConditionalGetTest(TestCase):
+    """Test cases for ETag support on the musician profile"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            email='musician@example.com',
+            username='musician',
+            password='testpass123',
+            user_type='musician'
+        )
+        self.profile = MusicianProfile.objects.create(
+            user=self.user,
+            primary_instrument='Guitar'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+    
+    def test_unchanged_profile_returns_not_modified(self):
+        """Test If-None-Match with the current ETag returns 304"""
+        response = self.client.get('/api/musician/profile/')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        
+        response = self.client.get('/api/musician/profile/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        
+        self.profile.band_name = 'The Testers'
+        self.profile.save()
+        response = self.client.get('/api/musician/profile/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
@@ -5,6 +5,7 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth import authenticate
 from django.shortcuts import get_object_or_404
+from gig_router.conditional import conditional_response
 from .models import User, MusicianProfile, VenueProfile
 from .serializers import (
     UserSerializer, UserRegistrationSerializer, MusicianProfileSerializer,
@@ -98,6 +99,12 @@ class UserProfileView(generics.RetrieveAPIView):
     def get_object(self):
         return self.request.user
 
+    def retrieve(self, request, *args, **kwargs):
+        # The user is already loaded by authentication, so a 304 costs no query
+        version = [request.user.pk, request.user.updated_at]
+        build = lambda: super(UserProfileView, self).retrieve(request, *args, **kwargs)
+        return conditional_response(request, version, build)
+
 class UserProfileUpdateView(generics.UpdateAPIView):
     serializer_class = UserProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -112,6 +119,17 @@ class MusicianProfileView(generics.RetrieveUpdateAPIView):
     def get_object(self):
         return get_object_or_404(MusicianProfile, user=self.request.user)
 
+    def retrieve(self, request, *args, **kwargs):
+        version = MusicianProfile.objects.filter(
+            user=request.user
+        ).values_list('pk', 'updated_at').first()
+        if version is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        version = [*version, request.user.updated_at]
+        build = lambda: super(MusicianProfileView, self).retrieve(request, *args, **kwargs)
+        return conditional_response(request, version, build)
+
 class MusicianProfileUpdateView(generics.UpdateAPIView):
     serializer_class = MusicianProfileSerializer
     permission_classes = [permissions.IsAuthenticated]